@@ -5,6 +5,8 @@ Features:
 1. Object Tracking (ByteTrack)
 2. Spatial Analytics (Region of Interest / Zone Counting)
 3. Headless Processing with Hardware-Accelerated UDP Streaming (H.264)
+4. Offline Multi-Process Analysis of Recorded Video (--video)
+5. Cross-Camera Re-Identification with site-wide IDs (--reid)
 """
 
 import cv2
@@ -13,16 +15,13 @@ from ultralytics import YOLO
 import argparse
 import time
 
-def create_gstreamer_source(sensor_id=0, width=1280, height=720, fps=30):
-    """CSI Camera Input Pipeline (NVMM Memory)"""
-    return (
-        f"nvarguscamerasrc sensor-id={sensor_id} ! "
-        f"video/x-raw(memory:NVMM), width={width}, height={height}, framerate={fps}/1 ! "
-        f"nvvidconv flip-method=0 ! "
-        f"video/x-raw, width={width}, height={height}, format=BGRx ! "
-        f"videoconvert ! "
-        f"video/x-raw, format=BGR ! appsink drop=True"
-    )
+from visiondock_core.gst import camera_spec, open_capture
+from visiondock_core.offline import run_offline, print_scaling, stitch_track_ids
+from visiondock_core.reid import ColorEmbedder, CrossCameraReID, ModelEmbedder
+from visiondock_core.stream_writer import AsyncStreamWriter
+from visiondock_core.rtsp_server import RtspServer
+from visiondock_core.trace import LatencyTracer, format_latency
+from visiondock_core.export_cache import batch_mismatch, resolve_model
 
 def create_gstreamer_sink(host="127.0.0.1", port=5000, width=1280, height=720, fps=30):
     """
@@ -42,131 +41,318 @@ def is_inside_polygon(point, polygon):
     """Check if (x, y) center point is inside the given polygon"""
     return cv2.pointPolygonTest(polygon, point, False) >= 0
 
+def create_zone(width, height):
+    """Analytics zone polygon scaled to the frame size (a trapezoid in the middle)"""
+    zone_pts = np.array([
+        [int(width * 0.2), int(height * 0.9)],
+        [int(width * 0.4), int(height * 0.4)],
+        [int(width * 0.6), int(height * 0.4)],
+        [int(width * 0.8), int(height * 0.9)]
+    ], np.int32)
+    return zone_pts.reshape((-1, 1, 2))
+
+
+class ZoneAnalyzer:
+    """
+    Offline worker for one video segment: batched ByteTrack + zone entry counting.
+
+    Frames before segment['start'] are warmup: they prime the tracker and zone
+    state but are not counted. Tracks on warmup frames (head) and on the last
+    `overlap` counted frames (tail) are returned for cross-segment ID stitching.
+    """
+
+    def __init__(self, model_path, conf=0.3, overlap=30):
+        self.model = YOLO(model_path)
+        self.conf = conf
+        self.overlap = overlap
+
+    def begin_segment(self, segment, info):
+        # Fresh tracker state (and local ID counter) for every segment
+        predictor = getattr(self.model, 'predictor', None)
+        for tracker in getattr(predictor, 'trackers', None) or []:
+            tracker.reset()
+        self.segment = segment
+        self.zone_pts = create_zone(info['width'], info['height'])
+        self.objects_in_zone = set()
+        self.entries = []
+        self.track_ids = set()
+        self.head_tracks = {}
+        self.tail_tracks = {}
+
+    def process_batch(self, indices, frames):
+        # persist=True: one tracker consumes the batch frames in order
+        results = self.model.track(frames, persist=True, conf=self.conf, verbose=False, tracker="bytetrack.yaml")
+        tail_from = self.segment['end'] - self.overlap
+        for idx, r in zip(indices, results):
+            counted = idx >= self.segment['start']
+            rows = []
+            current_frame_objects = set()
+            if r.boxes.id is not None:
+                boxes = r.boxes.xyxy.cpu().numpy()
+                track_ids = r.boxes.id.int().cpu().numpy()
+                classes = r.boxes.cls.int().cpu().numpy()
+                for box, track_id, cls in zip(boxes, track_ids, classes):
+                    track_id, cls = int(track_id), int(cls)
+                    x1, y1, x2, y2 = map(float, box)
+                    rows.append([track_id, cls, x1, y1, x2, y2])
+                    if is_inside_polygon((int((x1 + x2) / 2), int(y2)), self.zone_pts):
+                        current_frame_objects.add(track_id)
+                        if counted and track_id not in self.objects_in_zone:
+                            self.entries.append((idx, track_id, cls))
+                    if counted:
+                        self.track_ids.add(track_id)
+            self.objects_in_zone = current_frame_objects
+
+            if not counted:
+                self.head_tracks[idx] = rows
+            elif idx >= tail_from:
+                self.tail_tracks[idx] = rows
+
+    def end_segment(self):
+        return {
+            'entries': self.entries,
+            'track_ids': self.track_ids,
+            'head_tracks': self.head_tracks,
+            'tail_tracks': self.tail_tracks,
+        }
+
+
+def analyze_video_file(args):
+    """Offline zone analytics over a recorded video using a process pool"""
+    runs = []
+    for workers in args.workers:
+        print(f"\nAnalyzing {args.video} with {workers} worker(s), batch {args.batch}...")
+        run = run_offline(
+            args.video, ZoneAnalyzer,
+            {'model_path': args.model, 'conf': args.conf, 'overlap': args.overlap},
+            workers=workers, batch=args.batch, overlap=args.overlap
+        )
+        runs.append(run)
+
+    # Counts are identical across runs; report the last one
+    segments = runs[-1]['segments']
+    id_maps = stitch_track_ids(segments)
+    total_entered_zone = sum(len(seg['entries']) for seg in segments)
+    unique_tracks = set()
+    unique_entered = set()
+    for seg, id_map in zip(segments, id_maps):
+        unique_tracks.update(id_map[t] for t in seg['track_ids'])
+        unique_entered.update(id_map[t] for _, t, _ in seg['entries'] if t in id_map)
+
+    info = runs[-1]['info']
+    print(f"\nVideo: {info['width']}x{info['height']} @ {info['fps']:.1f} FPS, {info['frames']} frames, "
+          f"{runs[-1]['keyframes']} keyframes")
+    print(f"Unique Tracks (stitched): {len(unique_tracks)}")
+    print(f"Total Zone Entries:       {total_entered_zone}")
+    print(f"Unique Objects in Zone:   {len(unique_entered)}")
+    print_scaling(runs)
+
+def open_camera(args, camera_id):
+    """Camera input through the shared pipeline builder (CSI: NVMM hardware path)"""
+    return open_capture(camera_spec(args.source_type, camera_id, args.width, args.height), backend=args.capture_backend)
+
+def create_reid(args):
+    """Site-wide re-ID stage shared by all cameras of this process"""
+    if args.reid_model:
+        print(f"Loading Re-ID embedder: {args.reid_model}")
+        embedder = ModelEmbedder(args.reid_model)
+    else:
+        embedder = ColorEmbedder()
+    return CrossCameraReID(embedder, capacity=args.reid_capacity, ttl_s=args.reid_ttl, threshold=args.reid_threshold)
+
+def annotate_frame(frame, results, zone_pts, state, camera_id, reid=None):
+    """Zone analytics + drawing for one tracked frame; updates the camera's zone `state` in place"""
+    # Create a clean canvas for our analytics drawing
+    annotated_frame = frame.copy()
+    current_frame_objects = set()
+
+    # Process tracked objects
+    if results[0].boxes.id is not None:
+        boxes = results[0].boxes.xyxy.cpu().numpy()
+        track_ids = results[0].boxes.id.int().cpu().numpy()
+        classes = results[0].boxes.cls.int().cpu().numpy()
+        if reid is not None:
+            # Site-wide IDs: the same object keeps its ID across cameras
+            track_ids = reid.update(camera_id, frame, track_ids, boxes)
+
+        for box, track_id, cls in zip(boxes, track_ids, classes):
+            x1, y1, x2, y2 = map(int, box)
+            cx, cy = int((x1 + x2) / 2), int(y2)  # Use bottom-center for foot placement inside zone
+            
+            # Highlight the tracked object
+            color = (0, 255, 0)
+            
+            # Check Zone Intrusion
+            is_in_zone = is_inside_polygon((cx, cy), zone_pts)
+            if is_in_zone:
+                color = (0, 0, 255) # Red if inside restricted zone
+                current_frame_objects.add(track_id)
+                
+                # Count unique entries
+                if track_id not in state['in_zone']:
+                    state['entered'] += 1
+                    print(f"[ALERT] Camera {camera_id}: Object ID {track_id} (Class {cls}) entered the restricted zone!")
+
+            # Draw Object Bounding Box and ID
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(annotated_frame, f"ID:{track_id} C:{cls}", (x1, y1 - 10), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            cv2.circle(annotated_frame, (cx, cy), 5, color, -1)
+
+    # Update zone state memory (to track when they leave)
+    state['in_zone'] = current_frame_objects
+
+    # Draw the Analytics Zone
+    zone_color = (0, 0, 255) if len(current_frame_objects) > 0 else (255, 0, 0)
+    cv2.polylines(annotated_frame, [zone_pts], isClosed=True, color=zone_color, thickness=2)
+    return annotated_frame
+
 def main():
     parser = argparse.ArgumentParser(description='Jetson Industrial Analytics')
     parser.add_argument('--model', type=str, default='yolo11n.pt', help='Model path')
     parser.add_argument('--source-type', type=str, default='csi', choices=['csi', 'usb'])
-    parser.add_argument('--camera', type=int, default=0, help='Camera ID')
+    parser.add_argument('--camera', type=int, nargs='+', default=[0], help='Camera ID(s); several cameras are processed round-robin')
     parser.add_argument('--width', type=int, default=1280)
     parser.add_argument('--height', type=int, default=720)
     parser.add_argument('--conf', type=float, default=0.3)
+    parser.add_argument('--capture-backend', type=str, default='opencv', choices=['opencv', 'appsink'],
+                        help='cv2.VideoCapture or native PyGObject appsink')
     parser.add_argument('--stream-out', action='store_true', help='Enable UDP H.264 Streaming')
     parser.add_argument('--stream-ip', type=str, default='127.0.0.1', help='Destination IP for UDP stream')
     parser.add_argument('--stream-port', type=int, default=5000, help='Destination port for UDP stream')
+    parser.add_argument('--stream-fps', type=int, default=30, help='Paced output frame rate for the UDP / RTSP stream')
+    parser.add_argument('--rtsp-out', action='store_true', help='Serve the output over RTSP: one shared encode for any number of viewers')
+    parser.add_argument('--rtsp-port', type=int, default=8554, help='RTSP server port')
+    parser.add_argument('--rtsp-mount', type=str, default='/live', help='RTSP mount point')
     parser.add_argument('--display', action='store_true', help='Show local display window')
+    parser.add_argument('--video', type=str, help='Recorded video file: run offline multi-process analytics instead of a live camera')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2], help='Worker processes for --video (several values = scaling run)')
+    parser.add_argument('--batch', type=int, default=8, help='Inference batch size for --video')
+    parser.add_argument('--overlap', type=int, default=30, help='Warmup frames shared between segments for track stitching')
+    parser.add_argument('--reid', action='store_true', help='Cross-camera re-identification: site-wide IDs instead of per-camera track IDs')
+    parser.add_argument('--reid-model', type=str, default=None, help='Embedding model for --reid (e.g. yolo11n-cls.pt); default: color histogram')
+    parser.add_argument('--reid-threshold', type=float, default=0.8, help='Minimum cosine similarity to reuse an identity')
+    parser.add_argument('--reid-capacity', type=int, default=512, help='Identities kept in the embedding index')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace (chrome://tracing) of per-frame stage spans to this file')
+    parser.add_argument('--trace-seconds', type=float, default=10.0, help='Length of the --trace window')
+    parser.add_argument('--trace-delay', type=float, default=5.0, help='Seconds to skip (warmup) before the --trace window starts')
+    parser.add_argument('--reid-ttl', type=float, default=120.0, help='Seconds an unseen identity stays matchable')
     args = parser.parse_args()
+    # 'name.engine' -> the cached engine of name.pt for this runtime (exported once if missing).
+    # --video runs batches of up to --batch frames (shorter at segment ends): dynamic engine
+    if args.video:
+        args.model = resolve_model(args.model, batch=args.batch, dynamic=True, export_missing=True)
+        problem = batch_mismatch(args.model, args.batch)
+        if problem:
+            parser.error(problem)
+    else:
+        args.model = resolve_model(args.model, export_missing=True)
 
+    if args.video:
+        analyze_video_file(args)
+        return
+
+    cameras = args.camera
     print(f"Loading Model: {args.model} for Tracking...")
-    model = YOLO(args.model)
+    # ByteTrack state lives in the model's predictor: one model instance per camera
+    models = {cam: YOLO(args.model) for cam in cameras}
+    reid = create_reid(args) if args.reid else None
 
     # 1. Initialize Camera Input
-    if args.source_type == 'csi':
-        pipe_in = create_gstreamer_source(args.camera, args.width, args.height)
-        cap = cv2.VideoCapture(pipe_in, cv2.CAP_GSTREAMER)
-    else:
-        cap = cv2.VideoCapture(args.camera)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, args.width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, args.height)
-
-    if not cap.isOpened():
-        print(f"Error: Cannot open {args.source_type} camera {args.camera}")
-        return
+    caps = {}
+    for cam in cameras:
+        caps[cam] = open_camera(args, cam)
+        if not caps[cam].isOpened():
+            print(f"Error: Cannot open {args.source_type} camera {cam}")
+            for cap in caps.values():
+                cap.release()
+            return
 
     # 2. Initialize Streaming Output
     video_writer = None
-    if args.stream_out:
-        pipe_out = create_gstreamer_sink(args.stream_ip, args.stream_port, args.width, args.height)
+    rtsp_server = None
+    if args.rtsp_out:
+        if len(cameras) > 1:
+            print(f"Serving camera {cameras[0]} only")
+        rtsp_server = RtspServer(args.rtsp_port, args.rtsp_mount, args.width, args.height, args.stream_fps).start()
+        print(f"\nRTSP server ready: rtsp://<jetson_ip>:{args.rtsp_port}{rtsp_server.mount}\n")
+        video_writer = AsyncStreamWriter(rtsp_server, fps=args.stream_fps, name="rtsp-writer").start()
+    elif args.stream_out:
+        pipe_out = create_gstreamer_sink(args.stream_ip, args.stream_port, args.width, args.height, args.stream_fps)
+        if len(cameras) > 1:
+            print(f"Streaming camera {cameras[0]} only")
         print(f"\nStarting Hardware UDP Stream at: udp://@{args.stream_ip}:{args.stream_port}")
         print("To view remotely, open VLC Network Stream: udp://@<jetson_ip>:5000\n")
-        video_writer = cv2.VideoWriter(pipe_out, cv2.CAP_GSTREAMER, 0, 30, (args.width, args.height))
+        gst_writer = cv2.VideoWriter(pipe_out, cv2.CAP_GSTREAMER, 0, args.stream_fps, (args.width, args.height))
+        # Encoding runs on its own paced thread so encoder/network stalls never block inference
+        video_writer = AsyncStreamWriter(gst_writer, fps=args.stream_fps).start()
 
     # 3. Define the Analytics Zone (Region of Interest Polygon)
     # Automatically scales based on camera resolution (e.g. a trapezoid in the middle)
-    zone_pts = np.array([
-        [int(args.width * 0.2), int(args.height * 0.9)],
-        [int(args.width * 0.4), int(args.height * 0.4)],
-        [int(args.width * 0.6), int(args.height * 0.4)],
-        [int(args.width * 0.8), int(args.height * 0.9)]
-    ], np.int32)
-    zone_pts = zone_pts.reshape((-1, 1, 2))
+    zone_pts = create_zone(args.width, args.height)
 
     frame_count = 0
     start_time = time.time()
     
-    # State tracking for objects currently in the zone
-    objects_in_zone = set()
-    total_entered_zone = 0
+    # State tracking for objects currently in the zone (per camera)
+    states = {cam: {'in_zone': set(), 'entered': 0} for cam in cameras}
+
+    # Capture timestamp travels with each frame; stages are stamped as they finish
+    tracer = LatencyTracer('analytics')
+    if args.trace:
+        tracer.capture(args.trace, args.trace_seconds, args.trace_delay)
 
     print("Industrial Analytics Running... Press 'q' to stop.")
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("Failed to grab frame.")
-                break
-
-            # Run inference WITH Object Tracking (ByteTrack)
-            results = model.track(frame, persist=True, conf=args.conf, verbose=False, tracker="bytetrack.yaml")
-            
-            # Create a clean canvas for our analytics drawing
-            annotated_frame = frame.copy()
-            current_frame_objects = set()
+        running = True
+        while running:
+            for cam in cameras:
+                # Timestamp at grab (appsink: buffer PTS), before decode/convert
+                ret = caps[cam].grab()
+                trace = tracer.begin(getattr(caps[cam], 'last_timestamp', None) or time.monotonic(), track=f"camera {cam}")
+                if ret:
+                    ret, frame = caps[cam].retrieve()
+                if not ret:
+                    print(f"Failed to grab frame from camera {cam}.")
+                    running = False
+                    break
+                trace.mark('retrieve')
 
-            # Process tracked objects
-            if results[0].boxes.id is not None:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                track_ids = results[0].boxes.id.int().cpu().numpy()
-                classes = results[0].boxes.cls.int().cpu().numpy()
+                # Run inference WITH Object Tracking (ByteTrack)
+                results = models[cam].track(frame, persist=True, conf=args.conf, verbose=False, tracker="bytetrack.yaml")
+                trace.mark('inference')
+                state = states[cam]
+                annotated_frame = annotate_frame(frame, results, zone_pts, state, cam, reid)
 
-                for box, track_id, cls in zip(boxes, track_ids, classes):
-                    x1, y1, x2, y2 = map(int, box)
-                    cx, cy = int((x1 + x2) / 2), int(y2)  # Use bottom-center for foot placement inside zone
-                    
-                    # Highlight the tracked object
-                    color = (0, 255, 0)
-                    
-                    # Check Zone Intrusion
-                    is_in_zone = is_inside_polygon((cx, cy), zone_pts)
-                    if is_in_zone:
-                        color = (0, 0, 255) # Red if inside restricted zone
-                        current_frame_objects.add(track_id)
-                        
-                        # Count unique entries
-                        if track_id not in objects_in_zone:
-                            total_entered_zone += 1
-                            print(f"[ALERT] Object ID {track_id} (Class {cls}) entered the restricted zone!")
-
-                    # Draw Object Bounding Box and ID
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(annotated_frame, f"ID:{track_id} C:{cls}", (x1, y1 - 10), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                    cv2.circle(annotated_frame, (cx, cy), 5, color, -1)
-
-            # Update zone state memory (to track when they leave)
-            objects_in_zone = current_frame_objects
-
-            # Draw the Analytics Zone
-            zone_color = (0, 0, 255) if len(objects_in_zone) > 0 else (255, 0, 0)
-            cv2.polylines(annotated_frame, [zone_pts], isClosed=True, color=zone_color, thickness=2)
-            
-            # Overlay Statistics
-            overlay = annotated_frame.copy()
-            cv2.rectangle(overlay, (10, 10), (450, 110), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.6, annotated_frame, 0.4, 0, annotated_frame)
-            
-            fps = frame_count / (time.time() - start_time) if frame_count > 0 else 0
-            cv2.putText(annotated_frame, f"System FPS:   {fps:.1f}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-            cv2.putText(annotated_frame, f"Zone Entries: {total_entered_zone}", (20, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-            cv2.putText(annotated_frame, f"Active In Zone: {len(objects_in_zone)}", (20, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255) if len(objects_in_zone)>0 else (0, 255, 0), 2)
-
-            # Handle Outputs
-            if video_writer is not None:
-                video_writer.write(annotated_frame)
-            
-            if args.display:
-                cv2.imshow('Jetson Advanced Analytics', annotated_frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+                # Overlay Statistics
+                overlay = annotated_frame.copy()
+                cv2.rectangle(overlay, (10, 10), (450, 110), (0, 0, 0), -1)
+                cv2.addWeighted(overlay, 0.6, annotated_frame, 0.4, 0, annotated_frame)
+                
+                fps = frame_count / (time.time() - start_time) if frame_count > 0 else 0
+                cv2.putText(annotated_frame, f"System FPS:   {fps:.1f}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                cv2.putText(annotated_frame, f"Zone Entries: {state['entered']}", (20, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+                cv2.putText(annotated_frame, f"Active In Zone: {len(state['in_zone'])}", (20, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255) if len(state['in_zone'])>0 else (0, 255, 0), 2)
+
+                trace.mark('annotate')
+
+                # Handle Outputs
+                if video_writer is not None and cam == cameras[0]:
+                    # The writer thread records the frame's age when it reaches the encoder
+                    video_writer.write(annotated_frame, trace.capture_ts)
+                    trace.mark('stream_queue')
+                
+                if args.display:
+                    title = 'Jetson Advanced Analytics' if len(cameras) == 1 else f'Jetson Advanced Analytics - Camera {cam}'
+                    cv2.imshow(title, annotated_frame)
+                    key = cv2.waitKey(1) & 0xFF
+                    trace.mark('display')
+                    tracer.finish(trace)
+                    if key == ord('q'):
+                        running = False
+                        break
+                else:
+                    tracer.finish(trace)
 
             frame_count += 1
 
@@ -174,11 +360,33 @@ def main():
         print("\nAnalytics Stopped.")
     
     finally:
-        cap.release()
+        for cap in caps.values():
+            cap.release()
+        if reid is not None:
+            st = reid.stats()
+            print(f"Re-ID: {st['global_ids']} global IDs | {st['reidentified']} re-identified | "
+                  f"{st['index_rows']} in index ({st['evicted']} evicted) | "
+                  f"embed {st['embed_ms_per_crop']:.2f} ms/crop")
         if video_writer is not None:
             video_writer.release()
+            st = video_writer.stats()
+            print(f"Stream-out: {st['frames_written']} frames written @ {st['fps_target']:.0f} FPS | "
+                  f"duplicated {st['duplicated']} | dropped {st['dropped_queue'] + st['dropped_pacing']} | "
+                  f"slow writes {st['slow_writes']} | missed ticks {st['missed_ticks']} | "
+                  f"write errors {st['write_errors']} | "
+                  f"encode {st['write_ms_mean']:.1f} ms avg / {st['write_ms_max']:.1f} ms max")
+            age = st['age_ms']
+            print(f"Stream-out frame age at encoder: p50 {age['p50']:.1f} ms | p95 {age['p95']:.1f} ms | "
+                  f"p99 {age['p99']:.1f} ms | max {age['max']:.1f} ms")
+        if rtsp_server is not None:
+            st = rtsp_server.stats()
+            print(f"RTSP: {st['clients_total']} client(s) served by {st['media_configured']} encoder pipeline(s) | "
+                  f"{st['encoded_frames']} frames encoded | {st['dropped_congestion']} dropped on encoder congestion | "
+                  f"per-client drops {sum(c['drops'] for c in st['clients'])}")
+        tracer.flush()
+        print(format_latency(tracer.summary(), "Capture-to-output latency per stage"))
         cv2.destroyAllWindows()
-        print(f"Total Unique Zone Entries: {total_entered_zone}")
+        print(f"Total Unique Zone Entries: {sum(state['entered'] for state in states.values())}")
 
 
 if __name__ == "__main__":
@@ -11,6 +11,10 @@ import argparse
 import time
 import logging
 
+from visiondock_core.gst import camera_spec, open_capture
+from visiondock_core.offline import run_offline, print_scaling, DetectionCounter
+from visiondock_core.export_cache import batch_mismatch, resolve_model
+
 # Configure Industrial Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,24 +26,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger("JetsonAI")
 
-def get_camera(source_type, camera_id, width, height):
-    """Helper to initialize and return a cv2.VideoCapture object"""
-    if source_type == 'usb':
-        cap = cv2.VideoCapture(camera_id)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-    else:
-        gst_pipeline = (
-            f"nvarguscamerasrc sensor-id={camera_id} ! "
-            f"video/x-raw(memory:NVMM), width={width}, height={height}, framerate=30/1 ! "
-            f"nvvidconv flip-method=0 ! "
-            f"video/x-raw, width={width}, height={height}, format=BGRx ! "
-            f"videoconvert ! "
-            f"video/x-raw, format=BGR ! appsink"
+def get_camera(source_type, camera_id, width, height, backend='opencv'):
+    """Helper to initialize and return a cv2.VideoCapture object (or the appsink equivalent)"""
+    spec = camera_spec(source_type, camera_id, width, height)
+    logger.debug(f"Capture spec: {spec} ({backend})")
+    return open_capture(spec, backend=backend)
+
+
+def detect_video_file(args):
+    """Offline detection over a recorded video, split across worker processes"""
+    runs = []
+    for workers in args.workers:
+        logger.info(f"Processing {args.video} with {workers} worker(s), batch {args.batch}...")
+        run = run_offline(
+            args.video, DetectionCounter,
+            {'model_path': args.model, 'conf': args.conf, 'iou': args.iou, 'imgsz': args.imgsz},
+            workers=workers, batch=args.batch
         )
-        logger.debug(f"GStreamer Pipeline: {gst_pipeline}")
-        cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
-    return cap
+        runs.append(run)
+
+    segments = runs[-1]['segments']
+    detections = sum(seg['detections'] for seg in segments)
+    classes = {}
+    for seg in segments:
+        for name, count in seg['classes'].items():
+            classes[name] = classes.get(name, 0) + count
+
+    logger.info(f"Video processed: {runs[-1]['frames']} frames, {detections} detections")
+    for name, count in sorted(classes.items(), key=lambda x: -x[1]):
+        logger.info(f"  {name}: {count}")
+    print_scaling(runs)
 
 
 def main():
@@ -49,18 +65,36 @@ def main():
     parser.add_argument('--camera', type=int, default=0, help='Camera ID')
     parser.add_argument('--width', type=int, default=1280, help='Camera width')
     parser.add_argument('--height', type=int, default=720, help='Camera height')
+    parser.add_argument('--capture-backend', type=str, default='opencv', choices=['opencv', 'appsink'],
+                        help='cv2.VideoCapture or native PyGObject appsink (mapped buffers, PTS timestamps)')
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
     parser.add_argument('--iou', type=float, default=0.45, help='IOU threshold')
     parser.add_argument('--imgsz', type=int, default=640, help='Inference image size')
     parser.add_argument('--display', action='store_true', help='Show display window')
+    parser.add_argument('--video', type=str, help='Recorded video file: run offline multi-process detection instead of a live camera')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2], help='Worker processes for --video (several values = scaling run)')
+    parser.add_argument('--batch', type=int, default=8, help='Inference batch size for --video')
     args = parser.parse_args()
+    # 'name.engine' -> the cached engine of name.pt for this runtime (exported once if missing).
+    # --video runs batches of up to --batch frames (shorter at segment ends): dynamic engine
+    if args.video:
+        args.model = resolve_model(args.model, imgsz=args.imgsz, batch=args.batch, dynamic=True, export_missing=True)
+        problem = batch_mismatch(args.model, args.batch)
+        if problem:
+            parser.error(problem)
+    else:
+        args.model = resolve_model(args.model, imgsz=args.imgsz, export_missing=True)
+
+    if args.video:
+        detect_video_file(args)
+        return
 
     # Load YOLO Model
     logger.info(f"Loading model: {args.model}")
     model = YOLO(args.model)
     
     logger.info(f"Opening {args.source_type.upper()} camera {args.camera}...")
-    cap = get_camera(args.source_type, args.camera, args.width, args.height)
+    cap = get_camera(args.source_type, args.camera, args.width, args.height, args.capture_backend)
 
     if not cap.isOpened():
         logger.error(f"Could not open {args.source_type} camera {args.camera} at startup.")
@@ -83,7 +117,7 @@ def main():
                 logger.warning("Camera hardware connection lost! Attempting to auto-heal in 3 seconds...")
                 cap.release()
                 time.sleep(3)
-                cap = get_camera(args.source_type, args.camera, args.width, args.height)
+                cap = get_camera(args.source_type, args.camera, args.width, args.height, args.capture_backend)
                 if cap.isOpened():
                     logger.info("Camera successfully reconnected!")
                 continue
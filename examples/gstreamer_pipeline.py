@@ -5,33 +5,30 @@ Uses nvarguscamerasrc and hardware video decoding
 Supports: JetPack 4.x (r32), 5.x (r35), 6.x (r36)
 """
 
-import os
-import re
 import cv2
 import numpy as np
 from ultralytics import YOLO
 import argparse
 
+from visiondock_core.gst import (
+    CaptureSpec, PipelineCache, build_pipeline, open_capture,
+    get_l4t_version, get_gst_compatibility
+)
+from visiondock_core.appsink import benchmark_backends, format_benchmark
+from visiondock_core import rtsp_server
+from visiondock_core.preprocess import FramePreprocessor, measure_capture_cpu
+from visiondock_core.export_cache import resolve_model
+
+
+def csi_spec(sensor_id=0, capture_width=1920, capture_height=1080, display_width=1280,
+             display_height=720, framerate=30, flip_method=0):
+    return CaptureSpec('csi', sensor_id, capture_width, capture_height, framerate,
+                       display_width, display_height, flip_method)
+
+
+def v4l2_spec(device="/dev/video0", width=1280, height=720, framerate=30):
+    return CaptureSpec('v4l2', device, width, height, framerate)
 
-def get_l4t_version():
-    """Read L4T major version from /etc/nv_tegra_release"""
-    try:
-        with open("/etc/nv_tegra_release", "r") as f:
-            line = f.readline()
-        match = re.search(r"R(\d+)", line)
-        return int(match.group(1)) if match else 36
-    except Exception:
-        return 36  # Default: assume modern JetPack
-
-
-def get_gst_compatibility():
-    """Detect GStreamer compatibility mode from ENV or system"""
-    compat = os.environ.get('GST_VERSION_COMPAT', 'modern')
-    l4t_version = get_l4t_version()
-    
-    if l4t_version < 35:
-        return 'legacy'
-    return compat
 
 def create_gstreamer_pipeline(
     sensor_id=0,
@@ -42,28 +39,9 @@ def create_gstreamer_pipeline(
     framerate=30,
     flip_method=0
 ):
-    compat_mode = get_gst_compatibility()
-    
-    # Adapt format based on compatibility mode
-    pixel_format = "NV12" # Standard for Jetson
-    
-    # Modern JetPack 6 (r36) / GStreamer 1.20 might require specific appsink settings
-    appsink_extras = "drop=1"
-    if compat_mode == 'modern':
-        appsink_extras = "drop=1, max-buffers=1"
-    
-    return (
-        f"nvarguscamerasrc sensor-id={sensor_id} ! "
-        f"video/x-raw(memory:NVMM), "
-        f"width=(int){capture_width}, height=(int){capture_height}, "
-        f"format=(string){pixel_format}, framerate=(fraction){framerate}/1 ! "
-        f"nvvidconv flip-method={flip_method} ! "
-        f"video/x-raw, width=(int){display_width}, height=(int){display_height}, "
-        f"format=(string)BGRx ! "
-        f"videoconvert ! "
-        f"video/x-raw, format=(string)BGR ! "
-        f"appsink {appsink_extras}"
-    )
+    """CSI pipeline string for the variant cached on this host (preferred variant if none)"""
+    spec = csi_spec(sensor_id, capture_width, capture_height, display_width, display_height, framerate, flip_method)
+    return build_pipeline(spec, PipelineCache().get(spec))
 
 
 def create_v4l2_pipeline(device="/dev/video0", width=1280, height=720):
@@ -78,14 +56,41 @@ def create_v4l2_pipeline(device="/dev/video0", width=1280, height=720):
     Returns:
         GStreamer pipeline string
     """
-    
-    return (
-        f"v4l2src device={device} ! "
-        f"video/x-raw, width=(int){width}, height=(int){height} ! "
-        f"videoconvert ! "
-        f"video/x-raw, format=(string)BGR ! "
-        f"appsink drop=1"
-    )
+    spec = v4l2_spec(device, width, height)
+    return build_pipeline(spec, PipelineCache().get(spec))
+
+
+def measure_formats(spec, n_frames=300, imgsz=640):
+    """
+    CPU cost per frame of BGR capture (videoconvert on the CPU) against BGRx and
+    NV12 capture with the conversion fused into preprocessing, for one camera.
+    """
+    rows = []
+    for fmt in ('BGR', 'BGRx', 'NV12'):
+        fmt_spec = spec._replace(format=fmt)
+        print(f"Measuring {fmt} capture ({n_frames} frames)...")
+        preprocessor = FramePreprocessor(imgsz=imgsz, layout=fmt)
+        row = measure_capture_cpu(lambda: open_capture(fmt_spec, verbose=False), fmt, n_frames, preprocessor)
+        if row is None:
+            print(f"  {fmt}: capture did not open")
+            continue
+        rows.append(row)
+
+    if not rows:
+        return
+    base = rows[0] if rows[0]['layout'] == 'BGR' else None
+    print(f"\n{'Format':>7} {'FPS':>7} {'CPU ms/frame':>13} {'CPU % core':>11} {'Preproc ms':>11} {'Saved vs BGR':>13}")
+    for row in rows:
+        saved = ""
+        if base is not None and row is not base:
+            saved_ms = base['cpu_ms_per_frame'] - row['cpu_ms_per_frame']
+            saved = f"{saved_ms:+.2f} ms"
+        print(f"{row['layout']:>7} {row['fps']:>7.1f} {row['cpu_ms_per_frame']:>13.2f} {row['cpu_percent']:>11.1f} "
+              f"{row['preprocess_ms']:>11.2f} {saved:>13}")
+    if base is not None:
+        best = min(rows, key=lambda r: r['cpu_ms_per_frame'])
+        core = (base['cpu_ms_per_frame'] - best['cpu_ms_per_frame']) * spec.framerate / 10.0
+        print(f"\nPer camera at {spec.framerate} FPS, {best['layout']} saves {core:.1f}% of one CPU core vs BGR")
 
 
 def main():
@@ -102,19 +107,46 @@ def main():
     parser.add_argument('--model', type=str, default='yolov8n.pt', help='Model path')
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
     parser.add_argument('--display', action='store_true', help='Display results')
+    parser.add_argument('--measure-formats', action='store_true',
+                        help='Measure capture+preprocess CPU per frame for BGR vs BGRx vs NV12, then exit')
+    parser.add_argument('--measure-frames', type=int, default=300, help='Frames per format for --measure-formats')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size for --measure-formats preprocessing')
+    parser.add_argument('--test-pattern', type=str, help='Use videotestsrc with this pattern (e.g. ball, smpte) instead of a camera')
+    parser.add_argument('--capture-backend', type=str, default='opencv', choices=['opencv', 'appsink'],
+                        help='cv2.VideoCapture or native PyGObject appsink (mapped buffers, PTS timestamps)')
+    parser.add_argument('--compare-backends', action='store_true',
+                        help='Benchmark cv2.VideoCapture against the native appsink backend on this pipeline, then exit')
+    parser.add_argument('--rtsp-self-test', action='store_true',
+                        help='Serve videotestsrc over RTSP to several local clients and check they share one encoder, then exit')
+    parser.add_argument('--rtsp-clients', type=int, default=3, help='Concurrent local clients for --rtsp-self-test')
+    parser.add_argument('--rtsp-seconds', type=float, default=5.0, help='Measurement time for --rtsp-self-test')
+    parser.add_argument('--rtsp-port', type=int, default=8554, help='Server port for --rtsp-self-test')
     args = parser.parse_args()
     
-    # Create GStreamer pipeline
-    if args.v4l2:
+    if args.rtsp_self_test:
+        if not rtsp_server.HAVE_RTSP:
+            print("RTSP self-test needs PyGObject and gir1.2-gst-rtsp-server-1.0")
+            raise SystemExit(2)
+        print(f"RTSP self-test: {args.rtsp_clients} concurrent clients, {args.rtsp_seconds:.0f}s at {args.framerate} FPS...")
+        passed, report = rtsp_server.self_test(args.rtsp_clients, args.rtsp_seconds, args.rtsp_port,
+                                               fps=args.framerate)
+        print(f"  Encoder pipelines built: {report['media_configured']}")
+        print(f"  Encoder output: {report['encoder_fps']:.1f} FPS (source {report['target_fps']} FPS)")
+        for i, fps in enumerate(report['client_fps']):
+            print(f"  Client {i}: {fps:.1f} FPS received")
+        print("PASS: one encode serves all clients" if passed else "FAIL")
+        raise SystemExit(0 if passed else 1)
+    
+    # Describe the capture; the working pipeline variant is probed once and cached
+    if args.test_pattern:
+        print(f"Using videotestsrc pattern: {args.test_pattern}")
+        spec = CaptureSpec('test', args.test_pattern, args.display_width, args.display_height, args.framerate)
+    elif args.v4l2:
         print(f"Using V4L2 device: {args.device}")
-        pipeline = create_v4l2_pipeline(
-            device=args.device,
-            width=args.display_width,
-            height=args.display_height
-        )
+        spec = v4l2_spec(args.device, args.display_width, args.display_height, args.framerate)
     else:
         print(f"Using nvargus sensor ID: {args.sensor_id}")
-        pipeline = create_gstreamer_pipeline(
+        spec = csi_spec(
             sensor_id=args.sensor_id,
             capture_width=args.capture_width,
             capture_height=args.capture_height,
@@ -123,18 +155,31 @@ def main():
             framerate=args.framerate,
             flip_method=args.flip
         )
+    print(f"L4T r{get_l4t_version()} | GStreamer compatibility: {get_gst_compatibility()}")
     
-    print("\nGStreamer Pipeline:")
-    print(pipeline)
-    print()
+    if args.measure_formats:
+        measure_formats(spec, args.measure_frames, args.imgsz)
+        return
+    
+    if args.compare_backends:
+        pipeline = build_pipeline(spec, PipelineCache().get(spec))
+        print(f"Benchmarking capture backends on:\n  {pipeline}\n")
+        print(format_benchmark(benchmark_backends(pipeline, args.measure_frames)))
+        return
     
-    # Load YOLOv8 model
+    # Load YOLOv8 model ('name.engine' -> the cached engine of name.pt for this runtime)
+    args.model = resolve_model(args.model, imgsz=args.imgsz, export_missing=True)
     print(f"Loading model: {args.model}")
     model = YOLO(args.model)
     
     # Open camera with GStreamer
     print("Opening camera...")
-    cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+    cache = PipelineCache()
+    cap = open_capture(spec, cache, backend=args.capture_backend)
+    
+    print("\nGStreamer Pipeline:")
+    print(build_pipeline(spec, cache.get(spec)))
+    print()
     
     if not cap.isOpened():
         print("Error: Could not open camera with GStreamer pipeline")
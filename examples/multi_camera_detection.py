@@ -8,47 +8,52 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 import argparse
+import json
 import threading
-from queue import Queue
+import time
+
+from visiondock_core.control import ControlServer
+from visiondock_core.fairness import FairSharePolicy, parse_camera_values
+from visiondock_core.gst import camera_spec, open_capture, resolve_source
+from visiondock_core.mosaic import MosaicCompositor
+from visiondock_core.preprocess import FramePreprocessor, frame_shape, restore_results, to_bgr
+from visiondock_core.scheduler import BatchScheduler
+from visiondock_core.shm_ring import SharedCapture
+from visiondock_core.sync import FrameSynchronizer
+from visiondock_core.telemetry import CameraTelemetry
+from visiondock_core.trace import LatencyTracer, format_latency
+from visiondock_core.export_cache import resolve_model
+
+
+def camera_source(camera_id, source_type='csi', width=1280, height=720, capture_format='BGR'):
+    """Capture source for cv2.VideoCapture: the cached/probed GStreamer pipeline (or device index)"""
+    return resolve_source(camera_spec(source_type, camera_id, width, height, format=capture_format))
 
 
 class CameraThread(threading.Thread):
     """Thread to capture frames from a camera"""
     
-    def __init__(self, camera_id, queue, source_type='csi', width=1280, height=720):
+    def __init__(self, camera_id, scheduler, source_type='csi', width=1280, height=720, capture_format='BGR',
+                 backend='opencv'):
         threading.Thread.__init__(self)
         self.camera_id = camera_id
-        self.queue = queue
+        self.scheduler = scheduler
         self.running = False
         
-        if source_type == 'usb':
-            self.cap = cv2.VideoCapture(camera_id)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        else:
-            # CSI Camera: GStreamer Pipeline (Hardware Accelerated)
-            gst_pipeline = (
-                f"nvarguscamerasrc sensor-id={camera_id} ! "
-                f"video/x-raw(memory:NVMM), width={width}, height={height}, framerate=30/1 ! "
-                f"nvvidconv flip-method=0 ! "
-                f"video/x-raw, width={width}, height={height}, format=BGRx ! "
-                f"videoconvert ! "
-                f"video/x-raw, format=BGR ! appsink drop=True"
-            )
-            self.cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
+        self.cap = open_capture(camera_spec(source_type, camera_id, width, height, format=capture_format), backend=backend)
         
     def run(self):
         self.running = True
         while self.running:
-            ret, frame = self.cap.read()
+            # Capture timestamp at grab (sensor hand-off), before decode/convert
+            if not self.cap.grab():
+                continue
+            # appsink backend: buffer PTS on the monotonic clock
+            timestamp = getattr(self.cap, 'last_timestamp', None) or time.monotonic()
+            ret, frame = self.cap.retrieve()
             if ret:
-                # Keep only latest frame (clear previous if not processed)
-                if not self.queue.empty():
-                    try:
-                        self.queue.get_nowait()
-                    except:
-                        pass
-                self.queue.put(frame)
+                # Replaces any unprocessed frame and wakes the inference loop
+                self.scheduler.publish(self.camera_id, frame, timestamp)
     
     def stop(self):
         self.running = False
@@ -56,45 +61,214 @@ class CameraThread(threading.Thread):
             self.cap.release()
 
 
-def process_cameras(camera_ids, model_path, source_type='csi', conf_thresh=0.25, display=False):
+def plan_batches(n_cameras, max_batch=None, engine_batch=None):
+    """
+    Inference calls per round for n_cameras: a list of (frames, padded) pairs.
+    With a static engine batch, frames are chunked and the last chunk padded.
+    """
+    per_round = min(n_cameras, max_batch) if max_batch else n_cameras
+    if per_round <= 0:
+        return []
+    if not engine_batch:
+        return [(per_round, 0)]
+    plan = []
+    for start in range(0, per_round, engine_batch):
+        n = min(engine_batch, per_round - start)
+        plan.append((n, engine_batch - n))
+    return plan
+
+
+def run_inference(model, frames, conf_thresh, engine_batch=None, preprocessor=None):
+    """
+    Batched inference; a static engine batch gets exactly engine_batch frames per call.
+    With a preprocessor, raw BGRx/NV12 frames are letterboxed and color-converted by
+    it and boxes are mapped back to camera pixels.
+    """
+    def infer(chunk):
+        if preprocessor is None:
+            return model(chunk, conf=conf_thresh, verbose=False)
+        x, metas = preprocessor(chunk)
+        return restore_results(model(x, conf=conf_thresh, verbose=False), metas)
+
+    if not engine_batch:
+        return infer(frames)
+    results = []
+    for start in range(0, len(frames), engine_batch):
+        chunk = frames[start:start + engine_batch]
+        n = len(chunk)
+        chunk = chunk + [chunk[-1]] * (engine_batch - n)
+        results.extend(infer(chunk)[:n])
+    return results
+
+
+def process_cameras(camera_ids, model_path, source_type='csi', conf_thresh=0.25, display=False, max_wait_ms=20.0,
+                    capture_mode='thread', ring_slots=4, width=1280, height=720, stats_interval=5.0, stats_json=None,
+                    priorities=None, min_fps=None, max_batch=None, engine_batch=None, control_socket=None,
+                    sync_tolerance_ms=None, sync_history=4, capture_format='BGR', imgsz=640,
+                    capture_backend='opencv', trace_path=None, trace_seconds=10.0, trace_delay=5.0):
     """Process multiple cameras with YOLOv8"""
     
+    camera_ids = list(camera_ids)
+    threads = {}
+    
+    def start_shared_capture(cam_id):
+        print(f"Initializing camera {cam_id} ({source_type}, capture process)")
+        source = camera_source(cam_id, source_type, width, height, capture_format)
+        return SharedCapture(cam_id, source, width, height, n_slots=ring_slots, layout=capture_format,
+                             backend=capture_backend).start()
+    
+    def start_camera_thread(cam_id):
+        print(f"Initializing camera {cam_id} ({source_type})")
+        thread = CameraThread(cam_id, scheduler, source_type=source_type, width=width, height=height,
+                              capture_format=capture_format, backend=capture_backend)
+        thread.start()
+        return thread
+    
+    slots = None
+    if capture_mode == 'process':
+        # One capture/decode process per camera, frames shared through memory rings.
+        # Started before the model loads so the forked children stay CUDA-free.
+        for cam_id in camera_ids:
+            threads[cam_id] = start_shared_capture(cam_id)
+        slots = {cam_id: capture.slot for cam_id, capture in threads.items()}
+    
+    # Weighted-fair selection when the GPU cannot take every camera each round
+    policy = FairSharePolicy(priorities, min_fps, window_s=stats_interval) if (priorities or min_fps or max_batch) else None
+    
+    # Timestamp-aligned sets for stereo / overlapping views: every batch holds
+    # frames captured within sync_tolerance_ms of each other
+    sync = None
+    if sync_tolerance_ms is not None:
+        sync = FrameSynchronizer(camera_ids, tolerance_ms=sync_tolerance_ms, history=sync_history)
+        if policy is not None:
+            print("Note: --priority/--min-fps/--max-batch are ignored with --sync-tolerance-ms (sets are always complete)")
+            policy = None
+    
+    # Event-driven batching: wakes on frame arrival, dispatches when all
+    # cameras reported or max_wait_ms after the first pending frame
+    scheduler = BatchScheduler(camera_ids, max_wait_ms=max_wait_ms, slots=slots, policy=policy, max_batch=max_batch, sync=sync)
+    
+    if capture_mode == 'process':
+        for capture in threads.values():
+            capture.attach(scheduler)
+    else:
+        for cam_id in camera_ids:
+            threads[cam_id] = start_camera_thread(cam_id)
+    
     # Load model
     print(f"Loading model: {model_path}")
     model = YOLO(model_path)
     
-    # Create queues and threads for each camera
-    queues = {}
-    threads = {}
-    
-    for cam_id in camera_ids:
-        print(f"Initializing camera {cam_id} ({source_type})")
-        queues[cam_id] = Queue(maxsize=1)
-        threads[cam_id] = CameraThread(cam_id, queues[cam_id], source_type=source_type)
-        threads[cam_id].start()
+    # BGRx / NV12 capture: no CPU videoconvert; color conversion happens in the GPU normalisation
+    preprocessor = None
+    if capture_format != 'BGR':
+        preprocessor = FramePreprocessor(imgsz=imgsz, layout=capture_format)
+        print(f"Capture format {capture_format}: letterbox on raw planes, color conversion on {preprocessor.device}")
     
     frame_counts = {cam_id: 0 for cam_id in camera_ids}
+    telemetry = CameraTelemetry(camera_ids, interval_s=stats_interval, json_path=stats_json)
+    # Per-stage breakdown of the capture-to-display age, one trace track per camera
+    tracer = LatencyTracer('multi-camera')
+    if trace_path:
+        tracer.capture(trace_path, trace_seconds, trace_delay)
+    mosaic = None
+    tile_index = {}
+    
+    def replan():
+        """Re-plan batch shapes, warm the model for them and rebuild the display grid"""
+        nonlocal mosaic, tile_index
+        plan = plan_batches(len(camera_ids), max_batch, engine_batch)
+        print(f"Batch plan: {len(camera_ids)} camera(s) -> " +
+              (", ".join(f"batch {n}" + (f" (+{pad} pad)" if pad else "") for n, pad in plan) or "idle"))
+        if plan:
+            dummy = np.zeros(frame_shape(capture_format, width, height), dtype=np.uint8)
+            run_inference(model, [dummy] * plan[0][0], conf_thresh, engine_batch, preprocessor)
+        # Preallocated grid for any number of cameras (max 1920 px wide)
+        if display:
+            mosaic = MosaicCompositor(max(1, len(camera_ids)), max_width=1920)
+        tile_index = {cam_id: i for i, cam_id in enumerate(camera_ids)}
+    
+    def add_camera(cam_id):
+        if cam_id in camera_ids:
+            return f"error: camera {cam_id} is already running"
+        if capture_mode == 'process':
+            # Forked from the running process; the child only touches OpenCV, never CUDA
+            capture = start_shared_capture(cam_id)
+            scheduler.add_camera(cam_id, capture.slot)
+            capture.attach(scheduler)
+            threads[cam_id] = capture
+        else:
+            scheduler.add_camera(cam_id)
+            threads[cam_id] = start_camera_thread(cam_id)
+        camera_ids.append(cam_id)
+        frame_counts.setdefault(cam_id, 0)
+        telemetry.add_camera(cam_id)
+        replan()
+        return f"ok: camera {cam_id} added ({len(camera_ids)} running)"
+    
+    def remove_camera(cam_id):
+        if cam_id not in camera_ids:
+            return f"error: camera {cam_id} is not running"
+        thread = threads.pop(cam_id)
+        thread.stop()
+        if isinstance(thread, threading.Thread):
+            thread.join()
+        scheduler.remove_camera(cam_id)
+        if policy is not None:
+            policy.forget(cam_id)
+        telemetry.remove_camera(cam_id)
+        camera_ids.remove(cam_id)
+        replan()
+        return f"ok: camera {cam_id} removed ({len(camera_ids)} running)"
+    
+    def handle_command(cmd):
+        try:
+            if cmd.name == 'add' and cmd.args:
+                return add_camera(int(cmd.args[0]))
+            if cmd.name == 'remove' and cmd.args:
+                return remove_camera(int(cmd.args[0]))
+            if cmd.name == 'list':
+                return "ok: cameras " + " ".join(str(c) for c in camera_ids)
+        except Exception as e:
+            return f"error: {e}"
+        return "error: commands are 'add <id>', 'remove <id>', 'list'"
+    
+    replan()
+    
+    # Runtime control: attach/detach cameras without reloading the model
+    control = ControlServer(control_socket).start() if control_socket else None
+    if control:
+        print(f"Control socket: {control_socket} (commands: add <id> | remove <id> | list)")
     
     try:
         print("Processing cameras... Press 'q' to quit")
         
         while True:
-            # Run inference on each camera sequentially (Jetson shared GPU memory)
-            # Alternatively, batch the frames together for better GPU utilization
-            batch_frames = []
-            valid_cam_ids = []
-            
-            for cam_id in camera_ids:
-                if not queues[cam_id].empty():
-                    frame = queues[cam_id].get()
-                    batch_frames.append(frame)
-                    valid_cam_ids.append(cam_id)
+            if control:
+                for cmd in control.pending():
+                    reply = handle_command(cmd)
+                    print(f"[control] {cmd.name} {' '.join(cmd.args)} -> {reply}")
+                    cmd.respond(reply)
             
-            if not batch_frames:
+            # Sleep until frames arrive, then batch them for better GPU utilization
+            batch = scheduler.next_batch(timeout=0.5)
+            if not batch:
+                if display and cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
                 continue
             
+            valid_cam_ids = [cam_id for cam_id in camera_ids if cam_id in batch]
+            batch_frames = [batch[cam_id].frame for cam_id in valid_cam_ids]
+            
             # Run inference on the batch
-            results = model(batch_frames, conf=conf_thresh, verbose=False)
+            traces = {cam_id: tracer.begin(batch[cam_id].timestamp, track=f"camera {cam_id}").mark('batch_wait')
+                      for cam_id in valid_cam_ids}
+            t_infer = time.perf_counter()
+            results = run_inference(model, batch_frames, conf_thresh, engine_batch, preprocessor)
+            t_result = time.monotonic()
+            telemetry.record_batch(batch, (time.perf_counter() - t_infer) * 1000.0, t_result)
+            for trace in traces.values():
+                trace.mark('inference', t_result)
             
             # Map results back to cameras
             results_dict = {}
@@ -102,11 +276,12 @@ def process_cameras(camera_ids, model_path, source_type='csi', conf_thresh=0.25,
                 results_dict[cam_id] = results[i]
                 frame_counts[cam_id] += 1
             
-            # Display results
+            # Display results: only the tiles of cameras in this batch are redrawn
             if display:
-                display_frames = []
-                
-                for cam_id in sorted(results_dict.keys()):
+                for cam_id in valid_cam_ids:
+                    if preprocessor is not None:
+                        # BGR conversion is only paid for frames that are drawn
+                        results_dict[cam_id].orig_img = to_bgr(batch[cam_id].frame, capture_format)
                     annotated = results_dict[cam_id].plot()
                     
                     # Add camera label and stats
@@ -116,51 +291,60 @@ def process_cameras(camera_ids, model_path, source_type='csi', conf_thresh=0.25,
                     det_count = len(results_dict[cam_id].boxes)
                     cv2.putText(annotated, f"Detections: {det_count}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
                     
-                    display_frames.append(annotated)
+                    mosaic.update(tile_index[cam_id], annotated, batch[cam_id].seq)
+                    traces[cam_id].mark('annotate')
                 
-                if display_frames:
-                    # Create grid layout
-                    if len(display_frames) == 2:
-                        combined = np.hstack(display_frames)
-                    elif len(display_frames) == 3:
-                        top = np.hstack(display_frames[:2])
-                        bottom = cv2.resize(display_frames[2], (top.shape[1], display_frames[2].shape[0]))
-                        combined = np.vstack([top, bottom])
-                    elif len(display_frames) == 4:
-                        top = np.hstack(display_frames[:2])
-                        bottom = np.hstack(display_frames[2:])
-                        combined = np.vstack([top, bottom])
-                    else:
-                        combined = display_frames[0]
-                    
-                    # Resize if too large
-                    max_width = 1920
-                    if combined.shape[1] > max_width:
-                        scale = max_width / combined.shape[1]
-                        combined = cv2.resize(combined, (int(combined.shape[1] * scale), int(combined.shape[0] * scale)))
-                    
-                    cv2.imshow('Multi-Camera Detection', combined)
-                    
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
+                cv2.imshow('Multi-Camera Detection', mosaic.canvas)
+                key = cv2.waitKey(1) & 0xFF
+                t_shown = time.monotonic()
+                for trace in traces.values():
+                    tracer.finish(trace.mark('display', t_shown))
+                
+                if key == ord('q'):
+                    break
+            else:
+                for trace in traces.values():
+                    tracer.finish(trace)
             
-            # Stats logging
-            if any(count % 30 == 0 for count in frame_counts.values()):
-                stats = " | ".join([f"Cam{cid}: {cnt} frames" for cid, cnt in frame_counts.items()])
-                print(stats)
+            # Per-camera telemetry table (and JSON line) every stats_interval seconds
+            if telemetry.maybe_emit(scheduler.slots):
+                if policy is not None:
+                    print(policy.report(camera_ids))
+                if sync is not None:
+                    print(sync.report())
     
     except KeyboardInterrupt:
         print("\nStopping...")
     
     finally:
+        if control:
+            control.stop()
+        scheduler.close()
         for thread in threads.values():
             thread.stop()
         for thread in threads.values():
-            thread.join()
+            if isinstance(thread, threading.Thread):
+                thread.join()
         cv2.destroyAllWindows()
         print("\nFinal statistics:")
         for cam_id in camera_ids:
-            print(f"  Camera {cam_id}: {frame_counts[cam_id]} frames processed")
+            slot = scheduler.slots[cam_id].stats()
+            print(f"  Camera {cam_id}: {frame_counts[cam_id]} frames processed "
+                  f"({slot['published']} captured, {slot['dropped'] + slot.get('capture_dropped', 0)} dropped)")
+        print(scheduler.report())
+        if preprocessor is not None and preprocessor.frames:
+            print(f"Preprocess ({capture_format}): {preprocessor.cpu_ms / preprocessor.frames:.2f} ms CPU per frame "
+                  f"(letterbox on raw planes)")
+        if policy is not None:
+            print("Fair-share policy (achieved vs target):")
+            print(policy.report(camera_ids))
+        tracer.flush()
+        print(format_latency(tracer.summary(), "Capture-to-display latency per stage"))
+        summary = telemetry.summary()
+        print("Telemetry summary: " + json.dumps(summary))
+        if stats_json:
+            with open(stats_json, 'a') as f:
+                f.write(json.dumps({'summary': summary}) + "\n")
 
 
 def main():
@@ -170,14 +354,67 @@ def main():
     parser.add_argument('--model', type=str, default='yolo11n.engine', help='Model path (.pt or .engine)')
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
     parser.add_argument('--display', action='store_true', help='Display results (Disable for headless)')
+    parser.add_argument('--max-wait-ms', type=float, default=20.0, help='Batch deadline after the first frame arrives')
+    parser.add_argument('--capture-mode', type=str, default='thread', choices=['thread', 'process'],
+                        help='Capture in threads, or in one process per camera with shared-memory frame rings')
+    parser.add_argument('--ring-slots', type=int, default=4, help='Shared-memory slots per camera (process mode)')
+    parser.add_argument('--width', type=int, default=1280, help='Capture width')
+    parser.add_argument('--height', type=int, default=720, help='Capture height')
+    parser.add_argument('--stats-interval', type=float, default=5.0, help='Seconds between per-camera telemetry reports')
+    parser.add_argument('--stats-json', type=str, help='Append telemetry reports as JSON lines to this file')
+    parser.add_argument('--priority', type=str, nargs='+', metavar='CAM=WEIGHT',
+                        help='Per-camera weights for fair batching, e.g. 0=4 1=1 (default weight 1)')
+    parser.add_argument('--min-fps', type=str, nargs='+', metavar='CAM=FPS',
+                        help='Per-camera minimum FPS guarantees, e.g. 0=15')
+    parser.add_argument('--max-batch', type=int, help='Max frames per inference batch (GPU budget; required by --priority/--min-fps, default --engine-batch)')
+    parser.add_argument('--engine-batch', type=int, help='Static batch size of the TensorRT engine (batches are chunked/padded to it)')
+    parser.add_argument('--control-socket', type=str, help='UNIX socket for runtime "add <id>" / "remove <id>" / "list" commands')
+    parser.add_argument('--sync-tolerance-ms', type=float, help='Batch only frame sets captured within this skew (stereo / overlapping views)')
+    parser.add_argument('--sync-history', type=int, default=4, help='Frames buffered per camera while aligning sets')
+    parser.add_argument('--capture-format', type=str, default='BGR', choices=['BGR', 'BGRx', 'NV12'],
+                        help='Frame layout from capture; BGRx/NV12 skip the CPU videoconvert step')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size (used with --capture-format BGRx/NV12)')
+    parser.add_argument('--capture-backend', type=str, default='opencv', choices=['opencv', 'appsink'],
+                        help='cv2.VideoCapture or native PyGObject appsink (mapped buffers, PTS timestamps)')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace (chrome://tracing) of per-frame stage spans to this file')
+    parser.add_argument('--trace-seconds', type=float, default=10.0, help='Length of the --trace window')
+    parser.add_argument('--trace-delay', type=float, default=5.0, help='Seconds to skip (warmup) before the --trace window starts')
     args = parser.parse_args()
+    # Weights and guarantees only act when cameras compete for a capped batch
+    if (args.priority or args.min_fps) and not args.max_batch:
+        if not args.engine_batch:
+            parser.error("--priority/--min-fps need a GPU budget: set --max-batch (or --engine-batch)")
+        args.max_batch = args.engine_batch
+        print(f"--max-batch defaults to --engine-batch ({args.max_batch}) for --priority/--min-fps")
+    # 'name.engine' -> the cached engine of name.pt for this runtime (exported once if missing)
+    args.model = resolve_model(args.model, imgsz=args.imgsz, batch=args.engine_batch or 1, export_missing=True)
     
     process_cameras(
         camera_ids=args.cameras,
         model_path=args.model,
         source_type=args.source_type,
         conf_thresh=args.conf,
-        display=args.display
+        display=args.display,
+        max_wait_ms=args.max_wait_ms,
+        capture_mode=args.capture_mode,
+        ring_slots=args.ring_slots,
+        width=args.width,
+        height=args.height,
+        stats_interval=args.stats_interval,
+        stats_json=args.stats_json,
+        priorities=parse_camera_values(args.priority),
+        min_fps=parse_camera_values(args.min_fps),
+        max_batch=args.max_batch,
+        engine_batch=args.engine_batch,
+        control_socket=args.control_socket,
+        sync_tolerance_ms=args.sync_tolerance_ms,
+        sync_history=args.sync_history,
+        capture_format=args.capture_format,
+        imgsz=args.imgsz,
+        capture_backend=args.capture_backend,
+        trace_path=args.trace,
+        trace_seconds=args.trace_seconds,
+        trace_delay=args.trace_delay
     )
 
 
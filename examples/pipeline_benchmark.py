@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+End-to-End Pipeline Benchmark
+Runs the real processing pipelines against a synthetic or recorded video
+source (no camera needed) and reports per-stage timings and throughput:
+
+    videothread   - VisionDock card loop: latest-frame slot -> resize -> detect -> overlay -> display conversion
+    multi_camera  - N cameras -> event-driven batch scheduler -> batched detect -> per-camera overlay -> mosaic
+    analytics     - grab/retrieve -> ByteTrack tracking -> zone analytics overlay
+
+Stages are timed from the frame's capture timestamp, with the predictor call
+split into letterbox / model / NMS. Results are printed as tables and
+written as JSON (--json) for comparison across machines and commits.
+
+--saturate instead ramps the number of concurrent synthetic streams (one
+worker thread and model per stream, or one shared batched engine) until the
+per-stream FPS or p95 latency breaks the SLA, and reports the saturation
+point with CPU, RAM and temperature at every step.
+
+--memory profiles the memory footprint per model, backend, batch size and
+camera count (each configuration in a fresh process): RSS, system, Python
+(tracemalloc) and device memory per pipeline stage, fitted into a
+base + per-camera cost model for capacity planning.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from visiondock_core.bench import SystemMonitor, bench_report, open_bench_source, predict_stages
+from visiondock_core.frame_slot import FrameSlot
+from visiondock_core.history import describe_model
+from visiondock_core.memprof import MB, MemoryProbe, fit_cost_model, format_stages, max_cameras, system_memory
+from visiondock_core.mosaic import MosaicCompositor
+from visiondock_core.scheduler import BatchScheduler
+from visiondock_core.trace import END_TO_END, LatencyTracer, format_latency
+from visiondock_core.export_cache import resolve_model
+from analytics_detection import annotate_frame, create_zone
+from multi_camera_detection import run_inference
+
+SCENARIOS = ('videothread', 'multi_camera', 'analytics')
+
+
+class _Feeder(threading.Thread):
+    """Capture thread: source -> publish(frame, timestamp) until stopped"""
+
+    def __init__(self, source, publish):
+        super().__init__(daemon=True)
+        self.source = source
+        self.publish = publish
+        self.running = True
+
+    def run(self):
+        while self.running:
+            if not self.source.grab():
+                break
+            ts = self.source.last_timestamp
+            ok, frame = self.source.retrieve()
+            if ok:
+                self.publish(frame, ts)
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=2.0)
+        self.source.release()
+
+
+def _result(tracer, frames, wall_s, **extra):
+    row = {
+        'frames': frames,
+        'wall_s': round(wall_s, 3),
+        'fps': round(frames / wall_s, 2) if wall_s > 0 else 0.0,
+        'stages': tracer.summary(),
+    }
+    row.update(extra)
+    return row
+
+
+def bench_videothread(model, args):
+    """VideoThread-style loop (gui/main.py) with detection as the card engine"""
+    slot = FrameSlot()
+    feeder = _Feeder(open_bench_source(args.source, args.width, args.height, args.source_fps), slot.publish)
+    feeder.start()
+    tracer = LatencyTracer('videothread')
+    target = args.target_size
+    done, t0 = -args.warmup, None
+    try:
+        while done < args.frames:
+            item = slot.wait(timeout=2.0)
+            if item is None:
+                break
+            if done == 0:
+                t0 = time.monotonic()
+                slot.dropped = 0
+            trace = tracer.begin(item.timestamp).mark('wait')
+            frame = item.frame
+            if target:
+                frame = cv2.resize(frame, target, interpolation=cv2.INTER_LINEAR)
+                trace.mark('resize')
+            t_call = time.monotonic()
+            results = model(frame, conf=args.conf, imgsz=args.imgsz, verbose=False)
+            predict_stages(trace, results, t_call, time.monotonic())
+            annotated = results[0].plot()
+            trace.mark('overlay')
+            # What the card does before painting: BGR -> RGB into a new buffer
+            cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
+            if args.display:
+                cv2.imshow('videothread', annotated)
+                cv2.waitKey(1)
+            trace.mark('display')
+            if done >= 0:
+                tracer.finish(trace)
+            done += 1
+    finally:
+        feeder.stop()
+    wall = time.monotonic() - t0 if t0 else 0.0
+    return _result(tracer, max(0, done), wall, capture_dropped=slot.dropped)
+
+
+def bench_multi_camera(model, args):
+    """multi_camera_detection.py loop: event-driven batches over N cameras"""
+    cams = list(range(args.cameras))
+    scheduler = BatchScheduler(cams, max_wait_ms=args.max_wait_ms)
+    feeders = []
+    for cam in cams:
+        source = open_bench_source(args.source, args.width, args.height, args.source_fps, seed=cam)
+        feeders.append(_Feeder(source, lambda frame, ts, cam=cam: scheduler.publish(cam, frame, ts)))
+    for feeder in feeders:
+        feeder.start()
+    tracer = LatencyTracer('multi_camera')
+    mosaic = MosaicCompositor(len(cams), max_width=1920)
+    done, batches, t0, dropped0 = -args.warmup, 0, None, 0
+    try:
+        while done < args.frames:
+            batch = scheduler.next_batch(timeout=2.0)
+            if not batch:
+                continue
+            measuring = done >= 0
+            if measuring and t0 is None:
+                t0 = time.monotonic()
+                dropped0 = sum(scheduler.slots[cam].stats()['dropped'] for cam in cams)
+            ids = [cam for cam in cams if cam in batch]
+            traces = {cam: tracer.begin(batch[cam].timestamp, track=f"camera {cam}").mark('batch_wait') for cam in ids}
+            t_call = time.monotonic()
+            results = run_inference(model, [batch[cam].frame for cam in ids], args.conf, args.engine_batch)
+            t_end = time.monotonic()
+            for cam in ids:
+                predict_stages(traces[cam], results, t_call, t_end, len(ids))
+            for i, cam in enumerate(ids):
+                mosaic.update(cam, results[i].plot(), batch[cam].seq)
+                traces[cam].mark('overlay')
+            if args.display:
+                cv2.imshow('multi_camera', mosaic.canvas)
+                cv2.waitKey(1)
+            t_shown = time.monotonic()
+            for cam in ids:
+                traces[cam].mark('display', t_shown)
+                if measuring:
+                    tracer.finish(traces[cam])
+            done += len(ids)
+            if measuring:
+                batches += 1
+    finally:
+        scheduler.close()
+        for feeder in feeders:
+            feeder.stop()
+    wall = time.monotonic() - t0 if t0 else 0.0
+    dropped = sum(scheduler.slots[cam].stats()['dropped'] for cam in cams) - dropped0
+    return _result(tracer, max(0, done), wall, cameras=len(cams), batches=batches,
+                   mean_batch=round(done / batches, 2) if batches else 0.0, capture_dropped=dropped)
+
+
+def bench_analytics(model, args):
+    """analytics_detection.py loop: sequential capture, tracking and zone analytics"""
+    source = open_bench_source(args.source, args.width, args.height, args.source_fps)
+    tracer = LatencyTracer('analytics')
+    zone = create_zone(args.width, args.height)
+    state = {'in_zone': set(), 'entered': 0}
+    done, t0 = -args.warmup, None
+    try:
+        while done < args.frames:
+            if done == 0:
+                t0 = time.monotonic()
+            if not source.grab():
+                break
+            trace = tracer.begin(source.last_timestamp)
+            ok, frame = source.retrieve()
+            if not ok:
+                break
+            trace.mark('retrieve')
+            t_call = time.monotonic()
+            results = model.track(frame, persist=True, conf=args.conf, imgsz=args.imgsz, verbose=False,
+                                  tracker="bytetrack.yaml")
+            predict_stages(trace, results, t_call, time.monotonic())
+            annotated = annotate_frame(frame, results, zone, state, 0)
+            trace.mark('annotate')
+            if args.display:
+                cv2.imshow('analytics', annotated)
+                cv2.waitKey(1)
+                trace.mark('display')
+            if done >= 0:
+                tracer.finish(trace)
+            done += 1
+    finally:
+        source.release()
+    wall = time.monotonic() - t0 if t0 else 0.0
+    return _result(tracer, max(0, done), wall, zone_entries=state['entered'])
+
+
+class _Step:
+    """Shared state of one saturation step: what is measured and when"""
+
+    def __init__(self, n):
+        self.tracer = LatencyTracer('saturation')
+        self.frames = [0] * n
+        self.measuring = threading.Event()
+        self.stop = threading.Event()
+
+    def done(self, idx, trace):
+        if self.measuring.is_set():
+            self.tracer.finish(trace)
+            self.frames[idx] += 1
+
+
+def _stream_worker(model, slot, step, idx, args):
+    """Threads mode: one stream's capture slot -> detect -> overlay on its own model instance"""
+    while not step.stop.is_set():
+        item = slot.wait(timeout=0.5)
+        if item is None:
+            continue
+        trace = step.tracer.begin(item.timestamp, track=f"stream {idx}").mark('wait')
+        results = model(item.frame, conf=args.conf, imgsz=args.imgsz, verbose=False)
+        trace.mark('inference')
+        results[0].plot()
+        trace.mark('overlay')
+        step.done(idx, trace)
+
+
+def _batched_worker(model, scheduler, step, args):
+    """Batched mode: all streams through one event-driven batch scheduler and one engine"""
+    while not step.stop.is_set():
+        batch = scheduler.next_batch(timeout=0.5)
+        if not batch:
+            continue
+        ids = sorted(batch)
+        traces = {i: step.tracer.begin(batch[i].timestamp, track=f"stream {i}").mark('batch_wait') for i in ids}
+        results = run_inference(model, [batch[i].frame for i in ids], args.conf, args.engine_batch)
+        t_inf = time.monotonic()
+        for k, i in enumerate(ids):
+            traces[i].mark('inference', t_inf)
+            results[k].plot()
+            traces[i].mark('overlay')
+            step.done(i, traces[i])
+
+
+def run_saturation_step(n, models, args):
+    """Run n concurrent streams for warmup + measurement; returns the step row"""
+    step = _Step(n)
+    feeders, workers, slots = [], [], []
+    scheduler = BatchScheduler(list(range(n)), max_wait_ms=args.max_wait_ms) if args.mode == 'batched' else None
+    for i in range(n):
+        source = open_bench_source(args.source, args.width, args.height, args.target_fps, seed=i)
+        if scheduler is not None:
+            feeders.append(_Feeder(source, lambda frame, ts, i=i: scheduler.publish(i, frame, ts)))
+        else:
+            slot = FrameSlot()
+            slots.append(slot)
+            feeders.append(_Feeder(source, slot.publish))
+            workers.append(threading.Thread(target=_stream_worker, args=(models[i], slot, step, i, args), daemon=True))
+    if scheduler is not None:
+        workers.append(threading.Thread(target=_batched_worker, args=(models[0], scheduler, step, args), daemon=True))
+    for t in feeders + workers:
+        t.start()
+    try:
+        time.sleep(args.step_warmup)
+        dropped0 = _dropped(scheduler, slots, n)
+        with SystemMonitor() as monitor:
+            step.measuring.set()
+            t0 = time.monotonic()
+            time.sleep(args.step_seconds)
+            step.measuring.clear()
+            wall = time.monotonic() - t0
+        dropped = _dropped(scheduler, slots, n) - dropped0
+    finally:
+        step.stop.set()
+        if scheduler is not None:
+            scheduler.close()
+        for t in workers:
+            t.join(timeout=5.0)
+        for feeder in feeders:
+            feeder.stop()
+
+    fps = [f / wall for f in step.frames]
+    e2e = step.tracer.summary().get(END_TO_END, {})
+    row = {
+        'streams': n,
+        'fps_min': round(min(fps), 2),
+        'fps_mean': round(sum(fps) / n, 2),
+        'total_fps': round(sum(fps), 2),
+        'p50_ms': round(e2e.get('p50', 0.0), 2),
+        'p95_ms': round(e2e.get('p95', 0.0), 2),
+        'p99_ms': round(e2e.get('p99', 0.0), 2),
+        'capture_dropped': dropped,
+        'stages': step.tracer.summary(),
+    }
+    row.update(monitor.summary())
+    violations = []
+    if row['fps_min'] < args.target_fps * (1.0 - args.fps_tolerance):
+        violations.append(f"fps {row['fps_min']:.1f} < {args.target_fps * (1.0 - args.fps_tolerance):.1f}")
+    if not e2e or row['p95_ms'] > args.max_p95_ms:
+        violations.append(f"p95 {row['p95_ms']:.0f} ms > {args.max_p95_ms:.0f} ms")
+    row['sla_ok'] = not violations
+    row['violations'] = violations
+    return row
+
+
+def _dropped(scheduler, slots, n):
+    if scheduler is not None:
+        return sum(scheduler.slots[i].stats()['dropped'] for i in range(n))
+    return sum(slot.dropped for slot in slots)
+
+
+def run_saturation(args):
+    """Ramp the stream count until the SLA breaks; returns {'steps', 'saturation_streams', ...}"""
+    models, steps, saturation = [], [], 0
+    n = args.start_streams
+    print(f"Saturation ({args.mode}): {args.width}x{args.height} streams at {args.target_fps:g} FPS, "
+          f"SLA fps >= {args.target_fps * (1.0 - args.fps_tolerance):.1f} per stream and p95 <= {args.max_p95_ms:g} ms")
+    print(f"{'Streams':>7} {'FPS min':>8} {'FPS tot':>8} {'p50 ms':>8} {'p95 ms':>8} {'Drops':>6} "
+          f"{'CPU %':>6} {'RAM %':>6} {'RSS MB':>7} {'Temp C':>7}  SLA")
+    while n <= args.max_streams:
+        # Threads mode needs one model per stream (predictors are not thread-safe); batched mode shares one
+        while len(models) < (n if args.mode == 'threads' else 1):
+            models.append(YOLO(args.model))
+        row = run_saturation_step(n, models, args)
+        steps.append(row)
+        print(f"{n:>7} {row['fps_min']:>8.1f} {row['total_fps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['capture_dropped']:>6} {row.get('cpu_percent', float('nan')):>6.1f} "
+              f"{row.get('ram_percent', float('nan')):>6.1f} {row.get('rss_mb', float('nan')):>7.0f} "
+              f"{row.get('temp_c_max', float('nan')):>7.1f}  {'ok' if row['sla_ok'] else '; '.join(row['violations'])}")
+        if not row['sla_ok']:
+            break
+        saturation = n
+        n += args.stream_step
+    if saturation:
+        print(f"\nSaturation point: {saturation} streams at {args.target_fps:g} FPS ({args.mode})")
+    else:
+        print(f"\nNot even {args.start_streams} stream(s) meet the SLA")
+    return {'mode': args.mode, 'saturation_streams': saturation, 'target_fps': args.target_fps,
+            'max_p95_ms': args.max_p95_ms, 'steps': steps}
+
+
+def memory_child(args):
+    """
+    One memory configuration in this (fresh) process: model load, first
+    inference, capture start and steady state for args.cameras streams.
+    Writes the stage rows as JSON to args.memory_child.
+    """
+    n, batch = args.cameras, args.engine_batch or 1
+    probe = MemoryProbe()
+    probe.mark('runtime')   # Interpreter + torch / Ultralytics / OpenCV imports ('after' is absolute)
+    with probe.stage('model_load'):
+        # Threads mode holds one model per stream; batched mode shares one
+        models = [YOLO(args.model) for _ in range(n if args.mode == 'threads' else 1)]
+    with probe.stage('first_inference', batch=batch):
+        dummy = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+        for model in models:   # CUDA context, engine bindings, cuDNN / TensorRT workspaces
+            run_inference(model, [dummy] * batch, args.conf, args.engine_batch)
+
+    step = _Step(n)
+    slots, feeders, workers = [], [], []
+    with probe.stage('capture', streams=n):
+        scheduler = BatchScheduler(list(range(n)), max_wait_ms=args.max_wait_ms) if args.mode == 'batched' else None
+        for i in range(n):
+            # One unique synthetic frame per stream: the source holds about one camera buffer, as a live camera would
+            source = open_bench_source(args.source, args.width, args.height, args.target_fps, seed=i, n_unique=1)
+            if scheduler is not None:
+                feeders.append(_Feeder(source, lambda frame, ts, i=i: scheduler.publish(i, frame, ts)))
+            else:
+                slot = FrameSlot()
+                slots.append(slot)
+                feeders.append(_Feeder(source, slot.publish))
+        for feeder in feeders:
+            feeder.start()
+        time.sleep(0.5)
+    with probe.stage('steady_state', streams=n):
+        if scheduler is not None:
+            workers.append(threading.Thread(target=_batched_worker, args=(models[0], scheduler, step, args), daemon=True))
+        else:
+            workers.extend(threading.Thread(target=_stream_worker, args=(models[i], slots[i], step, i, args), daemon=True)
+                           for i in range(n))
+        step.measuring.set()
+        t0 = time.monotonic()
+        for t in workers:
+            t.start()
+        time.sleep(args.step_seconds)
+        step.measuring.clear()
+        wall = time.monotonic() - t0
+    step.stop.set()
+    if scheduler is not None:
+        scheduler.close()
+    for t in workers:
+        t.join(timeout=5.0)
+    for feeder in feeders:
+        feeder.stop()
+    probe.stop()
+
+    name, backend = describe_model(args.model)
+    with open(args.memory_child, 'w') as f:
+        json.dump({'model': name, 'path': args.model, 'backend': backend, 'batch': batch, 'mode': args.mode,
+                   'streams': n, 'size': [args.width, args.height], 'fps': round(sum(step.frames) / wall, 1),
+                   'stages': probe.rows}, f)
+
+
+def _steady(run):
+    """Figures of a run's steady-state stage that go into the cost model"""
+    row = run['stages'][-1]
+    out = {'rss': row['peak'].get('rss'), 'system': row['after'].get('system')}
+    if 'device_used' in row['after']:
+        out['device'] = row['after']['device_used']
+    return out
+
+
+def run_memory_profile(args):
+    """Every model x batch x camera count in a fresh process, then a cost model per (model, batch)"""
+    runs = []
+    for weights in args.memory_models or [args.model]:
+        for batch in args.memory_batches or [args.engine_batch or 1]:
+            model_path = resolve_model(weights, imgsz=args.imgsz, batch=batch, export_missing=True)
+            for n in args.memory_streams:
+                fd, out = tempfile.mkstemp(suffix='.json')
+                os.close(fd)
+                cmd = [sys.executable, os.path.abspath(__file__), '--memory-child', out, '--model', model_path,
+                       '--engine-batch', str(batch), '--cameras', str(n), '--mode', args.mode, '--source', args.source,
+                       '--width', str(args.width), '--height', str(args.height), '--target-fps', str(args.target_fps),
+                       '--step-seconds', str(args.step_seconds), '--conf', str(args.conf), '--imgsz', str(args.imgsz),
+                       '--max-wait-ms', str(args.max_wait_ms)]
+                print(f"\n[memory] {os.path.basename(model_path)} batch {batch}, {n} camera(s), {args.mode}")
+                proc = subprocess.run(cmd, stdout=subprocess.DEVNULL)
+                try:
+                    with open(out) as f:
+                        run = json.load(f)
+                except (OSError, ValueError):
+                    print(f"[memory] Run failed (exit code {proc.returncode})")
+                    continue
+                finally:
+                    os.remove(out)
+                runs.append(run)
+                print(format_stages(run['stages']))
+
+    total, _ = system_memory()
+    budget_mb = total * (1.0 - args.mem_headroom) / MB if total else None
+    cost_models = []
+    series = {}
+    for run in runs:
+        series.setdefault((run['model'], run['backend'], run['batch'], run['mode']), []).append(run)
+    print(f"\nPER-CAMERA MEMORY COST ({args.width}x{args.height}; budget = {1.0 - args.mem_headroom:.0%} of "
+          f"{total / MB:.0f} MB RAM)" if total else "\nPER-CAMERA MEMORY COST")
+    print(f"{'Model':<18} {'Backend':<15} {'Batch':>5} {'Mode':<8} {'Metric':<7} {'Base MB':>8} {'MB/cam':>7} "
+          f"{'R2':>5} {'Max cams':>8}")
+    for (name, backend, batch, mode), group in series.items():
+        counts = [r['streams'] for r in group]
+        for metric in ('system', 'rss', 'device'):
+            values = [_steady(r).get(metric) for r in group]
+            if any(v is None for v in values):
+                continue
+            fit = fit_cost_model(counts, values)
+            # System memory is what runs out on Jetson (unified memory, includes GPU allocations)
+            fit_cams = max_cameras(fit, budget_mb) if metric == 'system' and budget_mb else None
+            cost_models.append(dict(fit, model=name, backend=backend, batch=batch, mode=mode, metric=metric,
+                                    max_cameras=fit_cams))
+            per = f"{fit['per_camera_mb']:.1f}" if fit['per_camera_mb'] is not None else '-'
+            r2 = f"{fit['r2']:.2f}" if fit['r2'] is not None else '-'
+            print(f"{name:<18} {backend:<15} {batch:>5} {mode:<8} {metric:<7} {fit['base_mb']:>8.0f} {per:>7} "
+                  f"{r2:>5} {fit_cams if fit_cams is not None else '-':>8}")
+    return {'runs': runs, 'cost_models': cost_models, 'ram_total_mb': total / MB if total else None,
+            'headroom': args.mem_headroom}
+
+
+def parse_size(text):
+    if not text:
+        return None
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark (no camera needed)')
+    parser.add_argument('--model', type=str, default='yolo11n.pt', help='Model path (.pt or .engine)')
+    parser.add_argument('--scenarios', type=str, nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument('--source', type=str, default='synthetic', help="'synthetic' or a video file (looped)")
+    parser.add_argument('--width', type=int, default=1280, help='Source frame width')
+    parser.add_argument('--height', type=int, default=720, help='Source frame height')
+    parser.add_argument('--source-fps', type=float, default=30.0, help='Pace the source like a live camera (0 = as fast as possible)')
+    parser.add_argument('--frames', type=int, default=300, help='Measured frames per scenario')
+    parser.add_argument('--warmup', type=int, default=30, help='Unmeasured frames before each scenario')
+    parser.add_argument('--cameras', type=int, default=4, help='Cameras for the multi_camera scenario')
+    parser.add_argument('--max-wait-ms', type=float, default=20.0, help='Batch deadline for the multi_camera scenario')
+    parser.add_argument('--engine-batch', type=int, help='Static engine batch size (multi_camera)')
+    parser.add_argument('--target-size', type=parse_size, help='videothread resize, e.g. 1280x720 (card PROFILE)')
+    parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size')
+    parser.add_argument('--display', action='store_true', help='Show windows (includes imshow in the display stage)')
+    parser.add_argument('--json', type=str, help='Write the JSON report to this file (default: stdout)')
+    parser.add_argument('--saturate', action='store_true', help='Ramp concurrent streams until the SLA breaks (instead of --scenarios)')
+    parser.add_argument('--mode', choices=('threads', 'batched'), default='batched',
+                        help='--saturate: one thread and model per stream, or one shared batched engine')
+    parser.add_argument('--target-fps', type=float, default=15.0, help='--saturate: per-stream camera FPS (the source rate)')
+    parser.add_argument('--fps-tolerance', type=float, default=0.05, help='--saturate: allowed per-stream FPS shortfall')
+    parser.add_argument('--max-p95-ms', type=float, default=200.0, help='--saturate: p95 capture-to-overlay latency limit')
+    parser.add_argument('--start-streams', type=int, default=1, help='--saturate: first stream count')
+    parser.add_argument('--stream-step', type=int, default=1, help='--saturate: streams added per step')
+    parser.add_argument('--max-streams', type=int, default=32, help='--saturate: stop ramping here')
+    parser.add_argument('--step-seconds', type=float, default=10.0, help='--saturate: measured seconds per step')
+    parser.add_argument('--step-warmup', type=float, default=3.0, help='--saturate: unmeasured seconds before each step')
+    parser.add_argument('--memory', action='store_true', help='Profile memory per model/batch/camera count and fit a per-camera cost model')
+    parser.add_argument('--memory-models', type=str, nargs='+', help='--memory: models to profile (default --model)')
+    parser.add_argument('--memory-batches', type=int, nargs='+', help='--memory: engine batch sizes (default --engine-batch or 1)')
+    parser.add_argument('--memory-streams', type=int, nargs='+', default=[1, 2, 4, 8], help='--memory: camera counts')
+    parser.add_argument('--mem-headroom', type=float, default=0.15, help='--memory: share of RAM kept free in the capacity estimate')
+    parser.add_argument('--memory-child', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # 'name.engine' -> the cached engine of name.pt for this runtime (exported once if missing)
+    args.model = resolve_model(args.model, imgsz=args.imgsz, batch=args.engine_batch or 1, export_missing=True)
+
+    if args.memory_child:
+        memory_child(args)
+        return
+
+    runners = {'videothread': bench_videothread, 'multi_camera': bench_multi_camera, 'analytics': bench_analytics}
+    results = {}
+    if args.saturate:
+        results['saturation'] = run_saturation(args)
+    if args.memory:
+        results['memory'] = run_memory_profile(args)
+    for name in [] if args.saturate or args.memory else args.scenarios:
+        # Fresh model per scenario: tracker state and warmed shapes do not leak between runs
+        model = YOLO(args.model)
+        print(f"[{name}] {args.frames} frames after {args.warmup} warmup, source={args.source} "
+              f"{args.width}x{args.height}@{args.source_fps:g}")
+        results[name] = runners[name](model, args)
+        r = results[name]
+        print(format_latency(r['stages'], f"{name}: {r['fps']:.1f} FPS over {r['wall_s']:.1f}s"))
+        cv2.destroyAllWindows()
+
+    config = {k: (list(v) if isinstance(v, tuple) else v) for k, v in vars(args).items() if k not in ('json', 'display')}
+    report = bench_report(results, config)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
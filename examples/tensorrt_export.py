@@ -4,17 +4,24 @@ YOLOv8 TensorRT Export and Benchmark
 Export YOLOv8 to TensorRT and compare performance
 """
 
+import os
+import json
 import time
 import argparse
 from ultralytics import YOLO
 import torch
-import cv2
 import numpy as np
 
+from visiondock_core.accuracy import compare_backends, format_accuracy, list_images
+from visiondock_core.calibration import accuracy_gate, build_calibration_set
+from visiondock_core.export_cache import ExportCache, engine_metadata
+from visiondock_core.history import BenchmarkHistory, describe_model, format_comparison, format_runs
 
-def export_to_tensorrt(model_path, half=True, int8=False, data=None, workspace=4, verbose=True):
+
+def export_to_tensorrt(model_path, half=True, int8=False, data=None, workspace=4, verbose=True,
+                       imgsz=640, batch=1, force=False, cache=None):
     """
-    Export YOLOv8 model to TensorRT engine
+    Export YOLOv8 model to TensorRT engine (through the content-addressed export cache)
     
     Args:
         model_path: Path to PyTorch model (.pt)
@@ -23,81 +30,228 @@ def export_to_tensorrt(model_path, half=True, int8=False, data=None, workspace=4
         data: Path to YAML file for INT8 calibration dataset (optional)
         workspace: GPU workspace size in GB
         verbose: Print detailed export info
+        imgsz: Engine input size, int or (height, width)
+        batch: Engine batch size
+        force: Re-export even if the cache already holds this engine
+        cache: ExportCache (default ~/.visiondock/exports)
     
     Returns:
         Path to TensorRT engine file
     """
     
-    print(f"Loading model: {model_path}")
-    model = YOLO(model_path)
-    
-    print("\nExporting to TensorRT...")
-    precision = "INT8" if int8 else ("FP16" if half else "FP32")
-    print(f"  Precision: {precision}")
+    precision = "int8" if int8 else ("fp16" if half else "fp32")
+    print("\nTensorRT engine for: " + model_path)
+    print(f"  Precision: {precision.upper()}")
+    print(f"  Input: {imgsz}, batch {batch}")
     print(f"  Workspace: {workspace}GB")
     if int8 and data:
         print(f"  Calibration data: {data}")
     
-    # Export to TensorRT
-    engine_path = model.export(
-        format='engine',
-        device=0,
-        half=half,
-        int8=int8,
-        data=data,
+    # Export to TensorRT only if no engine exists for these weights/settings/runtime
+    cache = cache or ExportCache()
+    engine_path = cache.export(
+        model_path, 'engine', precision, imgsz, batch,
+        data=data if int8 else None,
+        force=force,
         workspace=workspace,
         verbose=verbose,
         simplify=True
     )
     
-    print(f"\nTensorRT engine saved to: {engine_path}")
+    print(f"\nTensorRT engine: {engine_path}")
     return engine_path
 
 
-def benchmark_model(model_path, num_frames=100, warmup=10, imgsz=640):
+def calibrate_int8(model_path, calib, imgsz=640, batch=1, workspace=4, force=False, max_map_drop=0.02,
+                   conf=0.25, workers=4, cache=None):
+    """
+    INT8 engine calibrated on a calibration set from our recordings, accepted
+    only if it passes the accuracy gate against the PyTorch model on the
+    set's held-out frames
+    
+    Args:
+        model_path: Path to PyTorch model (.pt)
+        calib: Manifest from visiondock_core.calibration.build_calibration_set()
+        max_map_drop: Largest accepted mAP50 / mAP50-95 drop (None skips the gate)
+    
+    Returns:
+        Path to the engine, or None if it was rejected (and removed from the cache)
+    """
+    cache = cache or ExportCache()
+    engine = export_to_tensorrt(model_path, half=False, int8=True, data=calib['yaml'], workspace=workspace,
+                                imgsz=imgsz, batch=batch, force=force, cache=cache)
+    if max_map_drop is None:
+        print("\nAccuracy gate skipped")
+        return engine
+    
+    # Reuse an earlier gate only if its measured drops also meet this (possibly stricter) limit
+    previous = (cache.meta(engine) or {}).get('accuracy_gate')
+    if (previous and previous['passed'] and not force and -previous['map50_delta'] <= max_map_drop
+            and -previous['map_delta'] <= max_map_drop):
+        print(f"\nAccuracy gate passed earlier (mAP50 {previous['map50_delta']:+.3f}, "
+              f"mAP50-95 {previous['map_delta']:+.3f})")
+        return engine
+    if not calib['val_frames']:
+        print("\nNo held-out frames in the calibration set: cannot run the accuracy gate")
+        return None
+    
+    # The gate feeds single images: a batched engine is checked through its batch-1
+    # twin (same calibration cache, so no second calibration run)
+    gate_engine = engine if batch == 1 else export_to_tensorrt(
+        model_path, half=False, int8=True, data=calib['yaml'], workspace=workspace, imgsz=imgsz, batch=1,
+        force=force, cache=cache)
+    report = test_accuracy(model_path, gate_engine, images=calib['val_dir'], conf=conf, imgsz=imgsz, workers=workers)
+    passed, reasons = accuracy_gate(report, gate_engine, max_map_drop)
+    delta = report['deltas'][gate_engine]
+    result = {'passed': passed, 'max_map_drop': max_map_drop, 'map50_delta': delta['map50'],
+              'map_delta': delta['map'], 'recall_delta': delta['recall'], 'images': calib['val_frames'],
+              'calibration_set': calib['id']}
+    for path in {engine, gate_engine}:
+        cache.update_meta(path, accuracy_gate=result)
+    
+    if passed:
+        print(f"\n✓ INT8 engine accepted (mAP50 {delta['map50']:+.3f}, mAP50-95 {delta['map']:+.3f})")
+        return engine
+    print("\n⚠ INT8 engine rejected: " + "; ".join(reasons))
+    for path in {engine, gate_engine}:
+        cache.remove(os.path.basename(os.path.dirname(path)))
+    return None
+
+
+def record_run(history, model_path, results, label=None, alpha=0.01, min_effect=0.03):
+    """Store a benchmark result in the history and check it against the previous comparable run"""
+    model, backend = describe_model(model_path)
+    config = {'batch': int(results['batch']), 'imgsz': [int(v) for v in results['imgsz']]}
+    summary = {k: float(results[k]) for k in ('mean_ms', 'median_ms', 'p95_ms', 'p99_ms', 'fps')}
+    run_id = history.record(results['times_ms'], model, backend, config, summary, label)
+    print(f"\n[history] Recorded run #{run_id}: {model} / {backend} / batch {config['batch']}")
+    try:
+        result = history.compare(run_id, alpha=alpha, min_effect=min_effect)
+    except KeyError:
+        return run_id   # First run of this series
+    print(format_comparison(result))
+    return run_id
+
+
+def history_compare(history, ids, alpha=0.01, min_effect=0.03):
+    """
+    ids: [] -> latest run vs its baseline; [candidate]; [baseline, candidate].
+    Returns False on a regression.
+    """
+    if not ids:
+        latest = history.latest()
+        if latest is None:
+            print(f"No benchmark runs in {history.path}")
+            return True
+        ids = [latest['id']]
+    candidate, baseline = ids[-1], (ids[0] if len(ids) > 1 else None)
+    try:
+        result = history.compare(candidate, baseline, alpha, min_effect)
+    except KeyError as e:
+        print(e.args[0])
+        return True
+    print(format_comparison(result))
+    return result['verdict'] != 'regression'
+
+
+def list_exports(cache=None):
+    """Print the entries of the export cache"""
+    cache = cache or ExportCache()
+    entries = cache.entries()
+    print(f"Export cache: {cache.root} ({len(entries)} entries)")
+    for m in entries:
+        rt = m.get('runtime', {})
+        size = "x".join(str(v) for v in m.get('imgsz', []))
+        print(f"  {m['key']}  {m['format']:<6} {m['precision']:<4} {size:>9} b{m['batch']}  "
+              f"{os.path.basename(m.get('weights', '?')):<20} L4T {rt.get('l4t') or '-'}  TRT {rt.get('tensorrt') or '-'}  "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(m.get('created', 0)))}")
+
+
+def parse_shape(text):
+    """'640' -> (640, 640); '640x384' (width x height) -> (384, 640) as (h, w), rounded to stride 32"""
+    parts = str(text).lower().split('x')
+    w = int(parts[0])
+    h = int(parts[1]) if len(parts) > 1 else w
+    return max(32, round(h / 32) * 32), max(32, round(w / 32) * 32)
+
+
+def _sync():
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+def _timed_call(model, inputs, imgsz):
+    """One predictor call, timed with perf_counter; the device is synchronized on both sides"""
+    _sync()
+    start = time.perf_counter()
+    model(inputs, imgsz=imgsz, verbose=False)
+    _sync()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_warmup(model, inputs, imgsz, min_iters=3, max_iters=50, window=5, tolerance=0.05):
+    """
+    Warm up until timings settle: the mean of the last `window` calls is within
+    `tolerance` of the window before it (engine build, cuDNN autotune, clocks).
+    Returns the number of warmup calls made.
+    """
+    times = []
+    while len(times) < max_iters:
+        times.append(_timed_call(model, inputs, imgsz))
+        if len(times) >= max(min_iters, 2 * window):
+            recent = np.mean(times[-window:])
+            previous = np.mean(times[-2 * window:-window])
+            if abs(recent - previous) <= tolerance * previous:
+                break
+    return len(times)
+
+
+def benchmark_model(model_path, num_frames=100, warmup=10, imgsz=640, batch=1, model=None, quiet=False):
     """
     Benchmark model inference speed
     
     Args:
         model_path: Path to model file
-        num_frames: Number of frames to benchmark
-        warmup: Number of warmup iterations
-        imgsz: Input image size
+        num_frames: Number of timed predictor calls
+        warmup: Maximum warmup calls (stops earlier once timings are stable)
+        imgsz: Input size, int or (height, width)
+        batch: Frames per predictor call
+        model: Already loaded YOLO model (reused by sweeps)
+        quiet: Suppress progress output
     
     Returns:
-        Dictionary with benchmark results
+        Dictionary with benchmark results (latency per call, throughput in frames/s,
+        raw per-call timings in 'times_ms')
     """
+    h, w = (imgsz, imgsz) if isinstance(imgsz, int) else imgsz
+    log = (lambda *a: None) if quiet else print
     
-    print(f"\nBenchmarking: {model_path}")
-    print(f"  Frames: {num_frames}")
-    print(f"  Warmup: {warmup}")
-    print(f"  Image size: {imgsz}")
+    log(f"\nBenchmarking: {model_path}")
+    log(f"  Frames: {num_frames}")
+    log(f"  Warmup: up to {warmup}")
+    log(f"  Image size: {w}x{h}, batch {batch}")
     
     # Load model
-    model = YOLO(model_path)
+    if model is None:
+        model = YOLO(model_path)
     
-    # Create dummy input
-    dummy_frame = np.random.randint(0, 255, (imgsz, imgsz, 3), dtype=np.uint8)
+    # Create dummy input (already at the model shape: letterbox is a no-op copy)
+    dummy = [np.random.randint(0, 255, (h, w, 3), dtype=np.uint8) for _ in range(batch)]
+    inputs = dummy if batch > 1 else dummy[0]
     
     # Warmup
-    print("\nWarming up...")
-    for _ in range(warmup):
-        _ = model(dummy_frame, verbose=False)
+    log("\nWarming up...")
+    warmup_iters = run_warmup(model, inputs, (h, w), max_iters=max(1, warmup))
     
     # Benchmark
-    print("Running benchmark...")
+    log("Running benchmark...")
     times = []
     
     for i in range(num_frames):
-        start = time.time()
-        results = model(dummy_frame, verbose=False)
-        end = time.time()
-        
-        inference_time = (end - start) * 1000  # Convert to ms
-        times.append(inference_time)
+        times.append(_timed_call(model, inputs, (h, w)))
         
         if (i + 1) % 20 == 0:
-            print(f"  Progress: {i+1}/{num_frames}")
+            log(f"  Progress: {i+1}/{num_frames}")
     
     # Calculate statistics
     times = np.array(times)
@@ -107,14 +261,138 @@ def benchmark_model(model_path, num_frames=100, warmup=10, imgsz=640):
         'min_ms': np.min(times),
         'max_ms': np.max(times),
         'median_ms': np.median(times),
-        'fps': 1000.0 / np.mean(times)
+        'p95_ms': np.percentile(times, 95),
+        'p99_ms': np.percentile(times, 99),
+        'fps': 1000.0 * batch / np.mean(times),
+        'batch': batch,
+        'imgsz': (h, w),
+        'warmup_iters': warmup_iters,
+        'times_ms': times,
     }
     
     return results
 
 
-def compare_models(pytorch_model, tensorrt_engine, num_frames=100):
-    """Compare PyTorch and TensorRT performance"""
+def pareto_front(rows):
+    """Rows not dominated in (higher throughput, lower p50 latency, more input pixels)"""
+    def key(r):
+        return r['fps'], -r['median_ms'], r['imgsz'][0] * r['imgsz'][1]
+    front = []
+    for r in rows:
+        kr = key(r)
+        dominated = any(all(a >= b for a, b in zip(key(o), kr)) and key(o) != kr for o in rows)
+        if not dominated:
+            front.append(r)
+    return front
+
+
+def best_for_target(rows, fps_target):
+    """Largest input that sustains fps_target (lowest latency among equals); None if none does"""
+    ok = [r for r in rows if r['fps'] >= fps_target]
+    if not ok:
+        return None
+    return max(ok, key=lambda r: (r['imgsz'][0] * r['imgsz'][1], -r['median_ms']))
+
+
+def _sweep_targets(model_path, batches, shapes, weights, data, export_missing, cache):
+    """
+    ([(imgsz, batch, model path or None, error)], note) for the sweep combinations.
+    A cached engine is swapped for the cached engine of each combination (built
+    with export_missing); a standalone static engine only runs its built shape/batch.
+    """
+    combos = [((h, w), b) for h, w in shapes for b in batches]
+    if not model_path.endswith('.engine'):
+        return [(imgsz, b, model_path, None) for imgsz, b in combos], None
+    cache = cache or ExportCache()
+    meta = cache.meta(model_path)
+    if meta and weights and os.path.isfile(weights) and cache.weights_hash(weights) == meta['weights_sha256']:
+        targets = []
+        for imgsz, b in combos:
+            kwargs = dict(dynamic=meta.get('dynamic', False), data=data if meta['precision'] == 'int8' else None)
+            path = cache.lookup(weights, 'engine', meta['precision'], imgsz, b, **kwargs)
+            if path is None and export_missing:
+                try:
+                    path = cache.export(weights, 'engine', meta['precision'], imgsz, b, **kwargs)
+                except Exception as e:
+                    targets.append((imgsz, b, None, f"export failed: {str(e).splitlines()[0][:70]}"))
+                    continue
+            targets.append((imgsz, b, path, None if path else "no cached engine (add --sweep-export to build)"))
+        return targets, f"one cached {meta['precision'].upper()} engine per combination"
+    built = engine_metadata(model_path)
+    if built.get('args', {}).get('dynamic'):
+        return [(imgsz, b, model_path, None) for imgsz, b in combos], "dynamic engine"
+    imgsz = built.get('imgsz', meta['imgsz'] if meta else None)
+    if imgsz is None:
+        raise ValueError(f"{model_path} has no shape metadata; sweep its weights or a cached engine instead")
+    h, w = (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+    b = int(built.get('batch', meta['batch'] if meta else 1))
+    return [((h, w), b, model_path, None)], f"standalone engine: only its built shape {w}x{h} batch {b}"
+
+
+def sweep_model(model_path, batches=(1, 2, 4, 8), shapes=((640, 640),), num_frames=50, warmup=30, fps_target=30.0,
+                weights=None, data=None, export_missing=False, cache=None):
+    """
+    Benchmark every batch x shape combination.
+    A TensorRT engine only runs the shape/batch it was built for: when it comes
+    from the export cache and `weights` are given, each combination runs the
+    cached engine for that shape/batch (exported first with export_missing);
+    a standalone engine is swept at its built shape/batch only.
+    Rows carry the benchmarked file in 'model'.
+    """
+    print(f"\nSweeping {model_path}: batches {list(batches)}, shapes {[f'{w}x{h}' for h, w in shapes]}")
+    targets, note = _sweep_targets(model_path, batches, shapes, weights, data, export_missing, cache)
+    if note:
+        print(f"  TensorRT sweep: {note}")
+    loaded = {}
+    rows, errors = [], []
+    for (h, w), b, path, error in targets:
+        if path is None:
+            errors.append({'batch': b, 'imgsz': (h, w), 'error': error})
+            continue
+        try:
+            if path not in loaded:
+                loaded.clear()   # One engine in GPU memory at a time
+                loaded[path] = YOLO(path)
+            r = benchmark_model(path, num_frames, warmup, (h, w), b, model=loaded[path], quiet=True)
+        except Exception as e:
+            errors.append({'batch': b, 'imgsz': (h, w), 'error': str(e).splitlines()[0][:80]})
+            continue
+        r['model'] = path
+        rows.append(r)
+        print(f"  {w}x{h} batch {b}: {r['median_ms']:.2f} ms/call, {r['fps']:.1f} FPS "
+              f"({r['warmup_iters']} warmup)")
+    print_sweep(rows, errors, fps_target, note)
+    return rows, errors
+
+
+def print_sweep(rows, errors, fps_target, note=None):
+    front = pareto_front(rows)
+    best = best_for_target(rows, fps_target)
+    print("\n" + "="*78)
+    print(f"SWEEP RESULTS (target {fps_target:g} FPS;  * = Pareto front,  >> = best for target)")
+    if note:
+        print(f"TensorRT: {note}")
+    print("="*78)
+    print(f"   {'Shape':>9} {'Batch':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ms/frame':>9} {'FPS':>8} {'Warmup':>6}")
+    for r in sorted(rows, key=lambda r: (r['imgsz'][0] * r['imgsz'][1], r['batch'])):
+        h, w = r['imgsz']
+        mark = ">>" if r is best else (" *" if r in front else "  ")
+        print(f"{mark} {f'{w}x{h}':>9} {r['batch']:>5} {r['median_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['mean_ms'] / r['batch']:>9.2f} {r['fps']:>8.1f} {r['warmup_iters']:>6}")
+    for e in errors:
+        h, w = e['imgsz']
+        print(f"   {f'{w}x{h}':>9} {e['batch']:>5}  failed: {e['error']}")
+    if best is None:
+        print(f"\nNo configuration reaches {fps_target:g} FPS")
+    else:
+        h, w = best['imgsz']
+        print(f"\nBest for {fps_target:g} FPS: {w}x{h} batch {best['batch']} -> {best['fps']:.1f} FPS, "
+              f"{best['median_ms']:.2f} ms p50 per call")
+    print("="*78)
+
+
+def compare_models(pytorch_model, tensorrt_engine, num_frames=100, imgsz=640, batch=1):
+    """Compare PyTorch and TensorRT performance at the engine's input size and batch"""
     
     print("\n" + "="*60)
     print("PERFORMANCE COMPARISON")
@@ -122,11 +400,11 @@ def compare_models(pytorch_model, tensorrt_engine, num_frames=100):
     
     # Benchmark PyTorch model
     print("\n[1/2] PyTorch Model (FP32)")
-    pt_results = benchmark_model(pytorch_model, num_frames)
+    pt_results = benchmark_model(pytorch_model, num_frames, imgsz=imgsz, batch=batch)
     
     # Benchmark TensorRT engine
     print("\n[2/2] TensorRT Engine (FP16)")
-    trt_results = benchmark_model(tensorrt_engine, num_frames)
+    trt_results = benchmark_model(tensorrt_engine, num_frames, imgsz=imgsz, batch=batch)
     
     # Print comparison
     print("\n" + "="*60)
@@ -155,50 +433,46 @@ def compare_models(pytorch_model, tensorrt_engine, num_frames=100):
     print(f"  Time saved:     {pt_results['mean_ms'] - trt_results['mean_ms']:.2f} ms per frame")
     
     print("\n" + "="*60)
+    return pt_results, trt_results
 
 
-def test_accuracy(pytorch_model, tensorrt_engine, test_image=None):
+def test_accuracy(pytorch_model, tensorrt_engine, test_image=None, images=None, labels=None, backends=None,
+                  conf=0.25, imgsz=640, workers=4, limit=None, json_path=None):
     """
-    Test if TensorRT engine produces similar results to PyTorch model
+    Detection-level accuracy of the engine (and any extra backends) against
+    the PyTorch model over a directory of images: matched per class by IoU,
+    with precision/recall and mAP deltas (see visiondock_core.accuracy)
     """
     
     print("\n" + "="*60)
     print("ACCURACY TEST")
     print("="*60)
     
-    # Load models
-    pt_model = YOLO(pytorch_model)
-    trt_model = YOLO(tensorrt_engine)
-    
-    # Create or load test image
-    if test_image:
-        frame = cv2.imread(test_image)
-        if frame is None:
-            print(f"Warning: Could not load {test_image}, using random image")
-            frame = np.random.randint(0, 255, (640, 640, 3), dtype=np.uint8)
-    else:
-        frame = np.random.randint(0, 255, (640, 640, 3), dtype=np.uint8)
-    
-    # Run inference
-    print("\nRunning inference on both models...")
-    pt_results = pt_model(frame, verbose=False)[0]
-    trt_results = trt_model(frame, verbose=False)[0]
-    
-    # Compare detections
-    pt_boxes = len(pt_results.boxes)
-    trt_boxes = len(trt_results.boxes)
-    
-    print(f"\nPyTorch detections:  {pt_boxes}")
-    print(f"TensorRT detections: {trt_boxes}")
-    print(f"Difference:          {abs(pt_boxes - trt_boxes)}")
-    
-    if abs(pt_boxes - trt_boxes) <= 2:
-        print("\n✓ Results are similar (within 2 detection difference)")
-    else:
-        print("\n⚠ Warning: Results differ significantly")
-        print("  This is normal for some images due to FP16 precision")
+    source = images or test_image
+    if not source:
+        print("\nNo images: pass --images DIR (optionally --labels DIR with YOLO labels)")
+        print("="*60)
+        return None
+    
+    models = [pytorch_model, tensorrt_engine] + [b for b in (backends or []) if b not in (pytorch_model, tensorrt_engine)]
+    n_images = len(list_images(source, limit))
+    print(f"\nImages: {source} ({n_images})")
+    print(f"Ground truth: {labels or 'reference detections (' + pytorch_model + ')'}")
+    for m in models:
+        print(f"  backend: {m}")
+    
+    start = time.time()
+    report = compare_backends(models, source, labels=labels, conf=conf, imgsz=imgsz, workers=workers, limit=limit)
+    print(f"\n{n_images} images x {len(models)} backends in {time.time() - start:.1f}s\n")
+    print(format_accuracy(report))
+    
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {json_path}")
     
     print("="*60)
+    return report
 
 
 def main():
@@ -209,14 +483,61 @@ def main():
     parser.add_argument('--compare', action='store_true', help='Compare PyTorch vs TensorRT')
     parser.add_argument('--test-accuracy', action='store_true', help='Test accuracy')
     parser.add_argument('--test-image', type=str, help='Test image path')
+    parser.add_argument('--images', type=str, help='Image directory for --test-accuracy')
+    parser.add_argument('--labels', type=str, help='YOLO labels directory (ground truth); default: the PyTorch model is the reference')
+    parser.add_argument('--backends', type=str, nargs='+', help='Extra models to compare in --test-accuracy (e.g. an INT8 engine)')
+    parser.add_argument('--image-limit', type=int, help='Use at most this many images')
+    parser.add_argument('--conf', type=float, default=0.25, help='Operating confidence for precision/recall')
+    parser.add_argument('--workers', type=int, default=4, help='Image decoding threads')
+    parser.add_argument('--accuracy-json', type=str, help='Write the accuracy report to this file')
     parser.add_argument('--engine', type=str, help='TensorRT engine path (auto-detected if not provided)')
     parser.add_argument('--frames', type=int, default=100, help='Benchmark frames')
     parser.add_argument('--fp32', action='store_true', help='Use FP32 instead of FP16')
     parser.add_argument('--int8', action='store_true', help='Use INT8 (requires data YAML)')
     parser.add_argument('--data', type=str, default='coco128.yaml', help='Dataset YAML for INT8 calibration')
+    parser.add_argument('--calib-source', type=str, help='Recordings directory to calibrate INT8 on (instead of --data)')
+    parser.add_argument('--calib-frames', type=int, default=500, help='Calibration frames sampled from --calib-source')
+    parser.add_argument('--calib-val-frames', type=int, default=200, help='Held-out frames for the INT8 accuracy gate')
+    parser.add_argument('--max-map-drop', type=float, default=0.02, help='Largest mAP drop the INT8 accuracy gate accepts')
+    parser.add_argument('--no-accuracy-gate', action='store_true', help='Accept the INT8 engine without the accuracy gate')
     parser.add_argument('--workspace', type=int, default=4, help='GPU workspace in GB')
+    parser.add_argument('--imgsz', type=str, default='640', help='Engine input size: 640 or WIDTHxHEIGHT')
+    parser.add_argument('--batch', type=int, default=1, help='Engine batch size')
+    parser.add_argument('--force-export', action='store_true', help='Re-export even if the export cache has this engine')
+    parser.add_argument('--list-exports', action='store_true', help='List cached exports and exit')
+    parser.add_argument('--warmup', type=int, default=30, help='Maximum warmup calls (stops early once timings are stable)')
+    parser.add_argument('--sweep', action='store_true', help='Benchmark every --batches x --shapes combination')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 2, 4, 8], help='Batch sizes for --sweep')
+    parser.add_argument('--shapes', type=str, nargs='+', default=['640'], help='Input sizes for --sweep: 640 or WIDTHxHEIGHT (e.g. 640x384)')
+    parser.add_argument('--sweep-export', action='store_true', help='Build missing cached engines for --sweep combinations')
+    parser.add_argument('--fps-target', type=float, default=30.0, help='Throughput target used to pick the best --sweep configuration')
+    parser.add_argument('--sweep-json', type=str, help='Write --sweep rows as JSON to this file')
+    parser.add_argument('--history-db', type=str, help='Benchmark history database (default ~/.visiondock/bench_history.db)')
+    parser.add_argument('--no-history', action='store_true', help='Do not record benchmark runs in the history')
+    parser.add_argument('--label', type=str, help='Label stored with recorded runs (e.g. "jetpack 6.1")')
+    parser.add_argument('--history-list', action='store_true', help='List recorded benchmark runs and exit')
+    parser.add_argument('--history-compare', type=int, nargs='*', metavar='RUN_ID',
+                        help='Compare runs and exit (exit code 1 on regression): none = latest vs its baseline, '
+                             'CANDIDATE, or BASELINE CANDIDATE')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Significance level of the regression tests')
+    parser.add_argument('--min-effect', type=float, default=0.03, help='Smallest relative slowdown reported as a regression')
     args = parser.parse_args()
     
+    if args.list_exports:
+        list_exports()
+        return
+    
+    history = BenchmarkHistory(args.history_db)
+    if args.history_list:
+        print(format_runs(history.runs()))
+        return
+    if args.history_compare is not None:
+        if not history_compare(history, args.history_compare, args.alpha, args.min_effect):
+            raise SystemExit(1)
+        return
+    if args.no_history:
+        history = None
+    
     # Check CUDA availability
     if not torch.cuda.is_available():
         print("Error: CUDA not available")
@@ -228,38 +549,82 @@ def main():
     print(f"  Device: {torch.cuda.get_device_name(0)}")
     print()
     
-    # Auto-detect engine path
+    # Engine for these weights, precision, shape and batch on this runtime (never a stale neighbour file)
+    precision = "int8" if args.int8 else ("fp32" if args.fp32 else "fp16")
+    imgsz = parse_shape(args.imgsz)
+    calib = None
+    if args.int8 and args.calib_source:
+        calib = build_calibration_set(args.calib_source, args.calib_frames, args.calib_val_frames, max(imgsz),
+                                      names=YOLO(args.model).names)
+        args.data = calib['yaml']
     if not args.engine:
-        args.engine = args.model.replace('.pt', '.engine')
+        args.engine = ExportCache().lookup(args.model, 'engine', precision, imgsz, args.batch,
+                                           data=args.data if args.int8 else None) or ''
+        if args.engine:
+            print(f"Cached engine: {args.engine}")
     
     # Export to TensorRT
-    if args.export:
+    if args.export and calib:
+        args.engine = calibrate_int8(args.model, calib, imgsz, args.batch, args.workspace, args.force_export,
+                                     None if args.no_accuracy_gate else args.max_map_drop, args.conf, args.workers)
+        if not args.engine:
+            return
+    elif args.export:
         engine_path = export_to_tensorrt(
             args.model,
             half=not args.fp32 and not args.int8,
             int8=args.int8,
             data=args.data,
-            workspace=args.workspace
+            workspace=args.workspace,
+            imgsz=imgsz,
+            batch=args.batch,
+            force=args.force_export
         )
         args.engine = engine_path
+    elif not args.engine and (args.compare or args.test_accuracy):
+        print(f"No cached {precision.upper()} engine for {args.model} ({args.imgsz}, batch {args.batch}) "
+              f"on this runtime; run with --export first")
+        return
+    
+    # Batch / input-size sweep
+    if args.sweep:
+        model_to_sweep = args.engine if args.engine.endswith('.engine') and os.path.exists(args.engine) else args.model
+        rows, errors = sweep_model(model_to_sweep, args.batches, [parse_shape(s) for s in args.shapes],
+                                   args.frames, args.warmup, args.fps_target, weights=args.model,
+                                   data=args.data if args.int8 else None, export_missing=args.sweep_export)
+        if history:
+            for r in rows:
+                record_run(history, r['model'], r, args.label, args.alpha, args.min_effect)
+        if args.sweep_json:
+            with open(args.sweep_json, 'w') as f:
+                json.dump({'model': model_to_sweep, 'fps_target': args.fps_target,
+                           'rows': [{k: (list(v) if isinstance(v, tuple) else float(v) if isinstance(v, np.floating) else v)
+                                     for k, v in r.items() if k != 'times_ms'} for r in rows],
+                           'errors': errors}, f, indent=2)
     
     # Benchmark individual model
     if args.benchmark and not args.compare:
         model_to_benchmark = args.engine if args.engine.endswith('.engine') else args.model
-        results = benchmark_model(model_to_benchmark, args.frames)
+        results = benchmark_model(model_to_benchmark, args.frames, args.warmup, imgsz=imgsz, batch=args.batch)
         
         print("\nBenchmark Results:")
         print(f"  Mean:   {results['mean_ms']:.2f} ms")
         print(f"  Median: {results['median_ms']:.2f} ms")
         print(f"  FPS:    {results['fps']:.2f}")
+        if history:
+            record_run(history, model_to_benchmark, results, args.label, args.alpha, args.min_effect)
     
     # Compare PyTorch vs TensorRT
     if args.compare:
-        compare_models(args.model, args.engine, args.frames)
+        pt_results, trt_results = compare_models(args.model, args.engine, args.frames, imgsz=imgsz, batch=args.batch)
+        if history:
+            record_run(history, args.model, pt_results, args.label, args.alpha, args.min_effect)
+            record_run(history, args.engine, trt_results, args.label, args.alpha, args.min_effect)
     
     # Test accuracy
     if args.test_accuracy:
-        test_accuracy(args.model, args.engine, args.test_image)
+        test_accuracy(args.model, args.engine, args.test_image, args.images, args.labels, args.backends,
+                      args.conf, imgsz, args.workers, args.image_limit, args.accuracy_json)
 
 
 if __name__ == '__main__':
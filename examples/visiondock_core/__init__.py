@@ -0,0 +1,5 @@
+"""
+VisionDock Core
+Shared building blocks for the example scripts and VisionDock Studio
+(capture, streaming and performance helpers).
+"""
@@ -0,0 +1,279 @@
+"""
+Detection-Level Accuracy Comparison
+Runs two or more backends (e.g. yolo11n.pt, an FP16 engine, an INT8 engine)
+over a directory of images and compares what they detect, not just how many:
+
+    - detections are matched to ground truth per class with a vectorized IoU
+      matrix (one pass per IoU threshold, no per-box Python loops)
+    - per backend: precision / recall per class at the operating confidence,
+      AP50 and AP50-95 (COCO 101-point interpolation)
+    - per candidate backend: the deltas against the reference backend
+
+Ground truth is a YOLO labels directory when one is given; otherwise the
+reference backend's detections (at the operating confidence) stand in for
+it, which measures drift from the reference rather than absolute accuracy.
+Images are decoded by a thread pool (cv2.imread releases the GIL) ahead of
+inference, so a few thousand images are limited by the models, not by JPEG
+decoding.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .offline import iou_matrix
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def list_images(directory, limit=None):
+    """Image files under `directory` (recursive, sorted)"""
+    if os.path.isfile(directory):
+        return [directory]
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+    paths.sort()
+    return paths[:limit] if limit else paths
+
+
+def iter_images(paths, workers=4, prefetch=None):
+    """
+    Yield (path, image) in order while a thread pool decodes ahead.
+    At most `prefetch` decoded images are held at once; unreadable files are skipped.
+    """
+    prefetch = prefetch or workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        it = iter(paths)
+        for path in it:
+            pending.append((path, pool.submit(cv2.imread, path)))
+            if len(pending) >= prefetch:
+                break
+        while pending:
+            path, future = pending.popleft()
+            for nxt in it:
+                pending.append((nxt, pool.submit(cv2.imread, nxt)))
+                break
+            image = future.result()
+            if image is not None:
+                yield path, image
+
+
+def match_detections(det_boxes, det_cls, gt_boxes, gt_cls, thresholds=IOU_THRESHOLDS):
+    """
+    True-positive flags (n_det, n_thresholds): each ground-truth box is matched
+    to at most one detection of its class, highest IoU first.
+    """
+    tp = np.zeros((len(det_boxes), len(thresholds)), dtype=bool)
+    if not len(det_boxes) or not len(gt_boxes):
+        return tp
+    iou = iou_matrix(det_boxes, gt_boxes)
+    iou[np.asarray(det_cls)[:, None] != np.asarray(gt_cls)[None, :]] = 0.0
+    for j, thr in enumerate(thresholds):
+        d, g = np.nonzero(iou >= thr)
+        if not d.size:
+            continue
+        order = np.argsort(-iou[d, g], kind='stable')
+        d, g = d[order], g[order]
+        _, first = np.unique(d, return_index=True)
+        d, g = d[first], g[first]
+        order = np.argsort(-iou[d, g], kind='stable')
+        d, g = d[order], g[order]
+        _, first = np.unique(g, return_index=True)
+        tp[d[first], j] = True
+    return tp
+
+
+def average_precision(recall, precision):
+    """COCO-style 101-point interpolated AP of one precision/recall curve"""
+    if not len(recall):
+        return 0.0
+    envelope = np.flip(np.maximum.accumulate(np.flip(precision)))   # best precision at recall >= r
+    idx = np.searchsorted(recall, np.linspace(0, 1, 101), side='left')
+    reached = idx < len(recall)
+    return float(np.sum(envelope[idx[reached]]) / 101)
+
+
+class Detections:
+    """xyxy boxes, confidences and class ids of one image"""
+
+    __slots__ = ('boxes', 'conf', 'cls')
+
+    def __init__(self, boxes, conf, cls):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.int64).reshape(-1)
+
+    @classmethod
+    def from_result(cls, result):
+        b = result.boxes
+        return cls(b.xyxy.cpu().numpy(), b.conf.cpu().numpy(), b.cls.cpu().numpy())
+
+    def above(self, conf):
+        keep = self.conf >= conf
+        return Detections(self.boxes[keep], self.conf[keep], self.cls[keep])
+
+
+def load_yolo_labels(labels_dir, image_path, shape, images_root=None):
+    """
+    Ground truth for an image from a YOLO labels directory (class cx cy w h,
+    normalized), looked up by the image's path relative to `images_root`.
+    """
+    rel = os.path.relpath(image_path, images_root) if images_root and os.path.isdir(images_root) \
+        else os.path.basename(image_path)
+    path = os.path.join(labels_dir, os.path.splitext(rel)[0] + '.txt')
+    rows = []
+    if os.path.isfile(path):
+        with open(path) as f:
+            rows = [line.split()[:5] for line in f if len(line.split()) >= 5]
+    if not rows:
+        return Detections(np.zeros((0, 4)), [], [])
+    data = np.array(rows, dtype=np.float32)
+    h, w = shape[:2]
+    cx, cy, bw, bh = data[:, 1] * w, data[:, 2] * h, data[:, 3] * w, data[:, 4] * h
+    boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+    return Detections(boxes, np.ones(len(data)), data[:, 0])
+
+
+class AccuracyStats:
+    """Matches accumulated over a dataset for one backend"""
+
+    def __init__(self, thresholds=IOU_THRESHOLDS):
+        self.thresholds = thresholds
+        self._tp, self._conf, self._cls = [], [], []
+        self.n_gt = {}
+        self.images = 0
+
+    def add(self, det, gt):
+        self._tp.append(match_detections(det.boxes, det.cls, gt.boxes, gt.cls, self.thresholds))
+        self._conf.append(det.conf)
+        self._cls.append(det.cls)
+        for c, n in zip(*np.unique(gt.cls, return_counts=True)):
+            self.n_gt[int(c)] = self.n_gt.get(int(c), 0) + int(n)
+        self.images += 1
+
+    def result(self, conf, names=None):
+        """
+        {'precision', 'recall', 'map50', 'map', 'per_class': {name: {...}}}.
+        Precision/recall use detections >= conf at IoU 0.5; AP uses every detection.
+        """
+        tp = np.concatenate(self._tp) if self._tp else np.zeros((0, len(self.thresholds)), bool)
+        scores = np.concatenate(self._conf) if self._conf else np.zeros(0)
+        classes = np.concatenate(self._cls) if self._cls else np.zeros(0, dtype=np.int64)
+        order = np.argsort(-scores, kind='stable')
+        tp, scores, classes = tp[order], scores[order], classes[order]
+
+        per_class = {}
+        tot_tp = tot_det = tot_gt = 0
+        for c in sorted(set(self.n_gt) | set(int(v) for v in np.unique(classes))):
+            sel = classes == c
+            n_gt = self.n_gt.get(c, 0)
+            c_tp, c_scores = tp[sel], scores[sel]
+            op = c_scores >= conf
+            n_det, n_tp = int(op.sum()), int(c_tp[op, 0].sum())
+            if n_gt and len(c_tp):
+                ctp = np.cumsum(c_tp, axis=0)
+                cfp = np.cumsum(~c_tp, axis=0)
+                recall = ctp / n_gt
+                precision = ctp / (ctp + cfp)
+                ap = [average_precision(recall[:, j], precision[:, j]) for j in range(len(self.thresholds))]
+            else:
+                ap = [0.0] * len(self.thresholds)
+            name = names.get(c, str(c)) if isinstance(names, dict) else str(c)
+            per_class[name] = {
+                'n_gt': n_gt, 'n_det': n_det,
+                'precision': n_tp / n_det if n_det else 0.0,
+                'recall': n_tp / n_gt if n_gt else 0.0,
+                'ap50': ap[0], 'ap': float(np.mean(ap)),
+            }
+            tot_tp, tot_det, tot_gt = tot_tp + n_tp, tot_det + n_det, tot_gt + n_gt
+        with_gt = [v for v in per_class.values() if v['n_gt']]
+        return {
+            'images': self.images,
+            'precision': tot_tp / tot_det if tot_det else 0.0,
+            'recall': tot_tp / tot_gt if tot_gt else 0.0,
+            'map50': float(np.mean([v['ap50'] for v in with_gt])) if with_gt else 0.0,
+            'map': float(np.mean([v['ap'] for v in with_gt])) if with_gt else 0.0,
+            'per_class': per_class,
+        }
+
+
+def compare_backends(models, images, labels=None, conf=0.25, imgsz=640, workers=4, limit=None,
+                     map_conf=0.001, progress=True):
+    """
+    Run every backend over `images` (a directory, file or list of paths) and
+    compare them. models: list of paths; the first is the reference. Backends
+    are run in lockstep so each image is decoded once.
+
+    Returns {'reference', 'ground_truth', 'backends': {path: result}, 'deltas': {path: {...}}}.
+    """
+    from ultralytics import YOLO
+
+    paths = images if isinstance(images, (list, tuple)) else list_images(images, limit)
+    if not paths:
+        raise FileNotFoundError(f"No images found in {images}")
+    images_root = images if isinstance(images, str) else None
+    loaded = [YOLO(m) for m in models]
+    names = getattr(loaded[0], 'names', None)
+    stats = {m: AccuracyStats() for m in models}
+    reference = models[0]
+
+    for n, (path, image) in enumerate(iter_images(paths, workers), 1):
+        dets = [Detections.from_result(model(image, conf=map_conf, imgsz=imgsz, verbose=False)[0])
+                for model in loaded]
+        if labels:
+            gt = load_yolo_labels(labels, path, image.shape, images_root)
+        else:
+            gt = dets[0].above(conf)
+        for m, det in zip(models, dets):
+            stats[m].add(det, gt)
+        if progress and n % 200 == 0:
+            print(f"  {n}/{len(paths)} images")
+
+    backends = {m: stats[m].result(conf, names) for m in models}
+    ref = backends[reference]
+    deltas = {}
+    for m in models[1:]:
+        r = backends[m]
+        deltas[m] = {
+            'precision': r['precision'] - ref['precision'],
+            'recall': r['recall'] - ref['recall'],
+            'map50': r['map50'] - ref['map50'],
+            'map': r['map'] - ref['map'],
+            'per_class': {
+                c: {k: v[k] - ref['per_class'].get(c, {}).get(k, 0.0) for k in ('precision', 'recall', 'ap50')}
+                for c, v in r['per_class'].items()
+            },
+        }
+    return {'reference': reference, 'ground_truth': labels or f"{reference} (conf >= {conf})",
+            'conf': conf, 'backends': backends, 'deltas': deltas}
+
+
+def format_accuracy(report, top=10):
+    """Summary table plus the classes whose AP50 moved the most for each candidate"""
+    ref = report['reference']
+    lines = [f"Ground truth: {report['ground_truth']}",
+             f"{'Backend':<36} {'Images':>6} {'P':>7} {'R':>7} {'mAP50':>7} {'mAP':>7} "
+             f"{'dP':>7} {'dR':>7} {'dmAP50':>7} {'dmAP':>7}"]
+    for m, r in report['backends'].items():
+        d = report['deltas'].get(m)
+        tail = (f"{d['precision']:>+7.3f} {d['recall']:>+7.3f} {d['map50']:>+7.3f} {d['map']:>+7.3f}"
+                if d else f"{'(reference)':>31}")
+        lines.append(f"{os.path.basename(m):<36} {r['images']:>6} {r['precision']:>7.3f} {r['recall']:>7.3f} "
+                     f"{r['map50']:>7.3f} {r['map']:>7.3f} {tail}")
+    for m, d in report['deltas'].items():
+        per_class = report['backends'][m]['per_class']
+        moved = sorted(d['per_class'].items(), key=lambda kv: -abs(kv[1]['ap50']))[:top]
+        if not moved:
+            continue
+        lines.append(f"\n{os.path.basename(m)} vs {os.path.basename(ref)}: largest per-class changes")
+        lines.append(f"  {'Class':<20} {'GT':>6} {'dP':>7} {'dR':>7} {'dAP50':>7}")
+        for c, v in moved:
+            lines.append(f"  {c:<20} {per_class[c]['n_gt']:>6} {v['precision']:>+7.3f} {v['recall']:>+7.3f} "
+                         f"{v['ap50']:>+7.3f}")
+    return "\n".join(lines)
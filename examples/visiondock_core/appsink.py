@@ -0,0 +1,312 @@
+"""
+Native appsink Capture (PyGObject)
+A capture backend that pulls samples from a GStreamer appsink directly
+instead of going through cv2.VideoCapture:
+
+    - buffers are mapped and exposed as NumPy views (no per-frame allocation;
+      read(out) copies once into a caller-owned array)
+    - every frame carries its PTS, converted to time.monotonic() seconds
+    - appsink max-buffers / drop are set explicitly
+    - pull(timeout) never blocks longer than the timeout
+
+AppSinkCapture mimics the parts of cv2.VideoCapture the examples use
+(isOpened/read/grab/retrieve/get/set/release), so it is a drop-in backend:
+    open_capture(spec, backend='appsink')
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import gi
+    gi.require_version('Gst', '1.0')
+    gi.require_version('GstVideo', '1.0')
+    from gi.repository import Gst, GstVideo
+    Gst.init(None)
+    HAVE_GST = True
+except (ImportError, ValueError):
+    Gst = GstVideo = None
+    HAVE_GST = False
+
+_CHANNELS = {'BGR': 3, 'RGB': 3, 'BGRx': 4, 'BGRA': 4, 'RGBA': 4, 'GRAY8': 1}
+
+
+class MappedFrame:
+    """
+    One pulled sample: `array` is a view into the mapped GStreamer buffer.
+
+    Call release() (or use as a context manager) once done so the buffer goes
+    back to the pool; copy the array if it must outlive the release.
+    """
+
+    def __init__(self, sample, buffer, map_info, array, pts_ns, timestamp):
+        self._sample = sample
+        self._buffer = buffer
+        self._map = map_info
+        self.array = array
+        self.pts_ns = pts_ns
+        self.timestamp = timestamp
+
+    def release(self):
+        if self._map is not None:
+            self.array = None
+            self._buffer.unmap(self._map)
+            self._map = None
+            self._buffer = self._sample = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AppSinkCapture:
+    """cv2.VideoCapture-compatible capture on a PyGObject appsink"""
+
+    def __init__(self, pipeline, max_buffers=1, drop=True, timeout_ms=1000):
+        """
+        Args:
+            pipeline: gst-launch style string ending in an appsink
+            max_buffers/drop: appsink queue tuning (1/True = latest frame only)
+            timeout_ms: pull timeout used by read()/grab()
+        """
+        if not HAVE_GST:
+            raise ImportError("PyGObject with GStreamer 1.0 (python3-gi, gir1.2-gst-plugins-base-1.0) is required")
+        self.timeout_ms = timeout_ms
+        self.last_timestamp = None
+        self.last_pts_ns = None
+        self.pulled = 0
+        self._pending = None
+        self._info = None
+        self._info_caps = None
+        self.pipeline = None
+        self.sink = None
+        try:
+            self.pipeline = Gst.parse_launch(pipeline)
+        except Exception as e:   # GLib.Error on a malformed pipeline / missing element
+            print(f"[appsink] Pipeline error: {e}")
+            return
+        self.sink = self._find_appsink()
+        if self.sink is None:
+            print("[appsink] Pipeline has no appsink")
+            self.pipeline = None
+            return
+        self.sink.set_property('emit-signals', False)
+        self.sink.set_property('sync', False)
+        self.sink.set_property('max-buffers', int(max_buffers))
+        self.sink.set_property('drop', bool(drop))
+
+        if self.pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+            self.release()
+            return
+        # Wait for preroll / the first buffer so isOpened() means "delivers frames"
+        first = self.pull(timeout_ms=max(timeout_ms, 5000))
+        if first is None:
+            self.release()
+            return
+        self._pending = first
+
+    def _find_appsink(self):
+        it = self.pipeline.iterate_sinks()
+        while True:
+            ok, element = it.next()
+            if ok != Gst.IteratorResult.OK:
+                return None
+            if element.get_factory() is not None and element.get_factory().get_name() == 'appsink':
+                return element
+
+    def isOpened(self):
+        return self.pipeline is not None
+
+    def _video_info(self, caps):
+        if self._info_caps is None or not caps.is_equal(self._info_caps):
+            try:
+                info = GstVideo.VideoInfo.new_from_caps(caps)
+            except AttributeError:   # GStreamer < 1.20
+                info = GstVideo.VideoInfo()
+                info.from_caps(caps)
+            self._info, self._info_caps = info, caps
+        return self._info
+
+    def _view(self, data, info):
+        """NumPy view of a mapped buffer honouring row strides and plane offsets"""
+        fmt = info.finfo.name
+        w, h = info.width, info.height
+        buf = np.frombuffer(data, dtype=np.uint8)
+        if fmt == 'NV12':
+            y_stride, uv_stride, uv_offset = info.stride[0], info.stride[1], info.offset[1]
+            if y_stride == w and uv_stride == w and uv_offset == w * h:
+                return buf[:w * h * 3 // 2].reshape(h * 3 // 2, w)        # OpenCV's NV12 layout
+            y = np.lib.stride_tricks.as_strided(buf, (h, w), (y_stride, 1))
+            uv = np.lib.stride_tricks.as_strided(buf[uv_offset:], (h // 2, w), (uv_stride, 1))
+            return np.vstack((y, uv))                                   # Padded planes: one copy
+        c = _CHANNELS.get(fmt)
+        if c is None:
+            raise ValueError(f"Unsupported appsink format {fmt}")
+        stride = info.stride[0]
+        shape, strides = ((h, w), (stride, 1)) if c == 1 else ((h, w, c), (stride, c, 1))
+        return np.lib.stride_tricks.as_strided(buf, shape, strides)
+
+    def pull(self, timeout_ms=None):
+        """Next frame as a MappedFrame, or None after timeout_ms / at end of stream"""
+        if self.sink is None:
+            return None
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            return frame
+        timeout = self.timeout_ms if timeout_ms is None else timeout_ms
+        sample = self.sink.emit('try-pull-sample', int(timeout * Gst.MSECOND))
+        if sample is None:
+            return None
+        buffer = sample.get_buffer()
+        ok, map_info = buffer.map(Gst.MapFlags.READ)
+        if not ok:
+            return None
+        array = self._view(map_info.data, self._video_info(sample.get_caps()))
+
+        pts = buffer.pts
+        if pts != Gst.CLOCK_TIME_NONE:
+            # running time + base time = pipeline clock (CLOCK_MONOTONIC, same as time.monotonic())
+            timestamp = (self.pipeline.get_base_time() + pts) / 1e9
+        else:
+            pts, timestamp = None, time.monotonic()
+        self.pulled += 1
+        self.last_pts_ns, self.last_timestamp = pts, timestamp
+        return MappedFrame(sample, buffer, map_info, array, pts, timestamp)
+
+    # --- cv2.VideoCapture compatible subset -------------------------------
+
+    def read(self, image=None):
+        """Pull one frame; copies into `image` when given (no allocation), else returns a copy"""
+        frame = self.pull()
+        if frame is None:
+            return False, None
+        with frame:
+            if image is not None and image.shape == frame.array.shape:
+                np.copyto(image, frame.array)
+                return True, image
+            return True, frame.array.copy()
+
+    def grab(self):
+        """Advance to the next frame (blocking like cv2's grab); an earlier grabbed frame is dropped"""
+        if self._pending is not None:
+            self._pending.release()
+            self._pending = None
+        self._pending = self.pull()
+        return self._pending is not None
+
+    def retrieve(self, image=None):
+        return self.read(image)
+
+    def get(self, prop):
+        info = self._info
+        if info is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(info.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(info.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return info.fps_n / info.fps_d if info.fps_d else 0.0
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return (self.last_pts_ns or 0) / 1e6
+        return 0.0
+
+    def set(self, prop, value):
+        return False   # Caps are fixed by the pipeline string
+
+    def release(self):
+        if self._pending is not None:
+            self._pending.release()
+            self._pending = None
+        if self.pipeline is not None:
+            self.pipeline.set_state(Gst.State.NULL)
+            self.pipeline = None
+        self.sink = None
+
+
+def benchmark_backends(pipeline, n_frames=600, warmup=30):
+    """
+    Pull n_frames through cv2.VideoCapture and through AppSinkCapture (view and
+    read-into-preallocated modes). Reports FPS, process CPU per frame and, for
+    appsink, PTS-to-pull latency.
+    """
+    import tracemalloc
+
+    def run(name, open_fn, consume):
+        cap = open_fn()
+        if not cap.isOpened():
+            return {'backend': name, 'error': 'did not open'}
+        for _ in range(warmup):
+            cap.read()
+        tracemalloc.start()
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        frames, lat = 0, []
+        while frames < n_frames:
+            ok, latency_ms = consume(cap)
+            if not ok:
+                break
+            frames += 1
+            if latency_ms is not None:
+                lat.append(latency_ms)
+        cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        cap.release()
+        row = {'backend': name, 'frames': frames, 'fps': frames / wall if wall else 0.0,
+               'cpu_ms_per_frame': cpu * 1000.0 / max(1, frames), 'peak_alloc_kb': peak / 1024.0}
+        if lat:
+            lat.sort()
+            row['pts_latency_ms_p50'] = lat[len(lat) // 2]
+            row['pts_latency_ms_p99'] = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+        return row
+
+    def opencv_read(cap):
+        ok, _ = cap.read()
+        return ok, None
+
+    def appsink_view(cap):
+        frame = cap.pull()
+        if frame is None:
+            return False, None
+        with frame:
+            latency = (time.monotonic() - frame.timestamp) * 1000.0
+            frame.array[0, 0]    # Touch the view like a consumer would
+        return True, latency
+
+    out = {}
+
+    def appsink_into(cap):
+        frame = cap.pull()
+        if frame is None:
+            return False, None
+        with frame:
+            target = out.get('buf')
+            if target is None or target.shape != frame.array.shape:
+                target = out['buf'] = np.empty_like(frame.array)
+            np.copyto(target, frame.array)
+            return True, (time.monotonic() - frame.timestamp) * 1000.0
+
+    rows = [run('opencv', lambda: cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER), opencv_read)]
+    if HAVE_GST:
+        rows.append(run('appsink (view)', lambda: AppSinkCapture(pipeline), appsink_view))
+        rows.append(run('appsink (read into)', lambda: AppSinkCapture(pipeline), appsink_into))
+    else:
+        rows.append({'backend': 'appsink', 'error': 'PyGObject / GStreamer not installed'})
+    return rows
+
+
+def format_benchmark(rows):
+    lines = [f"{'Backend':<20} {'Frames':>7} {'FPS':>8} {'CPU ms/frame':>13} {'Peak alloc KB':>14} {'PTS lat p50/p99 ms':>19}"]
+    for r in rows:
+        if 'error' in r:
+            lines.append(f"{r['backend']:<20} {r['error']}")
+            continue
+        lat = (f"{r['pts_latency_ms_p50']:.2f}/{r['pts_latency_ms_p99']:.2f}"
+               if 'pts_latency_ms_p50' in r else "-")
+        lines.append(f"{r['backend']:<20} {r['frames']:>7} {r['fps']:>8.1f} {r['cpu_ms_per_frame']:>13.3f} "
+                     f"{r['peak_alloc_kb']:>14.0f} {lat:>19}")
+    return "\n".join(lines)
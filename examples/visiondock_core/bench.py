@@ -0,0 +1,287 @@
+"""
+Pipeline Benchmark Helpers
+Camera-free sources and reporting for examples/pipeline_benchmark.py:
+
+    - SyntheticSource: moving shapes over a textured background, optionally
+      paced like a live camera, with cv2.VideoCapture's read/grab/retrieve
+    - LoopingFileSource: a video file that rewinds at the end
+    - predict_stages(): splits a model call into letterbox / model / NMS
+      stamps from Ultralytics' per-image speed figures
+    - bench_report(): JSON document with host, git revision and config, so
+      runs can be compared across machines and commits
+    - SystemMonitor: CPU, RAM and thermal-zone temperatures sampled in the
+      background while a benchmark step runs
+"""
+
+import glob
+import os
+import platform
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import psutil
+except ImportError:   # CPU / RAM figures are omitted without psutil
+    psutil = None
+
+from .gst import get_l4t_version, is_jetson
+
+
+class SyntheticSource:
+    """
+    Deterministic moving-object video. A small set of frames is rendered up
+    front and cycled, so the source itself costs almost nothing per frame.
+    fps > 0 paces grab() like a live camera; fps = 0 delivers frames as fast
+    as they are read.
+    """
+
+    def __init__(self, width=1280, height=720, fps=30, seed=0, n_unique=60, n_objects=6):
+        self.width, self.height, self.fps = int(width), int(height), float(fps)
+        rng = np.random.default_rng(seed)
+        background = cv2.GaussianBlur(rng.integers(40, 200, (self.height // 8, self.width // 8, 3), dtype=np.uint8),
+                                      (5, 5), 0)
+        background = cv2.resize(background, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+        objects = [(rng.uniform(0, 1, 2), rng.uniform(-0.01, 0.01, 2), rng.uniform(0.05, 0.2),
+                    tuple(int(c) for c in rng.integers(0, 255, 3))) for _ in range(n_objects)]
+        self._frames = []
+        for i in range(n_unique):
+            frame = background.copy()
+            for pos, vel, size, color in objects:
+                x, y = (pos + vel * i) % 1.0
+                w, h = int(size * self.width), int(size * self.height * 1.8)
+                x0, y0 = int(x * (self.width - w)), int(y * (self.height - h))
+                cv2.rectangle(frame, (x0, y0), (x0 + w, y0 + h), color, -1)
+                cv2.circle(frame, (x0 + w // 2, y0 - h // 6), max(2, w // 3), color, -1)
+            self._frames.append(frame)
+        self.index = 0
+        self.last_timestamp = None
+        self._next = time.monotonic()
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def grab(self):
+        if not self._opened:
+            return False
+        if self.fps > 0:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+        self.last_timestamp = time.monotonic()
+        self.index += 1
+        return True
+
+    def retrieve(self, image=None):
+        frame = self._frames[self.index % len(self._frames)]
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def release(self):
+        self._opened = False
+
+
+class LoopingFileSource:
+    """Video file as an endless source (rewinds at the end), optionally resized and paced"""
+
+    def __init__(self, path, width=None, height=None, fps=0):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.size = (int(width), int(height)) if width and height else None
+        self.fps = float(fps)
+        self.last_timestamp = None
+        self._next = time.monotonic()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def grab(self):
+        if self.fps > 0:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+        ok = self.cap.grab()
+        if not ok:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok = self.cap.grab()
+        self.last_timestamp = time.monotonic()
+        return ok
+
+    def retrieve(self, image=None):
+        ok, frame = self.cap.retrieve()
+        if ok and self.size is not None and (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return ok, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+def open_bench_source(source='synthetic', width=1280, height=720, fps=30, seed=0, n_unique=60):
+    """'synthetic' or a video file path; every call returns an independent source"""
+    if source == 'synthetic':
+        return SyntheticSource(width, height, fps, seed=seed, n_unique=n_unique)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Benchmark source not found: {source}")
+    return LoopingFileSource(source, width, height, fps)
+
+
+def predict_stages(trace, results, t_start, t_end, n_images=1):
+    """
+    Stamp letterbox / model / NMS inside one predictor call from the
+    results' speed dict (ms per image). Whatever the three do not cover
+    (tensor transfer, result objects, Python overhead) is 'predict_other'.
+    """
+    speed = getattr(results[0], 'speed', None) if results else None
+    if speed:
+        t = t_start
+        for stage, key in (('letterbox', 'preprocess'), ('model', 'inference'), ('nms', 'postprocess')):
+            t = min(t_end, t + (speed.get(key) or 0.0) * n_images / 1000.0)
+            trace.mark(stage, t)
+        trace.mark('predict_other', t_end)
+    else:
+        trace.mark('predict', t_end)
+    return trace
+
+
+def git_revision(path=None):
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=path or os.path.dirname(__file__),
+                             capture_output=True, text=True, timeout=5)
+        rev = out.stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=path or os.path.dirname(__file__), capture_output=True, text=True, timeout=5)
+        return rev + ('-dirty' if dirty.stdout.strip() else '') if rev else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def host_info():
+    info = {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'system': f"{platform.system()} {platform.release()}",
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'cpu_count': os.cpu_count(),
+        'l4t': f"r{get_l4t_version()}" if is_jetson() else None,
+    }
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        if torch.cuda.is_available():
+            info['cuda_device'] = torch.cuda.get_device_name(0)
+    except ImportError:
+        pass
+    return info
+
+
+def bench_report(results, config):
+    """Top-level JSON document for one benchmark run"""
+    return {
+        'suite': 'visiondock-pipeline-bench',
+        'schema': 1,
+        'time': round(time.time(), 3),
+        'git': git_revision(),
+        'host': host_info(),
+        'config': config,
+        'results': results,
+    }
+
+
+def read_temperatures():
+    """{zone type: degrees C} from the kernel thermal zones (CPU-therm, GPU-therm, tj-therm on Jetson)"""
+    temps = {}
+    for zone in glob.glob("/sys/class/thermal/thermal_zone*"):
+        try:
+            with open(os.path.join(zone, "type")) as f:
+                name = f.read().strip()
+            with open(os.path.join(zone, "temp")) as f:
+                value = int(f.read().strip()) / 1000.0
+        except (OSError, ValueError):
+            continue
+        if -40.0 < value < 150.0:   # Disabled zones report placeholder values
+            temps[name] = value
+    return temps
+
+
+class SystemMonitor:
+    """
+    Background sampler for one benchmark step:
+
+        with SystemMonitor() as mon:
+            ...run...
+        mon.summary()  # cpu_percent / ram_percent / rss_mb / temp_c (mean and max)
+    """
+
+    def __init__(self, interval_s=0.5):
+        self.interval = float(interval_s)
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._process = psutil.Process() if psutil is not None else None
+
+    def _sample(self):
+        s = {}
+        if psutil is not None:
+            s['cpu_percent'] = psutil.cpu_percent(None)
+            s['ram_percent'] = psutil.virtual_memory().percent
+            s['rss_mb'] = self._process.memory_info().rss / 1e6
+        temps = read_temperatures()
+        if temps:
+            s['temp_c'] = max(temps.values())
+        return s
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append(self._sample())
+
+    def __enter__(self):
+        if psutil is not None:
+            psutil.cpu_percent(None)   # First call only starts the measurement interval
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+
+    def summary(self):
+        out = {}
+        for key in ('cpu_percent', 'ram_percent', 'rss_mb', 'temp_c'):
+            values = [s[key] for s in self.samples if key in s]
+            if values:
+                out[key] = round(float(np.mean(values)), 1)
+                out[key + '_max'] = round(float(np.max(values)), 1)
+        return out
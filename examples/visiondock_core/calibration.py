@@ -0,0 +1,246 @@
+"""
+INT8 Calibration Sets From Recordings
+Builds an Ultralytics-style calibration dataset from our own footage instead
+of coco128:
+
+    recordings dir -> frame plan (spread evenly over all footage, seeded)
+                   -> decoder threads (one video per task, sparse seek / grab)
+                   -> bounded queue -> dedupe static scenes -> resize -> JPEG
+                   -> images/calib + images/val + data.yaml + manifest.json
+
+The queue bounds memory no matter how many frames are sampled. Frames are
+split into a calibration part and a held-out validation part for the accuracy
+gate. A set is identified by its inputs (recordings' size/mtime, frame
+counts, seed, imgsz): the same inputs reuse the set on disk, and the export
+cache keys the INT8 engine and its TensorRT calibration cache by it.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import random
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .accuracy import IMAGE_EXTENSIONS
+from .offline import probe_video
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.ts')
+
+
+def default_calibration_dir():
+    return os.path.join(os.path.expanduser("~"), ".visiondock", "calibration")
+
+
+def find_recordings(source):
+    """Videos and images under `source` (a directory or a single file), sorted"""
+    if os.path.isfile(source):
+        return [source]
+    found = []
+    for root, _, files in os.walk(source):
+        found.extend(os.path.join(root, f) for f in files
+                     if f.lower().endswith(VIDEO_EXTENSIONS + IMAGE_EXTENSIONS))
+    return sorted(found)
+
+
+def plan_samples(recordings, n_frames, seed=0):
+    """
+    {path: sorted frame indices} spread evenly over the concatenated footage
+    (by frame count, with seeded jitter), so long recordings get more frames.
+    Still images count as one frame each.
+    """
+    lengths = []
+    for path in recordings:
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            lengths.append(1)
+        else:
+            info = probe_video(path)
+            lengths.append(info['frames'] if info and info['frames'] > 0 else 0)
+    total = sum(lengths)
+    if total == 0:
+        return {}
+    n_frames = min(int(n_frames), total)
+    rng = random.Random(seed)
+    step = total / n_frames
+    positions = sorted(min(total - 1, int(i * step + rng.random() * step)) for i in range(n_frames))
+    plan, offset, k = {}, 0, 0
+    for path, length in zip(recordings, lengths):
+        while k < len(positions) and positions[k] < offset + length:
+            plan.setdefault(path, []).append(positions[k] - offset)
+            k += 1
+        offset += length
+    return plan
+
+
+def _decode(path, indices, out, stop, seek_gap=150):
+    """Put (path, index, frame) for the planned frames of one recording on `out`"""
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        frame = cv2.imread(path)
+        if frame is not None:
+            out.put((path, 0, frame))
+        return
+    cap = cv2.VideoCapture(path)
+    pos = 0
+    try:
+        for index in indices:
+            if stop.is_set():
+                return
+            if index - pos > seek_gap:   # Sparse samples: seek instead of decoding everything between
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                pos = index
+            while pos < index and cap.grab():
+                pos += 1
+            ok, frame = cap.read()
+            if not ok:
+                return
+            pos += 1
+            out.put((path, index, frame))
+    finally:
+        cap.release()
+
+
+def _thumb(frame):
+    return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (32, 18), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def calibration_id(recordings, n_calib, n_val, seed, imgsz):
+    h = hashlib.sha256()
+    for path in recordings:
+        st = os.stat(path)
+        h.update(f"{os.path.abspath(path)}:{st.st_size}:{int(st.st_mtime)}\n".encode())
+    h.update(f"{n_calib}:{n_val}:{seed}:{imgsz}".encode())
+    return h.hexdigest()[:16]
+
+
+def build_calibration_set(source, n_calib=500, n_val=200, imgsz=640, seed=0, workers=2, queue_size=32,
+                          min_change=2.0, names=None, root=None, verbose=True):
+    """
+    Sample recordings into a calibration set (reused when it already exists).
+    min_change: mean absolute difference (0-255) of 32x18 thumbnails below
+    which a frame repeats the last kept frame of its recording and is skipped.
+    Returns the manifest dict ('yaml', 'calib_dir', 'val_dir', counts, ...).
+    """
+    recordings = find_recordings(source)
+    if not recordings:
+        raise FileNotFoundError(f"No recordings (videos or images) in {source}")
+    set_id = calibration_id(recordings, n_calib, n_val, seed, imgsz)
+    out_dir = os.path.join(root or default_calibration_dir(), set_id)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if verbose:
+            print(f"[calibration] Reusing set {set_id}: {manifest['calib_frames']} calibration / "
+                  f"{manifest['val_frames']} validation frames")
+        return manifest
+
+    # Oversample so deduplicated static scenes still leave enough frames
+    plan = plan_samples(recordings, int((n_calib + n_val) * 1.5), seed)
+    tmp = out_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    calib_dir, val_dir = os.path.join(tmp, "images", "calib"), os.path.join(tmp, "images", "val")
+    os.makedirs(calib_dir)
+    os.makedirs(val_dir)
+    if verbose:
+        print(f"[calibration] Sampling {sum(len(v) for v in plan.values())} frames from {len(plan)} recordings "
+              f"into {out_dir}")
+
+    frames = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = [pool.submit(_decode, path, indices, frames, stop) for path, indices in plan.items()]
+
+    def finish():
+        for f in futures:
+            try:
+                f.result()
+            except Exception as e:
+                print(f"[calibration] Decoder failed: {e}")
+        frames.put(None)
+
+    done = threading.Thread(target=finish, daemon=True)
+    done.start()
+
+    rng = random.Random(seed)
+    last_thumb, kept, skipped = {}, {'calib': 0, 'val': 0}, 0
+    val_share = n_val / float(n_calib + n_val) if n_calib + n_val else 0.0
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            path, index, frame = item
+            thumb = _thumb(frame)
+            prev = last_thumb.get(path)
+            if prev is not None and np.abs(thumb - prev).mean() < min_change:
+                skipped += 1
+                continue
+            last_thumb[path] = thumb
+            split = 'val' if rng.random() < val_share else 'calib'
+            if kept[split] >= (n_val if split == 'val' else n_calib):
+                split = 'calib' if split == 'val' else 'val'
+                if kept[split] >= (n_val if split == 'val' else n_calib):
+                    stop.set()
+                    continue
+            scale = imgsz / float(max(frame.shape[:2]))
+            if scale < 1.0:   # Store at inference scale: smaller files, same letterboxed input
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            stem = os.path.splitext(os.path.relpath(path, source))[0].replace(os.sep, '_') \
+                if os.path.isdir(source) else os.path.splitext(os.path.basename(path))[0]
+            cv2.imwrite(os.path.join(calib_dir if split == 'calib' else val_dir, f"{stem}_{index:07d}.jpg"),
+                        frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            kept[split] += 1
+    finally:
+        stop.set()
+        while done.is_alive():   # Unblock decoders waiting on a full queue
+            try:
+                frames.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        pool.shutdown(wait=True)
+
+    yaml_path = os.path.join(out_dir, "data.yaml")
+    names = names or {0: 'object'}
+    with open(os.path.join(tmp, "data.yaml"), 'w') as f:
+        f.write(f"path: {out_dir}\ntrain: images/calib\nval: images/calib\ntest: images/val\nnames:\n")
+        for i in sorted(names):
+            f.write(f"  {i}: {names[i]}\n")
+    manifest = {
+        'id': set_id,
+        'source': os.path.abspath(source),
+        'recordings': len(recordings),
+        'calib_frames': kept['calib'],
+        'val_frames': kept['val'],
+        'duplicates_skipped': skipped,
+        'imgsz': imgsz,
+        'seed': seed,
+        'yaml': yaml_path,
+        'calib_dir': os.path.join(out_dir, "images", "calib"),
+        'val_dir': os.path.join(out_dir, "images", "val"),
+    }
+    with open(os.path.join(tmp, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    if verbose:
+        print(f"[calibration] Set {set_id}: {kept['calib']} calibration / {kept['val']} validation frames "
+              f"({skipped} near-duplicates skipped)")
+    return manifest
+
+
+def accuracy_gate(report, candidate, max_map_drop=0.02, max_recall_drop=0.05):
+    """(passed, reasons) for `candidate` in a compare_backends() report"""
+    d = report['deltas'][candidate]
+    reasons = []
+    if d['map50'] < -max_map_drop:
+        reasons.append(f"mAP50 {d['map50']:+.3f} (limit -{max_map_drop:.3f})")
+    if d['map'] < -max_map_drop:
+        reasons.append(f"mAP50-95 {d['map']:+.3f} (limit -{max_map_drop:.3f})")
+    if d['recall'] < -max_recall_drop:
+        reasons.append(f"recall {d['recall']:+.3f} (limit -{max_recall_drop:.3f})")
+    return not reasons, reasons
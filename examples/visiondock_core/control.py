@@ -0,0 +1,111 @@
+"""
+Runtime Control Channel
+A local UNIX socket that accepts one-line commands (e.g. "add 2",
+"remove 1", "list") and hands them to the processing loop, which applies
+them between batches and sends back a one-line reply.
+
+Client usage (from the examples/ directory):
+    python3 -m visiondock_core.control /tmp/visiondock_cameras.sock add 2
+"""
+
+import os
+import queue
+import socket
+import sys
+import threading
+
+
+class ControlCommand:
+    """A parsed command waiting for the processing loop to execute it"""
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.reply = None
+        self._done = threading.Event()
+
+    def respond(self, text):
+        self.reply = text
+        self._done.set()
+
+    def wait(self, timeout):
+        return self.reply if self._done.wait(timeout) else "error: timed out waiting for the processing loop"
+
+
+class ControlServer(threading.Thread):
+    """UNIX socket server feeding ControlCommands into a queue"""
+
+    def __init__(self, path, reply_timeout=10.0):
+        super().__init__(name="control-server", daemon=True)
+        self.path = path
+        self.reply_timeout = reply_timeout
+        self.commands = queue.Queue()
+        self._sock = None
+        self._running = False
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(4)
+        self._sock.settimeout(0.5)
+        self._running = True
+        super().start()
+        return self
+
+    def run(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with conn:
+                conn.settimeout(self.reply_timeout)
+                try:
+                    line = conn.makefile('r').readline().strip()
+                except OSError:
+                    continue
+                if not line:
+                    continue
+                parts = line.split()
+                cmd = ControlCommand(parts[0].lower(), parts[1:])
+                self.commands.put(cmd)
+                try:
+                    conn.sendall((cmd.wait(self.reply_timeout) + "\n").encode())
+                except OSError:
+                    pass
+
+    def pending(self):
+        """Drain queued commands (call from the processing loop)"""
+        out = []
+        while True:
+            try:
+                out.append(self.commands.get_nowait())
+            except queue.Empty:
+                return out
+
+    def stop(self):
+        self._running = False
+        if self._sock is not None:
+            self._sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def send_command(path, line, timeout=15.0):
+    """Send one command line and return the server's reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((line.strip() + "\n").encode())
+        return sock.makefile('r').readline().strip()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python3 -m visiondock_core.control <socket> <command> [args...]")
+        sys.exit(1)
+    print(send_command(sys.argv[1], " ".join(sys.argv[2:])))
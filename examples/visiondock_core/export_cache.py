@@ -0,0 +1,397 @@
+"""
+Content-Addressed Export Cache
+TensorRT engines are only valid for the precision, input shape, batch size
+and TensorRT/JetPack build they were made with, yet a file called
+yolo11n.engine says nothing about any of that. Exports are stored under a
+key derived from all of it:
+
+    sha256(weights) + format + precision + imgsz + batch (+ dynamic, calibration data)
+    + runtime (L4T release, TensorRT, GPU compute capability, Ultralytics)
+
+~/.visiondock/exports/<key>/ holds the artifact (model.engine / model.onnx,
+plus the intermediate ONNX of an engine export) and meta.json. A changed
+weight file or a JetPack upgrade simply misses the cache and exports once
+more; nothing stale is ever loaded. INT8 exports also keep TensorRT's
+calibration cache (under calibration/), so the same weights and calibration
+set are calibrated once. Override the location with VISIONDOCK_EXPORT_CACHE.
+
+    cache = ExportCache()
+    engine = cache.export('yolo11n.pt', 'engine', 'fp16', imgsz=640)   # exports once
+    engine = cache.lookup('yolo11n.pt', 'engine', 'fp16', imgsz=640)   # instant, or None
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process export lock
+    fcntl = None
+
+from .gst import is_jetson
+
+FORMATS = {'engine': '.engine', 'onnx': '.onnx'}
+PRECISIONS = ('fp32', 'fp16', 'int8')
+
+
+def default_cache_dir():
+    return os.environ.get('VISIONDOCK_EXPORT_CACHE') or \
+        os.path.join(os.path.expanduser("~"), ".visiondock", "exports")
+
+
+def _imgsz(imgsz):
+    return [int(imgsz), int(imgsz)] if isinstance(imgsz, (int, float)) else [int(v) for v in imgsz]
+
+
+def l4t_release():
+    """Full L4T release string (e.g. 'R36.3.0'), None off Jetson"""
+    try:
+        with open("/etc/nv_tegra_release") as f:
+            line = f.readline()
+    except OSError:
+        return None
+    match = re.search(r"R(\d+).*?REVISION:\s*([\d.]+)", line)
+    if match:
+        return f"R{match.group(1)}.{match.group(2)}"
+    match = re.search(r"R(\d+)", line)
+    return f"R{match.group(1)}" if match else None
+
+
+def runtime_fingerprint(fmt='engine'):
+    """What an artifact of this format depends on besides its inputs"""
+    info = {}
+    try:
+        import ultralytics
+        info['ultralytics'] = ultralytics.__version__
+    except ImportError:
+        pass
+    if fmt != 'engine':
+        return info   # ONNX is portable: only the exporter version matters
+    info['l4t'] = l4t_release() if is_jetson() else None
+    try:
+        import tensorrt
+        info['tensorrt'] = tensorrt.__version__
+    except ImportError:
+        info['tensorrt'] = None
+    try:
+        import torch
+        if torch.cuda.is_available():
+            info['gpu'] = torch.cuda.get_device_name(0)
+            info['sm'] = "%d.%d" % torch.cuda.get_device_capability(0)
+    except ImportError:
+        pass
+    return info
+
+
+class ExportCache:
+    """Export artifacts keyed by everything that makes them valid"""
+
+    def __init__(self, root=None):
+        self.root = root or default_cache_dir()
+        self._hashes = None
+
+    # --- weights hashing ------------------------------------------------
+
+    def _hash_index_path(self):
+        return os.path.join(self.root, "weights_sha256.json")
+
+    def weights_hash(self, path):
+        """sha256 of a weights file, memoised by (path, size, mtime) so large files are hashed once"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = f"{st.st_size}:{int(st.st_mtime)}"
+        if self._hashes is None:
+            try:
+                with open(self._hash_index_path()) as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                self._hashes = {}
+        entry = self._hashes.get(path)
+        if entry and entry.get('stamp') == stamp:
+            return entry['sha256']
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._hashes[path] = {'stamp': stamp, 'sha256': digest}
+        try:
+            self._write_json(self._hash_index_path(), self._hashes)
+        except OSError:
+            pass   # Read-only cache: hash again next time
+        return digest
+
+    # --- keys -------------------------------------------------------------
+
+    def describe(self, weights, fmt='engine', precision='fp16', imgsz=640, batch=1, dynamic=False, data=None):
+        """Key material as a dict (stored in meta.json)"""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported export format {fmt}; use one of {sorted(FORMATS)}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision {precision}; use one of {PRECISIONS}")
+        desc = {
+            'weights_sha256': self.weights_hash(weights),
+            'format': fmt,
+            'precision': precision,
+            'imgsz': _imgsz(imgsz),
+            'batch': int(batch),
+            'dynamic': bool(dynamic),
+            'runtime': runtime_fingerprint(fmt),
+        }
+        if precision == 'int8' and data:
+            # Calibration set identity: a different set gives a different engine
+            desc['calibration'] = self.weights_hash(data) if os.path.isfile(data) else str(data)
+        return desc
+
+    @staticmethod
+    def key(desc):
+        return hashlib.sha256(json.dumps(desc, sort_keys=True).encode()).hexdigest()[:20]
+
+    def entry_dir(self, desc):
+        return os.path.join(self.root, self.key(desc))
+
+    # --- lookup / store ---------------------------------------------------
+
+    def lookup(self, weights, fmt='engine', precision='fp16', imgsz=640, batch=1, **kwargs):
+        """Path of the cached artifact for these inputs on this runtime, or None"""
+        if not os.path.isfile(weights):
+            return None
+        desc = self.describe(weights, fmt, precision, imgsz, batch, **kwargs)
+        return self._artifact(self.entry_dir(desc), fmt)
+
+    def _artifact(self, entry, fmt):
+        path = os.path.join(entry, "model" + FORMATS[fmt])
+        if os.path.isfile(path) and os.path.isfile(os.path.join(entry, "meta.json")):
+            return path
+        return None
+
+    def export(self, weights, fmt='engine', precision='fp16', imgsz=640, batch=1, dynamic=False, data=None,
+               force=False, verbose=True, **export_kwargs):
+        """
+        Cached artifact for these inputs, exporting (once, under a cross-process
+        lock) on a miss. Extra keyword arguments go to YOLO.export().
+        """
+        desc = self.describe(weights, fmt, precision, imgsz, batch, dynamic, data)
+        entry = self.entry_dir(desc)
+        os.makedirs(self.root, exist_ok=True)
+        with _Lock(entry + ".lock"):
+            path = self._artifact(entry, fmt)
+            if path is not None and not force:
+                if verbose:
+                    print(f"[export-cache] Hit {self.key(desc)}: {path}")
+                return path
+            if verbose:
+                print(f"[export-cache] Miss {self.key(desc)}: exporting {weights} "
+                      f"({fmt}, {precision}, imgsz {desc['imgsz']}, batch {batch})")
+            from ultralytics import YOLO
+            t0 = time.time()
+            kwargs = dict(format=fmt, imgsz=desc['imgsz'], batch=int(batch), dynamic=bool(dynamic),
+                          half=precision == 'fp16', int8=precision == 'int8')
+            if fmt == 'engine':
+                kwargs['device'] = 0
+            if data:
+                kwargs['data'] = data
+            kwargs.update(export_kwargs)
+            # Export from a scratch copy: Ultralytics writes its outputs next to
+            # the weights and would overwrite the user's own <weights>.engine/.onnx
+            work = entry + ".work"
+            shutil.rmtree(work, ignore_errors=True)
+            os.makedirs(work)
+            try:
+                scratch = os.path.join(work, os.path.basename(weights))
+                shutil.copyfile(weights, scratch)
+                calib = self._stage_calibration(desc, scratch) if precision == 'int8' else None
+                produced = YOLO(scratch).export(**kwargs)
+                if calib:
+                    self._keep_calibration(calib, scratch)
+                return self._store(entry, fmt, produced, desc, weights, time.time() - t0)
+            finally:
+                shutil.rmtree(work, ignore_errors=True)
+
+    # --- INT8 calibration cache -------------------------------------------
+
+    def calibration_cache_path(self, desc):
+        """TensorRT calibration cache for these weights, calibration set, input size and TensorRT"""
+        material = {k: desc.get(k) for k in ('weights_sha256', 'calibration', 'imgsz')}
+        material['tensorrt'] = desc['runtime'].get('tensorrt')
+        return os.path.join(self.root, "calibration", self.key(material) + ".cache")
+
+    def _stage_calibration(self, desc, weights):
+        """
+        Ultralytics' INT8 calibrator reads and writes '<weights>.cache' next to
+        the (scratch copy of the) weights. Put the matching cached table there
+        (skipping calibration) or clear a leftover one from different calibration data.
+        """
+        stored = self.calibration_cache_path(desc)
+        staged = os.path.splitext(weights)[0] + ".cache"
+        if os.path.isfile(staged):
+            os.remove(staged)
+        if os.path.isfile(stored):
+            shutil.copyfile(stored, staged)
+            print(f"[export-cache] Reusing INT8 calibration cache {stored}")
+        return stored
+
+    def _keep_calibration(self, stored, weights):
+        staged = os.path.splitext(weights)[0] + ".cache"
+        if os.path.isfile(staged):
+            os.makedirs(os.path.dirname(stored), exist_ok=True)
+            shutil.move(staged, stored)
+
+    def _store(self, entry, fmt, produced, desc, weights, seconds):
+        tmp = entry + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        artifacts = {fmt: "model" + FORMATS[fmt]}
+        shutil.move(str(produced), os.path.join(tmp, artifacts[fmt]))
+        onnx = os.path.splitext(str(produced))[0] + ".onnx"
+        if fmt == 'engine' and os.path.isfile(onnx):
+            shutil.move(onnx, os.path.join(tmp, "model.onnx"))   # Intermediate ONNX of the engine build
+            artifacts['onnx'] = "model.onnx"
+        meta = dict(desc, key=self.key(desc), weights=os.path.abspath(weights), artifacts=artifacts,
+                    created=round(time.time()), export_seconds=round(seconds, 1))
+        if desc['precision'] == 'int8':
+            meta['calibration_cache'] = self.calibration_cache_path(desc)
+        self._write_json(os.path.join(tmp, "meta.json"), meta)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        return os.path.join(entry, artifacts[fmt])
+
+    # --- maintenance ------------------------------------------------------
+
+    def entries(self):
+        """meta.json of every complete entry, newest first"""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for name in os.listdir(self.root):
+            meta_path = os.path.join(self.root, name, "meta.json")
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            meta['path'] = os.path.join(self.root, name)
+            out.append(meta)
+        return sorted(out, key=lambda m: -m.get('created', 0))
+
+    def meta(self, artifact):
+        """meta.json of the entry holding `artifact` (None outside the cache)"""
+        try:
+            with open(os.path.join(os.path.dirname(artifact), "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update_meta(self, artifact, **fields):
+        meta = self.meta(artifact)
+        if meta is not None:
+            meta.update(fields)
+            self._write_json(os.path.join(os.path.dirname(artifact), "meta.json"), meta)
+
+    def remove(self, key):
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    @staticmethod
+    def _write_json(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+
+class _Lock:
+    """Exclusive file lock so two processes never export the same entry at once"""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._f = open(self.path, 'w')
+            fcntl.flock(self._f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._f is not None:
+            fcntl.flock(self._f, fcntl.LOCK_UN)
+            self._f.close()
+            self._f = None
+
+
+def engine_metadata(path):
+    """Ultralytics metadata (imgsz, batch, ...) stored in front of an exported engine, or {}"""
+    try:
+        with open(path, 'rb') as f:
+            size = int.from_bytes(f.read(4), byteorder='little')
+            return json.loads(f.read(size).decode('utf-8'))
+    except (OSError, ValueError, UnicodeDecodeError):
+        return {}
+
+
+def batch_mismatch(path, batch):
+    """
+    Why the engine at `path` cannot run batches of up to `batch` frames, or None.
+    A static engine only runs its built batch, and offline runs end every
+    segment with a shorter batch, so batch > 1 needs a dynamic engine.
+    """
+    if not path.endswith('.engine') or not os.path.isfile(path):
+        return None
+    meta = engine_metadata(path)
+    built = int(meta.get('batch', 1))
+    if meta.get('args', {}).get('dynamic'):
+        if batch <= built:
+            return None
+        return f"{path} is a dynamic engine for up to {built} frames per batch, not {batch}"
+    if batch == built == 1:
+        return None
+    return (f"{path} is a static batch-{built} engine; batches of up to {batch} frames need a dynamic engine "
+            f"(pass the .pt weights to export one) or --batch 1 with a batch-1 engine")
+
+
+def resolve_model(path, imgsz=640, batch=1, precision='fp16', export_missing=False, prefer_engine=False,
+                  dynamic=False, cache=None, verbose=True):
+    """
+    Model path to load, resolved through the export cache:
+
+        - 'name.engine' / 'name.onnx' next to 'name.pt': the cached export of
+          'name.pt' for these settings (exported once if export_missing). A file
+          already at that path says nothing about the weights, precision or
+          runtime it was built for, so it is only loaded (with a warning) when
+          there is no cached export
+        - an export with no weights next to it, a cache entry or any other
+          existing file is used as given
+        - prefer_engine: 'name.pt' is swapped for its cached engine when one exists
+
+    dynamic: export / look up an engine that takes any batch up to `batch`.
+    """
+    base, ext = os.path.splitext(path)
+    fmt = ext.lstrip('.')
+    cache = cache or ExportCache()
+    weights = base + '.pt'
+    if fmt in FORMATS and os.path.isfile(weights) and cache.meta(path) is None:
+        cached = cache.lookup(weights, fmt, precision, imgsz, batch, dynamic=dynamic)
+        if cached is None and export_missing:
+            cached = cache.export(weights, fmt, precision, imgsz, batch, dynamic=dynamic, verbose=verbose)
+        if cached is not None:
+            if verbose:
+                unused = " (unverified file at that path not used)" if os.path.exists(path) else ""
+                print(f"[export-cache] {path} -> {cached}{unused}")
+            return cached
+        if os.path.exists(path):
+            print(f"[export-cache] Warning: {path} is not in the export cache and may have been built from other "
+                  f"weights, precision, input size, batch or JetPack/TensorRT; loading it as given. "
+                  f"Delete it to use a verified export of {weights}")
+        return path
+    if ext == '.pt' and prefer_engine and os.path.isfile(path):
+        cached = cache.lookup(path, 'engine', precision, imgsz, batch)
+        if cached is not None:
+            if verbose:
+                print(f"[export-cache] {path} -> cached engine {cached}")
+            return cached
+    return path
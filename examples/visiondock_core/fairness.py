@@ -0,0 +1,126 @@
+"""
+Weighted-Fair Camera Selection
+Decides which cameras' frames go into each inference batch when the GPU can
+only take `max_batch` frames per round.
+
+    1. Cameras below their minimum-FPS guarantee are served first (most overdue first)
+    2. Remaining batch slots follow weighted fair queueing: every camera has a
+       virtual time that advances by 1/weight each time it is served, and the
+       smallest virtual time wins. Low-weight cameras therefore degrade first.
+"""
+
+import time
+from collections import deque
+
+
+class FairSharePolicy:
+    """Per-camera weights and minimum-FPS guarantees for batch selection"""
+
+    def __init__(self, weights=None, min_fps=None, window_s=5.0):
+        self.weights = dict(weights or {})
+        self.min_fps = dict(min_fps or {})
+        self.window = float(window_s)
+        self._vtime = {}
+        self._prev_ready = set()
+        self._last_round = None
+        self._round = 0.0           # EMA of time between batches
+        self._last_served = {}
+        self._served = {}
+        self.skipped = {}
+
+    def weight(self, cam_id):
+        return max(1e-3, float(self.weights.get(cam_id, 1.0)))
+
+    def _ensure(self, cam_id, now):
+        if cam_id not in self._vtime:
+            self._vtime[cam_id] = 0.0
+            self._last_served[cam_id] = now
+            self._served[cam_id] = deque()
+            self.skipped[cam_id] = 0
+
+    def forget(self, cam_id):
+        """Drop state for a removed camera"""
+        for table in (self._vtime, self._last_served, self._served, self.skipped):
+            table.pop(cam_id, None)
+        self._prev_ready.discard(cam_id)
+
+    def select(self, ready, max_batch, now=None):
+        """Pick up to max_batch camera IDs from `ready`"""
+        now = time.monotonic() if now is None else now
+        for cam_id in ready:
+            self._ensure(cam_id, now)
+        if self._last_round is not None:
+            self._round = 0.9 * self._round + 0.1 * (now - self._last_round)
+        self._last_round = now
+        # Cameras (re)joining the contention start at the lowest virtual time of
+        # those already contending, so they cannot cash in credit from idle time
+        active = [c for c in ready if c in self._prev_ready]
+        if active:
+            floor = min(self._vtime[c] for c in active)
+            for cam_id in ready:
+                if cam_id not in self._prev_ready:
+                    self._vtime[cam_id] = max(self._vtime[cam_id], floor)
+        self._prev_ready = set(ready)
+        if max_batch is None or len(ready) <= max_batch:
+            return list(ready)
+
+        def overdue(cam_id):
+            target = self.min_fps.get(cam_id)
+            if not target:
+                return 0.0
+            # >= 1.0: skipping this round would push the camera below its guarantee
+            return (now - self._last_served[cam_id] + self._round) * target
+
+        guaranteed = sorted((c for c in ready if overdue(c) >= 1.0),
+                            key=lambda c: (-overdue(c), -self.weight(c)))
+        chosen = guaranteed[:max_batch]
+        rest = sorted((c for c in ready if c not in chosen),
+                      key=lambda c: (self._vtime[c] + 1.0 / self.weight(c), -self.weight(c)))
+        chosen += rest[:max_batch - len(chosen)]
+
+        for cam_id in ready:
+            if cam_id not in chosen:
+                self.skipped[cam_id] += 1
+        return chosen
+
+    def served(self, cam_ids, now=None):
+        """Advance virtual time and rate windows for the cameras in a dispatched batch"""
+        now = time.monotonic() if now is None else now
+        for cam_id in cam_ids:
+            self._ensure(cam_id, now)
+            self._vtime[cam_id] += 1.0 / self.weight(cam_id)
+            self._last_served[cam_id] = now
+            window = self._served[cam_id]
+            window.append(now)
+            while window and now - window[0] > self.window:
+                window.popleft()
+
+    def achieved_fps(self, cam_id, now=None):
+        now = time.monotonic() if now is None else now
+        window = self._served.get(cam_id)
+        if not window:
+            return 0.0
+        while window and now - window[0] > self.window:
+            window.popleft()
+        return len(window) / self.window
+
+    def report(self, camera_ids, now=None):
+        """Achieved rate per camera against its weight and minimum-FPS target"""
+        now = time.monotonic() if now is None else now
+        lines = [f"{'Cam':>5} {'Weight':>7} {'Min FPS':>8} {'Achieved':>9} {'Skipped':>8} {'Status':>8}"]
+        for cam_id in camera_ids:
+            target = self.min_fps.get(cam_id)
+            achieved = self.achieved_fps(cam_id, now)
+            status = "-" if not target else ("OK" if achieved >= target * 0.95 else "BELOW")
+            lines.append(f"{cam_id:>5} {self.weight(cam_id):>7.1f} {target or '-':>8} {achieved:>9.1f} "
+                         f"{self.skipped.get(cam_id, 0):>8} {status:>8}")
+        return "\n".join(lines)
+
+
+def parse_camera_values(items, cast=float):
+    """Parse ['0=3', '1=1.5'] (or '0:3') into {0: 3.0, 1: 1.5}"""
+    values = {}
+    for item in items or []:
+        key, _, value = item.replace(':', '=').partition('=')
+        values[int(key)] = cast(value)
+    return values
@@ -0,0 +1,87 @@
+"""
+Latest-Frame Slot
+Single-writer / single-reader "mailbox" that always holds the newest frame.
+
+The writer never blocks: publish() swaps one tuple reference (atomic under
+the GIL), so there is no empty()/get()/put() race and no stale frame can be
+left behind. Sequence numbers let the reader see exactly how many frames it
+skipped, and every frame carries its capture timestamp.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+
+SlotFrame = namedtuple('SlotFrame', ['seq', 'timestamp', 'frame'])
+
+
+class FrameSlot:
+    """
+    Latest-value slot with sequence numbers.
+
+    publish() is for the (single) capture thread; take()/wait() for the
+    (single) consumer. Timestamps are time.monotonic() seconds unless the
+    writer supplies its own (e.g. a buffer PTS mapped to the same clock).
+    """
+
+    # True when frames are views into buffers recycled after the next take()
+    borrowed = False
+
+    def __init__(self):
+        self._item = None
+        self._seq = 0
+        self._event = threading.Event()
+        # Reader-side bookkeeping (only touched by the consumer)
+        self.read_seq = 0
+        self.consumed = 0
+        self.dropped = 0
+
+    @property
+    def seq(self):
+        """Sequence number of the newest published frame"""
+        return self._seq
+
+    def publish(self, frame, timestamp=None):
+        """Overwrite the slot with a new frame (never blocks)"""
+        self._seq += 1
+        self._item = SlotFrame(self._seq, time.monotonic() if timestamp is None else timestamp, frame)
+        self._event.set()
+
+    def peek(self):
+        """Newest frame without consuming it (may be one already taken)"""
+        return self._item
+
+    def has_new(self):
+        item = self._item
+        return item is not None and item.seq != self.read_seq
+
+    def take(self):
+        """Return the newest unseen SlotFrame, or None if nothing new arrived"""
+        item = self._item
+        if item is None or item.seq == self.read_seq:
+            return None
+        self.dropped += item.seq - self.read_seq - 1
+        self.read_seq = item.seq
+        self.consumed += 1
+        return item
+
+    def wait(self, timeout=None):
+        """Block until a frame newer than the last taken one exists, then take it"""
+        item = self.take()
+        if item is not None:
+            return item
+        self._event.clear()
+        # Re-check after clearing so a publish between take() and clear() is not lost
+        item = self.take()
+        if item is not None:
+            return item
+        self._event.wait(timeout)
+        return self.take()
+
+    def stats(self):
+        return {
+            'published': self._seq,
+            'consumed': self.consumed,
+            'dropped': self.dropped,
+        }
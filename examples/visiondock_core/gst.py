@@ -0,0 +1,313 @@
+"""
+GStreamer Capture Pipelines
+One builder for every capture pipeline in VisionDock. A CaptureSpec describes
+what is wanted (source kind, capture caps, output size, pixel format, appsink
+behaviour); build_pipeline() renders it for a given variant (hardware path,
+MJPEG decode, CPU fallback, ...).
+
+Which variant actually opens differs per host and L4T release, so the first
+successful variant is probed once and cached in ~/.visiondock/gst_pipelines.json
+(override with VISIONDOCK_GST_CACHE). Later starts open the cached variant
+directly and only re-probe if it stops working.
+"""
+
+import json
+import os
+import platform
+import re
+import time
+from collections import namedtuple
+
+import cv2
+
+
+# source: 'csi' (nvarguscamerasrc), 'v4l2' (USB / UVC), 'test' (videotestsrc),
+# 'rtsp' (rtspsrc) or 'uri' (uridecodebin; HTTP etc., see netstream.py)
+# source_id: sensor id, /dev/video index or device path, test pattern, or URL
+# capture_width/height: None for network sources (the stream decides)
+# width/height: output size (None = capture size); format: 'BGR', 'BGRx' or 'NV12'
+# (non-BGR formats skip videoconvert, see preprocess.py); sink: 'latest' or 'queue'
+CaptureSpec = namedtuple('CaptureSpec', [
+    'source', 'source_id', 'capture_width', 'capture_height', 'framerate',
+    'width', 'height', 'flip', 'format', 'sink', 'max_buffers',
+], defaults=(0, 1280, 720, 30, None, None, 0, 'BGR', 'latest', 1))
+
+# nvvidconv flip-method -> videoflip method for the CPU variants
+_VIDEOFLIP = {0: 0, 1: 3, 2: 2, 3: 1, 4: 4, 6: 5}
+
+
+def get_l4t_version():
+    """Read L4T major version from /etc/nv_tegra_release"""
+    try:
+        with open("/etc/nv_tegra_release", "r") as f:
+            line = f.readline()
+        match = re.search(r"R(\d+)", line)
+        return int(match.group(1)) if match else 36
+    except Exception:
+        return 36  # Default: assume modern JetPack
+
+
+def get_gst_compatibility():
+    """Detect GStreamer compatibility mode from ENV or system"""
+    compat = os.environ.get('GST_VERSION_COMPAT', 'modern')
+    l4t_version = get_l4t_version()
+
+    if l4t_version < 35:
+        return 'legacy'
+    return compat
+
+
+def camera_spec(source_type, camera_id, width=1280, height=720, framerate=30, **kwargs):
+    """CaptureSpec for the examples' --source-type csi|usb camera options"""
+    source = 'v4l2' if source_type == 'usb' else source_type
+    return CaptureSpec(source, camera_id, width, height, framerate, **kwargs)
+
+
+def is_jetson():
+    return os.path.exists("/etc/nv_tegra_release")
+
+
+def output_size(spec):
+    return (spec.width or spec.capture_width, spec.height or spec.capture_height)
+
+
+def _appsink(spec):
+    if spec.sink == 'queue':
+        return f"appsink drop=false max-buffers={max(1, spec.max_buffers)} sync=false"
+    # Latest frame only: never let the sensor queue back up behind a slow consumer
+    return "appsink drop=true max-buffers=1 sync=false"
+
+
+def _size_caps(width, height):
+    return f"width=(int){width}, height=(int){height}, " if width and height else ""
+
+
+def _nv_tail(spec):
+    """nvvidconv (scale / flip / convert on the VIC) down to the requested format"""
+    width, height = output_size(spec)
+    fmt = 'BGRx' if spec.format == 'BGR' else spec.format
+    tail = (f"nvvidconv flip-method={spec.flip} ! "
+            f"video/x-raw, {_size_caps(width, height)}format=(string){fmt} ! ")
+    if spec.format == 'BGR':
+        tail += "videoconvert ! video/x-raw, format=(string)BGR ! "
+    return tail + _appsink(spec)
+
+
+def _cpu_tail(spec):
+    width, height = output_size(spec)
+    tail = ""
+    if spec.flip:
+        tail += f"videoflip method={_VIDEOFLIP.get(spec.flip, 0)} ! "
+    if (width, height) != (spec.capture_width, spec.capture_height):
+        tail += "videoscale ! "
+    tail += (f"videoconvert ! "
+             f"video/x-raw, {_size_caps(width, height)}format=(string){spec.format} ! ")
+    return tail + _appsink(spec)
+
+
+def _device(spec):
+    return spec.source_id if isinstance(spec.source_id, str) else f"/dev/video{spec.source_id}"
+
+
+def variants(spec):
+    """Variants worth trying for this spec on this host, preferred first"""
+    if spec.source == 'csi':
+        return ['nvmm-nv12', 'nvmm']
+    if spec.source == 'v4l2':
+        hw = ['raw-nvvidconv', 'mjpeg-nvjpeg'] if is_jetson() else []
+        # OpenCV's own V4L2 backend can only hand out BGR
+        return hw + ['raw-cpu', 'mjpeg-cpu'] + (['opencv'] if spec.format == 'BGR' else [])
+    if spec.source == 'test':
+        return ['cpu']
+    if spec.source in ('rtsp', 'uri'):
+        # 'ffmpeg' = OpenCV's FFmpeg backend with low-delay demuxer options
+        return (['nvdec'] if is_jetson() else []) + ['cpu', 'ffmpeg']
+    raise ValueError(f"Unknown capture source kind: {spec.source}")
+
+
+def build_pipeline(spec, variant=None):
+    """
+    Render a spec as a GStreamer pipeline string.
+
+    The 'opencv' variant returns the device index for OpenCV's own V4L2 backend,
+    the 'ffmpeg' variant the URL for OpenCV's FFmpeg backend.
+    """
+    variant = variant or variants(spec)[0]
+    cw, ch, fps = spec.capture_width, spec.capture_height, spec.framerate
+    caps = f"width=(int){cw}, height=(int){ch}, framerate=(fraction){fps}/1"
+
+    if spec.source == 'csi':
+        fmt = ", format=(string)NV12" if variant == 'nvmm-nv12' else ""
+        return (f"nvarguscamerasrc sensor-id={spec.source_id} ! "
+                f"video/x-raw(memory:NVMM), {caps}{fmt} ! " + _nv_tail(spec))
+
+    if spec.source == 'v4l2':
+        if variant == 'opencv':
+            return spec.source_id if isinstance(spec.source_id, int) else int(re.sub(r'\D', '', spec.source_id) or 0)
+        src = f"v4l2src device={_device(spec)} ! "
+        if variant == 'raw-nvvidconv':
+            return src + f"video/x-raw, {caps} ! " + _nv_tail(spec)
+        if variant == 'mjpeg-nvjpeg':
+            return src + f"image/jpeg, {caps} ! nvjpegdec ! video/x-raw ! " + _nv_tail(spec)
+        if variant == 'mjpeg-cpu':
+            return src + f"image/jpeg, {caps} ! jpegdec ! " + _cpu_tail(spec)
+        return src + f"video/x-raw, {caps} ! " + _cpu_tail(spec)
+
+    if spec.source in ('rtsp', 'uri'):
+        if variant == 'ffmpeg':
+            return spec.source_id
+        if spec.source == 'rtsp':
+            # No jitter buffer latency; late packets are dropped instead of queued
+            src = (f"rtspsrc location={spec.source_id} latency=0 drop-on-latency=true protocols=tcp ! "
+                   f"decodebin ! ")
+        else:
+            src = f"uridecodebin uri={spec.source_id} ! "
+        if variant == 'nvdec':
+            return src + "queue max-size-buffers=1 leaky=downstream ! " + _nv_tail(spec)
+        return src + "queue max-size-buffers=1 leaky=downstream ! " + _cpu_tail(spec)
+
+    pattern = spec.source_id if isinstance(spec.source_id, str) else 'smpte'
+    return (f"videotestsrc is-live=true pattern={pattern} ! "
+            f"video/x-raw, {caps} ! " + _cpu_tail(spec))
+
+
+class PipelineCache:
+    """Validated variant per (host, L4T release, spec) in a small JSON file"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('VISIONDOCK_GST_CACHE') or \
+            os.path.join(os.path.expanduser("~"), ".visiondock", "gst_pipelines.json")
+        self.host = (f"{platform.node()}|L4T r{get_l4t_version() if is_jetson() else 0}|"
+                     f"{get_gst_compatibility()}|opencv {cv2.__version__}")
+        self._data = None
+
+    @staticmethod
+    def key(spec):
+        source_id = spec.source_id
+        if spec.source in ('rtsp', 'uri'):
+            from .netstream import redact
+            source_id = redact(source_id)   # Never write stream credentials to disk
+        return (f"{spec.source}:{source_id}:{spec.capture_width}x{spec.capture_height}@{spec.framerate}:"
+                f"{spec.format}")
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data.setdefault(self.host, {})
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self._data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Read-only home: probe again next start
+
+    def get(self, spec):
+        entry = self._load().get(self.key(spec))
+        return entry['variant'] if entry else None
+
+    def put(self, spec, variant):
+        self._load()[self.key(spec)] = {'variant': variant, 'verified': round(time.time())}
+        self._save()
+
+    def invalidate(self, spec):
+        if self._load().pop(self.key(spec), None) is not None:
+            self._save()
+
+
+def open_source(source, backend='opencv', raw=False, max_buffers=1, drop=True):
+    """
+    Open a pipeline string with the chosen backend: 'opencv' (cv2.VideoCapture)
+    or 'appsink' (native PyGObject appsink, see appsink.py). Device indices
+    and bare stream URLs always use OpenCV.
+    """
+    if not isinstance(source, str):
+        return cv2.VideoCapture(source)
+    if '!' not in source and '://' in source:
+        # A bare URL (the 'ffmpeg' variant of a network source)
+        from .netstream import open_ffmpeg
+        return open_ffmpeg(source)
+    if backend == 'appsink':
+        from .appsink import AppSinkCapture
+        return AppSinkCapture(source, max_buffers=max_buffers, drop=drop)
+    cap = cv2.VideoCapture(source, cv2.CAP_GSTREAMER)
+    if raw:
+        # Hand BGRx / NV12 buffers through untouched instead of converting to BGR
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+    return cap
+
+
+def _open(spec, variant, backend='opencv'):
+    source = build_pipeline(spec, variant)
+    if isinstance(source, str):
+        return open_source(source, backend, raw=spec.format != 'BGR',
+                           max_buffers=spec.max_buffers, drop=spec.sink != 'queue')
+    cap = cv2.VideoCapture(source)
+    if cap.isOpened():
+        # OpenCV's own V4L2 backend: size/rate are properties, not caps
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, spec.capture_width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, spec.capture_height)
+        cap.set(cv2.CAP_PROP_FPS, spec.framerate)
+    return cap
+
+
+def _probe(spec, cache, skip=None, backend='opencv'):
+    """Open variants in order; the first that delivers a frame is cached and returned open"""
+    for variant in variants(spec):
+        if variant == skip:
+            continue
+        cap = _open(spec, variant, backend)
+        if cap.isOpened() and cap.read()[0]:
+            cache.put(spec, variant)
+            return cap, variant
+        cap.release()
+    return None, None
+
+
+def open_capture(spec, cache=None, verbose=True, backend='opencv'):
+    """
+    Capture for a spec: the cached variant is opened directly, otherwise variants
+    are probed in order and the first one that delivers a frame is cached.
+    backend: 'opencv' (cv2.VideoCapture) or 'appsink' (AppSinkCapture).
+    The returned capture may be unopened if nothing works.
+    """
+    cache = cache or PipelineCache()
+    variant = cache.get(spec)
+    if variant is not None:
+        cap = _open(spec, variant, backend)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        cache.invalidate(spec)
+        if verbose:
+            print(f"[gst] Cached variant '{variant}' no longer opens for {cache.key(spec)}; re-probing")
+
+    cap, variant = _probe(spec, cache, skip=variant, backend=backend)
+    if cap is None:
+        if verbose:
+            print(f"[gst] No working pipeline for {cache.key(spec)}")
+        return cv2.VideoCapture()
+    if verbose:
+        print(f"[gst] {cache.key(spec)} -> '{variant}' (cached)")
+    return cap
+
+
+def resolve_source(spec, cache=None):
+    """
+    Pipeline string (or device index) of the working variant, for code that opens
+    the capture itself (e.g. a capture process). Probes once if nothing is cached.
+    """
+    cache = cache or PipelineCache()
+    variant = cache.get(spec)
+    if variant is None:
+        cap, variant = _probe(spec, cache)
+        if cap is not None:
+            cap.release()
+    return build_pipeline(spec, variant or variants(spec)[0])
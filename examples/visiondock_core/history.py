@@ -0,0 +1,260 @@
+"""
+Benchmark History
+Stores every benchmark run (raw per-call timings, host, runtime versions,
+git revision, model, backend, configuration) in a local SQLite database,
+~/.visiondock/bench_history.db, and compares runs.
+
+A comparison tests the raw timing distributions, not their means. The tests
+are a one-sided Mann-Whitney U (is the candidate slower?) and a two-sample
+Kolmogorov-Smirnov (has the shape changed, e.g. a fatter tail?). A change is
+only reported when it is statistically significant (p < alpha) and larger
+than min_effect, because with thousands of samples a 0.5% shift is
+significant but not interesting. The default baseline is the previous run of
+the same model, backend and configuration on the same host, so upgrading
+Ultralytics or JetPack and re-running the benchmark shows whether it
+regressed.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import numpy as np
+
+from .bench import git_revision, host_info
+from .export_cache import ExportCache, runtime_fingerprint
+
+
+def default_history_path():
+    return os.path.join(os.path.expanduser("~"), ".visiondock", "bench_history.db")
+
+
+def describe_model(path, cache=None):
+    """(logical model name, backend) - cached engines resolve to their source weights and precision"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.engine', '.onnx'):
+        meta = (cache or ExportCache()).meta(path)
+        fmt = 'tensorrt' if ext == '.engine' else 'onnx'
+        if meta:
+            return os.path.basename(meta.get('weights', path)), f"{fmt}-{meta['precision']}"
+        return os.path.basename(path), fmt
+    return os.path.basename(path), 'pytorch' if ext == '.pt' else ext.lstrip('.') or 'unknown'
+
+
+def _ranks(values):
+    """Ranks 1..n, ties get their average rank"""
+    order = np.argsort(values, kind='mergesort')
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[order] = np.arange(1, len(values) + 1)
+    sorted_vals = values[order]
+    _, first, counts = np.unique(sorted_vals, return_index=True, return_counts=True)
+    for start, n in zip(first[counts > 1], counts[counts > 1]):
+        ranks[order[start:start + n]] = start + (n + 1) / 2.0
+    return ranks, counts
+
+
+def mann_whitney_greater(a, b):
+    """One-sided p-value that `a` tends to be larger than `b` (normal approximation, tie-corrected)"""
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    ranks, ties = _ranks(np.concatenate([a, b]))
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    tie_term = float((ties ** 3 - ties).sum()) / (n * (n - 1)) if n > 1 else 0.0
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def ks_two_sample(a, b):
+    """(D statistic, asymptotic p-value) of the two-sample Kolmogorov-Smirnov test"""
+    a, b = np.sort(np.asarray(a, dtype=np.float64)), np.sort(np.asarray(b, dtype=np.float64))
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return 0.0, 1.0
+    grid = np.concatenate([a, b])
+    d = float(np.max(np.abs(np.searchsorted(a, grid, side='right') / n1 -
+                            np.searchsorted(b, grid, side='right') / n2)))
+    en = math.sqrt(n1 * n2 / float(n1 + n2))
+    lam = (en + 0.12 + 0.11 / en) * d
+    if lam < 1e-3:
+        return d, 1.0
+    p = 2.0 * sum((-1) ** (k - 1) * math.exp(-2.0 * k * k * lam * lam) for k in range(1, 101))
+    return d, min(1.0, max(0.0, p))
+
+
+def compare_timings(baseline, candidate, alpha=0.01, min_effect=0.03):
+    """
+    Verdict on two timing samples (ms): 'regression', 'improvement' or 'unchanged'.
+    Median shifts are tested with Mann-Whitney in each direction; a changed
+    tail (p95) counts when the KS test finds the distributions differ.
+    """
+    baseline, candidate = np.asarray(baseline, dtype=np.float64), np.asarray(candidate, dtype=np.float64)
+    b50, c50 = np.median(baseline), np.median(candidate)
+    b95, c95 = np.percentile(baseline, 95), np.percentile(candidate, 95)
+    median_change = c50 / b50 - 1.0 if b50 > 0 else 0.0
+    p95_change = c95 / b95 - 1.0 if b95 > 0 else 0.0
+    p_slower = mann_whitney_greater(candidate, baseline)
+    p_faster = mann_whitney_greater(baseline, candidate)
+    ks_d, ks_p = ks_two_sample(baseline, candidate)
+
+    reasons = []
+    if p_slower < alpha and median_change > min_effect:
+        reasons.append(f"median {median_change:+.1%} (Mann-Whitney p={p_slower:.2g})")
+    if ks_p < alpha and p95_change > min_effect:
+        reasons.append(f"p95 {p95_change:+.1%} (KS D={ks_d:.3f}, p={ks_p:.2g})")
+    if reasons:
+        verdict = 'regression'
+    elif p_faster < alpha and median_change < -min_effect:
+        verdict = 'improvement'
+        reasons.append(f"median {median_change:+.1%} (Mann-Whitney p={p_faster:.2g})")
+    else:
+        verdict = 'unchanged'
+    return {
+        'verdict': verdict, 'reasons': reasons,
+        'baseline_median_ms': float(b50), 'candidate_median_ms': float(c50),
+        'baseline_p95_ms': float(b95), 'candidate_p95_ms': float(c95),
+        'median_change': median_change, 'p95_change': p95_change,
+        'mannwhitney_p_slower': p_slower, 'mannwhitney_p_faster': p_faster,
+        'ks_d': ks_d, 'ks_p': ks_p,
+        'n_baseline': len(baseline), 'n_candidate': len(candidate),
+    }
+
+
+def config_key(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class BenchmarkHistory:
+    """SQLite store of benchmark runs with their raw timings"""
+
+    COLUMNS = "id, created, label, node, git, model, backend, config, config_key, host, runtime, summary"
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, created REAL, label TEXT, "
+                         "node TEXT, git TEXT, model TEXT, backend TEXT, config TEXT, config_key TEXT, "
+                         "host TEXT, runtime TEXT, summary TEXT, timings BLOB)")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_series ON runs (node, model, backend, config_key, created)")
+
+    @contextmanager
+    def _connect(self):
+        """One transaction on a connection that is closed afterwards"""
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            yield conn
+
+    def record(self, times_ms, model, backend, config, summary=None, label=None):
+        """Store one run; returns its id"""
+        host = host_info()
+        timings = np.asarray(times_ms, dtype=np.float32)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (created, label, node, git, model, backend, config, config_key, host, runtime, "
+                "summary, timings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), label, host['node'], git_revision(), model, backend, json.dumps(config, sort_keys=True),
+                 config_key(config), json.dumps(host), json.dumps(runtime_fingerprint('engine')),
+                 json.dumps(summary or {}), timings.tobytes()))
+            return cur.lastrowid
+
+    @staticmethod
+    def _row(row):
+        keys = [c.strip() for c in BenchmarkHistory.COLUMNS.split(',')]
+        run = dict(zip(keys, row))
+        for k in ('config', 'host', 'runtime', 'summary'):
+            run[k] = json.loads(run[k]) if run[k] else {}
+        return run
+
+    def runs(self, model=None, backend=None, limit=50):
+        """Most recent runs first"""
+        sql, params = f"SELECT {self.COLUMNS} FROM runs", []
+        filters = [(c, v) for c, v in (('model', model), ('backend', backend)) if v]
+        if filters:
+            sql += " WHERE " + " AND ".join(f"{c} = ?" for c, _ in filters)
+            params = [v for _, v in filters]
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._connect() as conn:
+            return [self._row(r) for r in conn.execute(sql, params + [int(limit)])]
+
+    def get(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {self.COLUMNS} FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+        return self._row(row) if row else None
+
+    def timings(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT timings FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row and row[0] else np.zeros(0, dtype=np.float32)
+
+    def latest(self):
+        runs = self.runs(limit=1)
+        return runs[0] if runs else None
+
+    def baseline_for(self, run):
+        """Previous run of the same model, backend and configuration on the same host"""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {self.COLUMNS} FROM runs WHERE node = ? AND model = ? AND backend = ? AND config_key = ? "
+                "AND id < ? ORDER BY id DESC LIMIT 1",
+                (run['node'], run['model'], run['backend'], run['config_key'], run['id'])).fetchone()
+        return self._row(row) if row else None
+
+    def compare(self, candidate_id, baseline_id=None, alpha=0.01, min_effect=0.03):
+        """compare_timings() of two stored runs; the baseline defaults to baseline_for(candidate)"""
+        candidate = self.get(candidate_id)
+        if candidate is None:
+            raise KeyError(f"No benchmark run {candidate_id}")
+        baseline = self.get(baseline_id) if baseline_id is not None else self.baseline_for(candidate)
+        if baseline is None:
+            raise KeyError(f"No baseline for run {candidate_id} ({candidate['model']}, {candidate['backend']})")
+        result = compare_timings(self.timings(baseline['id']), self.timings(candidate['id']), alpha, min_effect)
+        result['baseline'], result['candidate'] = baseline, candidate
+        return result
+
+
+def _versions(run):
+    rt = run['runtime']
+    parts = [f"git {run['git'] or '-'}", f"ultralytics {rt.get('ultralytics') or '-'}",
+             f"TRT {rt.get('tensorrt') or '-'}", f"L4T {rt.get('l4t') or '-'}"]
+    return ", ".join(parts)
+
+
+def format_runs(runs):
+    lines = [f"{'ID':>5}  {'Date':<16} {'Model':<18} {'Backend':<15} {'Config':<18} {'p50 ms':>8} {'p95 ms':>8}  Label"]
+    for r in runs:
+        cfg = r['config']
+        size = "x".join(str(v) for v in reversed(cfg.get('imgsz', []))) if isinstance(cfg.get('imgsz'), list) \
+            else str(cfg.get('imgsz', ''))
+        s = r['summary']
+        setup = f"{size} b{cfg.get('batch', 1)}"
+        lines.append(f"{r['id']:>5}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(r['created'])):<16} "
+                     f"{r['model']:<18} {r['backend']:<15} {setup:<18} "
+                     f"{s.get('median_ms', 0):>8.2f} {s.get('p95_ms', 0):>8.2f}  {r['label'] or ''}")
+    return "\n".join(lines)
+
+
+def format_comparison(result):
+    b, c = result['baseline'], result['candidate']
+    lines = [
+        f"Baseline  #{b['id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(b['created']))}  {_versions(b)}",
+        f"Candidate #{c['id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(c['created']))}  {_versions(c)}",
+        f"  {c['model']} / {c['backend']} / {json.dumps(c['config'], sort_keys=True)}",
+        f"  median {result['baseline_median_ms']:.2f} -> {result['candidate_median_ms']:.2f} ms "
+        f"({result['median_change']:+.1%}),  p95 {result['baseline_p95_ms']:.2f} -> "
+        f"{result['candidate_p95_ms']:.2f} ms ({result['p95_change']:+.1%})",
+        f"  Mann-Whitney p(slower)={result['mannwhitney_p_slower']:.2g}  p(faster)={result['mannwhitney_p_faster']:.2g}"
+        f"  KS D={result['ks_d']:.3f} p={result['ks_p']:.2g}  (n={result['n_baseline']}/{result['n_candidate']})",
+        f"  => {result['verdict'].upper()}" + (": " + "; ".join(result['reasons']) if result['reasons'] else ""),
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,197 @@
+"""
+Memory Footprint Profiling
+Jetsons share RAM between CPU and GPU, so a CUDA or TensorRT allocation is as
+likely to cause an OOM as a Python one. MemoryProbe records, per pipeline
+stage:
+
+    rss          resident set of this process (peak via VmHWM, reset per stage)
+    system       MemTotal - MemAvailable: everything, including nvmap / GPU
+                 allocations on Jetson and other processes
+    python       tracemalloc current / peak (Python objects and NumPy buffers)
+    device       torch allocator (allocated / peak) and the driver's used
+                 memory (mem_get_info, includes TensorRT), when CUDA is present
+
+    probe = MemoryProbe()
+    with probe.stage('model_load'):
+        model = YOLO(path)
+    probe.rows  # [{'stage', 'delta': {...}, 'peak': {...}, 'after': {...}}]
+
+fit_cost_model() turns steady-state figures measured at several camera
+counts into base + per-camera cost for capacity planning.
+"""
+
+import math
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+MB = 1024.0 * 1024.0
+
+
+def _proc_status(field):
+    """Value of a /proc/self/status field in bytes (e.g. VmRSS, VmHWM), None if unavailable"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def rss_bytes():
+    return _proc_status("VmRSS") or 0
+
+
+def peak_rss_bytes():
+    hwm = _proc_status("VmHWM")
+    if hwm is not None:
+        return hwm
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024   # KB on Linux
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS (Linux >= 4.0); False where not supported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def system_memory():
+    """(total, used) bytes from /proc/meminfo; used = MemTotal - MemAvailable"""
+    info = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None, None
+    total = info.get("MemTotal")
+    available = info.get("MemAvailable", info.get("MemFree"))
+    return total, (total - available) if total and available is not None else None
+
+
+def _torch_cuda():
+    try:
+        import torch
+    except ImportError:
+        return None
+    return torch if torch.cuda.is_available() else None
+
+
+class MemoryProbe:
+    """Per-stage memory deltas and peaks; see the module docstring"""
+
+    def __init__(self, trace_python=True):
+        self.rows = []
+        self.trace_python = trace_python
+        if trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._last = self.snapshot()
+
+    def snapshot(self):
+        _, used = system_memory()
+        snap = {'rss': rss_bytes(), 'system': used}
+        if tracemalloc.is_tracing():
+            snap['python'] = tracemalloc.get_traced_memory()[0]
+        torch = _torch_cuda()
+        if torch is not None:
+            torch.cuda.synchronize()
+            snap['device_allocated'] = torch.cuda.memory_allocated()
+            free, total = torch.cuda.mem_get_info()
+            snap['device_used'] = total - free
+        return snap
+
+    def _reset_peaks(self):
+        reset_peak_rss()
+        if tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):   # Python 3.9+
+            tracemalloc.reset_peak()
+        torch = _torch_cuda()
+        if torch is not None:
+            torch.cuda.reset_peak_memory_stats()
+
+    def _peaks(self):
+        peak = {'rss': peak_rss_bytes()}
+        if tracemalloc.is_tracing():
+            peak['python'] = tracemalloc.get_traced_memory()[1]
+        torch = _torch_cuda()
+        if torch is not None:
+            peak['device_allocated'] = torch.cuda.max_memory_allocated()
+        return peak
+
+    def stage(self, name, **tags):
+        return _Stage(self, name, tags)
+
+    def mark(self, name, peak=None, **tags):
+        """Record a stage that ended now (the time since the previous stage)"""
+        after = self.snapshot()
+        delta = {k: v - self._last[k] for k, v in after.items() if v is not None and self._last.get(k) is not None}
+        row = {'stage': name, 'delta': delta, 'peak': peak or self._peaks(), 'after': after}
+        row.update(tags)
+        self.rows.append(row)
+        self._last = after
+        return row
+
+    def stop(self):
+        if self.trace_python and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class _Stage:
+    def __init__(self, probe, name, tags):
+        self.probe, self.name, self.tags = probe, name, tags
+
+    def __enter__(self):
+        self.probe._last = self.probe.snapshot()
+        self.probe._reset_peaks()
+        self.t0 = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        peak = self.probe._peaks()
+        self.probe.mark(self.name, peak, seconds=round(time.monotonic() - self.t0, 2), **self.tags)
+
+
+def fit_cost_model(counts, values):
+    """
+    Least-squares base + per_camera * n over (camera count, bytes) points.
+    Returns {'base_mb', 'per_camera_mb', 'r2', 'points'}.
+    """
+    n = np.asarray(counts, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64) / MB
+    if len(set(counts)) < 2:
+        return {'base_mb': float(y.mean()) if len(y) else 0.0, 'per_camera_mb': None, 'r2': None, 'points': len(y)}
+    slope, intercept = np.polyfit(n, y, 1)
+    residual = y - (intercept + slope * n)
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    r2 = 1.0 - float((residual ** 2).sum()) / ss_tot if ss_tot > 0 else 1.0
+    return {'base_mb': float(intercept), 'per_camera_mb': float(slope), 'r2': r2, 'points': len(y)}
+
+
+def max_cameras(model, budget_mb):
+    """Cameras that fit in budget_mb under a fitted cost model (None if it cannot tell)"""
+    per = model.get('per_camera_mb')
+    if not per or per <= 0:
+        return None
+    return max(0, int(math.floor((budget_mb - model['base_mb']) / per)))
+
+
+def format_stages(rows):
+    """Per-stage table: deltas and peaks in MB"""
+    def mb(v):
+        return f"{v / MB:>9.1f}" if v is not None else f"{'-':>9}"
+    lines = [f"{'Stage':<16} {'dRSS':>9} {'dSystem':>9} {'dPython':>9} {'dDevice':>9} "
+             f"{'peak RSS':>9} {'peak Py':>9} {'peak Dev':>9}"]
+    for r in rows:
+        d, p = r['delta'], r['peak']
+        lines.append(f"{r['stage']:<16} {mb(d.get('rss'))} {mb(d.get('system'))} {mb(d.get('python'))} "
+                     f"{mb(d.get('device_used', d.get('device_allocated')))} {mb(p.get('rss'))} "
+                     f"{mb(p.get('python'))} {mb(p.get('device_allocated'))}")
+    return "\n".join(lines)
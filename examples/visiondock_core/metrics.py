@@ -0,0 +1,128 @@
+"""
+Lightweight Metrics
+Fixed-size, HDR-style latency histograms and discrete counters for
+real-time loops (constant memory, O(1) record, no numpy on the hot path).
+"""
+
+import bisect
+import math
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram (HDR-style) with a fixed number of buckets.
+
+    Values from `lowest` to `highest` are split into power-of-two magnitudes,
+    each divided into `sub_buckets` linear buckets, so the relative error of
+    any reported percentile is at most 1/sub_buckets. Values outside the range
+    are clamped into the first/last bucket (exact min/max are kept separately).
+    """
+
+    def __init__(self, lowest=0.01, highest=60000.0, sub_buckets=32):
+        self.lowest = float(lowest)
+        self.highest = float(highest)
+        self.sub_buckets = int(sub_buckets)
+        self.magnitudes = max(1, int(math.ceil(math.log2(self.highest / self.lowest))))
+        self.counts = [0] * (1 + self.magnitudes * self.sub_buckets)
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def _index(self, value):
+        if value < self.lowest:
+            return 0
+        mag = min(int(math.log2(value / self.lowest)), self.magnitudes - 1)
+        base = self.lowest * (1 << mag)
+        sub = min(int((value - base) / base * self.sub_buckets), self.sub_buckets - 1)
+        return 1 + mag * self.sub_buckets + sub
+
+    def _upper(self, index):
+        if index == 0:
+            return self.lowest
+        mag, sub = divmod(index - 1, self.sub_buckets)
+        base = self.lowest * (1 << mag)
+        return base * (1.0 + (sub + 1) / self.sub_buckets)
+
+    def record(self, value, count=1):
+        self.counts[self._index(value)] += count
+        self.count += count
+        self.total += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """Value at percentile q (0-100), reported as the bucket's upper edge"""
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(math.ceil(self.count * q / 100.0)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self._upper(i), self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 90, 95, 99)):
+        out = {
+            'count': self.count,
+            'mean': round(self.mean, 3),
+            'min': round(self.min, 3) if self.count else 0.0,
+            'max': round(self.max, 3),
+        }
+        for q in percentiles:
+            out[f'p{q}'] = round(self.percentile(q), 3)
+        return out
+
+
+class CountHistogram:
+    """Histogram of small discrete values (e.g. batch sizes)"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def record(self, value):
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+    def reset(self):
+        self.counts.clear()
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def summary(self):
+        return dict(sorted(self.counts.items()))
+
+
+def format_histogram(hist, unit='ms', width=40, edges=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)):
+    """Render a LatencyHistogram as text bars over coarse display edges"""
+    if hist.count == 0:
+        return "  (no samples)"
+    bins = [0] * (len(edges) + 1)
+    for i, c in enumerate(hist.counts):
+        if c:
+            bins[bisect.bisect_left(edges, hist._upper(i))] += c
+    labels = [f"<= {e:g} {unit}" for e in edges] + [f"> {edges[-1]:g} {unit}"]
+    peak = max(bins) or 1
+    return "\n".join(f"  {label:>12} | {'#' * int(width * n / peak):<{width}} {n}"
+                     for label, n in zip(labels, bins) if n)
@@ -0,0 +1,80 @@
+"""
+Multi-Camera Mosaic Compositor
+Lays out any number of camera tiles on one preallocated canvas. Each frame is
+resized straight into its tile (cv2.resize(dst=...)), so there is no
+per-frame hstack/vstack or full-mosaic resize, and tiles that did not change
+are left untouched.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+class MosaicCompositor:
+    """Fixed grid of tiles on a reusable BGR canvas"""
+
+    def __init__(self, n_tiles, max_width=1920, tile_aspect=16 / 9, cols=None):
+        self.n_tiles = max(1, int(n_tiles))
+        self.cols = cols or int(math.ceil(math.sqrt(self.n_tiles)))
+        self.rows = int(math.ceil(self.n_tiles / self.cols))
+        self.tile_w = max(2, int(max_width) // self.cols)
+        self.tile_h = max(2, int(round(self.tile_w / tile_aspect)))
+        self.canvas = np.zeros((self.rows * self.tile_h, self.cols * self.tile_w, 3), dtype=np.uint8)
+        self._tiles = []
+        for i in range(self.n_tiles):
+            r, c = divmod(i, self.cols)
+            self._tiles.append(self.canvas[r * self.tile_h:(r + 1) * self.tile_h, c * self.tile_w:(c + 1) * self.tile_w])
+        self._fit = {}                       # source (h, w) -> (x, y, w, h) inside a tile
+        self._last_seq = [None] * self.n_tiles
+        self._last_shape = [None] * self.n_tiles
+        self.redraws = 0
+        self.skipped = 0
+
+    def _fit_rect(self, shape):
+        key = shape[:2]
+        rect = self._fit.get(key)
+        if rect is None:
+            src_h, src_w = key
+            scale = min(self.tile_w / src_w, self.tile_h / src_h)
+            w, h = max(1, int(src_w * scale)), max(1, int(src_h * scale))
+            rect = ((self.tile_w - w) // 2, (self.tile_h - h) // 2, w, h)
+            self._fit[key] = rect
+        return rect
+
+    def update(self, index, frame, seq=None):
+        """
+        Draw `frame` into tile `index` (aspect preserved, letterboxed).
+
+        When `seq` is given and equals the last drawn sequence for this tile,
+        the redraw is skipped. Returns True if the tile was redrawn.
+        """
+        if index >= self.n_tiles or frame is None or frame.size == 0:
+            return False
+        if seq is not None and seq == self._last_seq[index]:
+            self.skipped += 1
+            return False
+
+        tile = self._tiles[index]
+        x, y, w, h = self._fit_rect(frame.shape)
+        if self._last_shape[index] != frame.shape[:2]:
+            tile[:] = 0   # Clear letterbox bars when the source geometry changes
+            self._last_shape[index] = frame.shape[:2]
+        interp = cv2.INTER_AREA if w < frame.shape[1] else cv2.INTER_LINEAR
+        cv2.resize(frame, (w, h), dst=tile[y:y + h, x:x + w], interpolation=interp)
+
+        self._last_seq[index] = seq
+        self.redraws += 1
+        return True
+
+    def clear(self, index, label=None):
+        """Blank a tile (e.g. camera offline), optionally with a centered label"""
+        if index >= self.n_tiles:
+            return
+        tile = self._tiles[index]
+        tile[:] = 0
+        self._last_seq[index] = None
+        self._last_shape[index] = None
+        if label:
+            cv2.putText(tile, label, (10, self.tile_h // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (128, 128, 128), 2)
@@ -0,0 +1,162 @@
+"""
+Low-Latency Network Streams
+RTSP / HTTP sources opened with default buffering end up seconds behind the
+camera: FFmpeg queues frames in its own buffer and a slow consumer lets that
+queue grow. This module opens them with minimal buffering and keeps the
+consumer on the newest frame:
+
+    - GStreamer: rtspsrc latency=0 drop-on-latency=true (or uridecodebin)
+      into a latest-frame appsink (see gst.py 'rtsp' / 'uri' sources)
+    - FFmpeg fallback: nobuffer / low_delay demuxer options
+    - drain_grab(): grab until the demuxer queue is empty, decode only the last
+    - StreamLagMeter: stream PTS vs local arrival, so lag can be shown live
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import cv2
+
+from .gst import CaptureSpec, open_capture
+
+NETWORK_SCHEMES = ('rtsp', 'rtsps', 'rtmp', 'http', 'https', 'udp', 'srt')
+
+# FFmpeg demuxer options for OpenCV (key;value pairs separated by |)
+FFMPEG_LOW_LATENCY = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay|max_delay;0|reorder_queue_size;0"
+
+_env_lock = threading.Lock()
+
+
+def is_network_source(source):
+    return isinstance(source, str) and urlsplit(source).scheme.lower() in NETWORK_SCHEMES
+
+
+def redact(url):
+    """URL without user:password, for logs and cache keys"""
+    parts = urlsplit(url)
+    if parts.username is None and parts.password is None:
+        return url
+    host = parts.hostname or ''
+    if parts.port:
+        host += f":{parts.port}"
+    return urlunsplit((parts.scheme, host, parts.path, parts.query, parts.fragment))
+
+
+def stream_spec(url, width=None, height=None, format='BGR'):
+    """CaptureSpec for a network URL (output size None = stream size)"""
+    source = 'rtsp' if urlsplit(url).scheme.lower() in ('rtsp', 'rtsps') else 'uri'
+    return CaptureSpec(source, url, None, None, 0, width, height, format=format)
+
+
+def open_ffmpeg(url, options=FFMPEG_LOW_LATENCY):
+    """cv2.VideoCapture on FFmpeg with minimal demuxer buffering"""
+    # OpenCV reads the options from the environment at open time only
+    with _env_lock:
+        previous = os.environ.get('OPENCV_FFMPEG_CAPTURE_OPTIONS')
+        os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = options
+        try:
+            cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        finally:
+            if previous is None:
+                os.environ.pop('OPENCV_FFMPEG_CAPTURE_OPTIONS', None)
+            else:
+                os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = previous
+    if cap.isOpened():
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def open_stream(url, cache=None, verbose=True, backend='opencv', format='BGR'):
+    """
+    Low-latency capture for a network URL: the GStreamer variants are probed
+    first (and cached per URL), FFmpeg with low-delay options is the fallback.
+    """
+    return open_capture(stream_spec(url, format=format), cache, verbose, backend)
+
+
+def needs_drain(cap):
+    """True for captures that queue frames internally (FFmpeg); appsink drops on its own"""
+    try:
+        return cap.getBackendName() == 'FFMPEG'
+    except (AttributeError, cv2.error):
+        return False
+
+
+def drain_grab(cap, fast_ms=4.0, max_drain=60):
+    """
+    Read the newest frame available. Frames are grabbed (demuxed + decoded,
+    no color conversion) while grab() returns immediately, i.e. while they
+    come from a backlog; the first grab that has to wait for the network
+    is the live edge, and only that frame is retrieved.
+
+    Returns (ok, frame, skipped).
+    """
+    skipped = -1
+    for _ in range(max_drain):
+        t0 = time.perf_counter()
+        if not cap.grab():
+            return False, None, max(0, skipped)
+        skipped += 1
+        if (time.perf_counter() - t0) * 1000.0 > fast_ms:
+            break
+    ok, frame = cap.retrieve()
+    return ok, frame, skipped
+
+
+class StreamLagMeter:
+    """
+    Lag of a stream behind its source, from frame PTS and local arrival time.
+
+    Without a shared clock, (arrival - pts) is only known up to a constant
+    (network transit + sender clock offset). The smallest offset seen since
+    the stream (re)started is taken as zero lag, so the meter reports the
+    buffering delay on top of that: exactly what low-latency mode removes.
+    A backlog never becomes the new zero: the baseline drops at once to any
+    smaller offset but rises only at `max_drift_ppm` (sender/receiver clock
+    drift), and is reset on reconnect or a PTS jump.
+    """
+
+    def __init__(self, max_drift_ppm=200.0, jump_s=10.0):
+        self.max_drift = max_drift_ppm / 1e6
+        self.jump_s = jump_s
+        self.reset()
+
+    def reset(self):
+        """Forget the baseline (call after reconnecting: PTS restart)"""
+        self._base = None
+        self._base_at = None
+        self._last_pts = None
+        self._last_now = None
+        self.lag_ms = None
+
+    def _baseline(self, offset, now):
+        if self._base is None:
+            self._base = offset
+        else:
+            self._base = min(offset, self._base + self.max_drift * (now - self._base_at))
+        self._base_at = now
+        return self._base
+
+    def update(self, pts_ms, now=None):
+        """
+        Record a frame's PTS (milliseconds) as it arrives. Returns the estimated
+        source time on the time.monotonic() clock, or None without usable PTS.
+        """
+        now = time.monotonic() if now is None else now
+        if not pts_ms or pts_ms <= 0:
+            return None
+        if self._last_pts is not None:
+            pts_step = (pts_ms - self._last_pts) / 1000.0
+            if pts_step < 0 or pts_step - (now - self._last_now) > self.jump_s:
+                self.reset()   # Stream restarted, wrapped or jumped ahead
+        self._last_pts, self._last_now = pts_ms, now
+        offset = now - pts_ms / 1000.0
+        base = self._baseline(offset, now)
+        self.lag_ms = (offset - base) * 1000.0
+        return pts_ms / 1000.0 + base
+
+    def observe(self, cap, now=None):
+        """update() with the PTS of the frame just read from cap"""
+        return self.update(cap.get(cv2.CAP_PROP_POS_MSEC), now)
@@ -0,0 +1,287 @@
+"""
+Offline Multi-Process Video Analysis
+Splits a recorded video into keyframe-aligned segments, runs each segment in
+a worker process with batched inference, and stitches per-segment results
+(track IDs, counts) back together.
+"""
+
+import multiprocessing
+import shutil
+import subprocess
+import time
+from functools import partial
+
+import cv2
+import numpy as np
+
+
+def probe_video(path):
+    """Return basic stream properties of a video file"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+    info = {
+        'frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS) or 30.0,
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+    return info
+
+
+def probe_keyframes(path, fps):
+    """
+    List keyframe positions (frame indices) using ffprobe.
+
+    Returns an empty list when ffprobe is not installed; segments are then
+    split at even frame positions and OpenCV seeks from the previous keyframe.
+    """
+    if shutil.which('ffprobe') is None:
+        return []
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+        '-show_entries', 'frame=pts_time,pkt_pts_time,best_effort_timestamp_time',
+        '-of', 'csv=p=0', path
+    ]
+    try:
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, timeout=120).decode()
+    except Exception:
+        return []
+
+    keyframes = set()
+    for line in out.splitlines():
+        for field in line.split(','):
+            try:
+                keyframes.add(int(round(float(field) * fps)))
+                break
+            except ValueError:
+                continue
+    return sorted(keyframes)
+
+
+def plan_segments(total_frames, keyframes, n_segments, overlap=0):
+    """
+    Split [0, total_frames) into up to n_segments keyframe-aligned segments.
+
+    Each segment dict holds:
+        start/end:    frames this segment is responsible for (counted)
+        warmup_from:  first frame processed (start - overlap) so trackers and
+                      zone state are primed, and results can be stitched
+        decode_from:  keyframe to seek to (<= warmup_from)
+    """
+    n_segments = max(1, min(int(n_segments), max(1, total_frames)))
+    inner = sorted(k for k in set(keyframes) if 0 < k < total_frames)
+
+    bounds = [0]
+    for i in range(1, n_segments):
+        ideal = total_frames * i // n_segments
+        b = min(inner, key=lambda k: abs(k - ideal)) if inner else ideal
+        if b > bounds[-1]:
+            bounds.append(b)
+    bounds.append(total_frames)
+
+    segments = []
+    for i in range(len(bounds) - 1):
+        start, end = bounds[i], bounds[i + 1]
+        warmup_from = max(0, start - overlap) if i > 0 else start
+        prior = [k for k in inner if k <= warmup_from]
+        decode_from = prior[-1] if prior else (warmup_from if not inner else 0)
+        segments.append({
+            'index': i,
+            'start': start,
+            'end': end,
+            'warmup_from': warmup_from,
+            'decode_from': decode_from,
+        })
+    return segments
+
+
+# --- Worker process side ----------------------------------------------------
+
+_ANALYZER = None
+
+
+def _init_worker(analyzer_cls, analyzer_kwargs):
+    """Pool initializer: load the model once per worker process"""
+    global _ANALYZER
+    _ANALYZER = analyzer_cls(**analyzer_kwargs)
+
+
+def _run_segment(path, info, batch, segment):
+    cap = cv2.VideoCapture(path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, segment['decode_from'])
+
+    t0 = time.perf_counter()
+    _ANALYZER.begin_segment(segment, info)
+
+    idx = segment['decode_from']
+    # Decode-only until the warmup window (keyframe may precede it)
+    while idx < segment['warmup_from'] and cap.grab():
+        idx += 1
+
+    indices, frames = [], []
+    while idx < segment['end']:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        indices.append(idx)
+        frames.append(frame)
+        idx += 1
+        if len(frames) >= batch:
+            _ANALYZER.process_batch(indices, frames)
+            indices, frames = [], []
+    if frames:
+        _ANALYZER.process_batch(indices, frames)
+    cap.release()
+
+    result = _ANALYZER.end_segment()
+    result['segment'] = segment
+    result['counted_frames'] = max(0, min(idx, segment['end']) - segment['start'])
+    result['elapsed_s'] = time.perf_counter() - t0
+    return result
+
+
+def run_offline(path, analyzer_cls, analyzer_kwargs, workers=2, batch=8, overlap=0):
+    """
+    Process a video file with a pool of `workers` processes.
+
+    analyzer_cls is instantiated once per worker with analyzer_kwargs and must
+    provide begin_segment(segment, info), process_batch(indices, frames) and
+    end_segment() -> dict (picklable).
+
+    Returns a dict with the ordered segment results and throughput figures.
+    """
+    info = probe_video(path)
+    if info is None or info['frames'] <= 0:
+        raise RuntimeError(f"Cannot read video file: {path}")
+
+    keyframes = probe_keyframes(path, info['fps'])
+    segments = plan_segments(info['frames'], keyframes, workers, overlap)
+
+    # spawn: CUDA cannot be re-initialised in forked children
+    ctx = multiprocessing.get_context('spawn')
+    t0 = time.perf_counter()
+    with ctx.Pool(processes=min(workers, len(segments)), initializer=_init_worker,
+                  initargs=(analyzer_cls, analyzer_kwargs)) as pool:
+        results = pool.map(partial(_run_segment, path, info, batch), segments, chunksize=1)
+    wall = time.perf_counter() - t0
+
+    results.sort(key=lambda r: r['segment']['index'])
+    frames = sum(r['counted_frames'] for r in results)
+    return {
+        'info': info,
+        'keyframes': len(keyframes),
+        'workers': workers,
+        'segments': results,
+        'frames': frames,
+        'wall_s': wall,
+        'fps': frames / wall if wall > 0 else 0.0,
+    }
+
+
+def print_scaling(runs):
+    """Print throughput against worker count for one or more run_offline() results"""
+    base = runs[0]['fps'] / runs[0]['workers'] if runs and runs[0]['workers'] else 0
+    print(f"\n{'Workers':>8} {'Segments':>9} {'Frames':>8} {'Wall (s)':>9} {'FPS':>8} {'FPS/worker':>11} {'Scaling':>8}")
+    for run in runs:
+        per_worker = run['fps'] / run['workers'] if run['workers'] else 0
+        scaling = per_worker / base if base > 0 else 0
+        print(f"{run['workers']:>8} {len(run['segments']):>9} {run['frames']:>8} {run['wall_s']:>9.1f} "
+              f"{run['fps']:>8.1f} {per_worker:>11.1f} {scaling:>7.0%}")
+
+
+# --- Result stitching ---------------------------------------------------------
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy box arrays"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def stitch_track_ids(results, iou_thresh=0.5):
+    """
+    Map per-segment (local) track IDs to global IDs.
+
+    Each segment result must contain:
+        track_ids:   local IDs seen in the counted range
+        head_tracks: {frame: [[id, cls, x1, y1, x2, y2], ...]} for warmup frames
+        tail_tracks: same, for the last `overlap` counted frames
+
+    Segment k's warmup frames are the same video frames as segment k-1's tail,
+    so tracks are matched there by accumulated same-class IoU.
+
+    Returns a list of {local_id: global_id} dicts, one per segment.
+    """
+    maps = []
+    next_id = 1
+    prev, prev_map = None, {}
+    for res in results:
+        mapping = {}
+        if prev is not None:
+            votes = {}
+            for frame_idx, cur_rows in res.get('head_tracks', {}).items():
+                prev_rows = prev.get('tail_tracks', {}).get(frame_idx)
+                if not prev_rows or not cur_rows:
+                    continue
+                p = np.asarray(prev_rows, dtype=np.float32)
+                c = np.asarray(cur_rows, dtype=np.float32)
+                ious = iou_matrix(p[:, 2:6], c[:, 2:6])
+                ious[p[:, 1][:, None] != c[:, 1][None, :]] = 0.0
+                for i, j in zip(*np.nonzero(ious >= iou_thresh)):
+                    key = (int(p[i, 0]), int(c[j, 0]))
+                    votes[key] = votes.get(key, 0.0) + float(ious[i, j])
+
+            used = set()
+            for (prev_id, cur_id), _ in sorted(votes.items(), key=lambda kv: -kv[1]):
+                if cur_id in mapping or prev_id in used or prev_id not in prev_map:
+                    continue
+                mapping[cur_id] = prev_map[prev_id]
+                used.add(prev_id)
+
+        for local_id in sorted(res.get('track_ids', ())):
+            if local_id not in mapping:
+                mapping[local_id] = next_id
+                next_id += 1
+        maps.append(mapping)
+        prev, prev_map = res, mapping
+    return maps
+
+
+class DetectionCounter:
+    """Offline analyzer: batched detection with per-class counts"""
+
+    def __init__(self, model_path, conf=0.25, iou=0.45, imgsz=640):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+
+    def begin_segment(self, segment, info):
+        self.segment = segment
+        self.detections = 0
+        self.classes = {}
+
+    def process_batch(self, indices, frames):
+        results = self.model(frames, conf=self.conf, iou=self.iou, imgsz=self.imgsz, verbose=False)
+        for idx, r in zip(indices, results):
+            if idx < self.segment['start'] or r.boxes is None:
+                continue
+            self.detections += len(r.boxes)
+            names = r.names or {}
+            for cls_id in r.boxes.cls.cpu().int().tolist():
+                name = names.get(cls_id, str(cls_id))
+                self.classes[name] = self.classes.get(name, 0) + 1
+
+    def end_segment(self):
+        return {'detections': self.detections, 'classes': self.classes}
@@ -0,0 +1,185 @@
+"""
+Raw-Layout Preprocessing
+Lets capture deliver the layout nvvidconv produces (BGRx or NV12) instead of
+paying a CPU videoconvert pass to BGR on every frame. The letterbox resize
+runs on the raw planes (so it touches model-sized pixels, not camera-sized
+ones) and the color conversion to RGB is fused into the GPU normalisation.
+
+    pre = FramePreprocessor(imgsz=640, layout='NV12')
+    x, metas = pre(frames)                        # BCHW float tensor, 0..1 RGB
+    results = restore_results(model(x), metas, frames, 'NV12')
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+LAYOUTS = ('BGR', 'BGRx', 'NV12')
+
+# BT.601 limited range (what nvvidconv emits for NV12)
+_YUV2RGB = ((1.164, 0.0, 1.596), (1.164, -0.392, -0.813), (1.164, 2.017, 0.0))
+
+
+def frame_shape(layout, width, height):
+    """NumPy shape of one captured frame (OpenCV delivers NV12 as a (h*3/2, w) plane)"""
+    if layout == 'NV12':
+        return (height * 3 // 2, width)
+    return (height, width, 4 if layout == 'BGRx' else 3)
+
+
+def frame_size(frame, layout):
+    """(width, height) of the image a raw frame holds"""
+    if layout == 'NV12':
+        return frame.shape[1], frame.shape[0] * 2 // 3
+    return frame.shape[1], frame.shape[0]
+
+
+def to_bgr(frame, layout):
+    """BGR copy for display/annotation (only paid when something is drawn)"""
+    if layout == 'BGRx':
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    if layout == 'NV12':
+        return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_NV12)
+    return frame
+
+
+class FramePreprocessor:
+    """Letterbox + color conversion + normalisation for BGR, BGRx or NV12 frames"""
+
+    def __init__(self, imgsz=640, layout='BGR', device=None, pad=114):
+        import torch
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unsupported layout {layout}; use one of {LAYOUTS}")
+        self.torch = torch
+        self.imgsz = int(imgsz)
+        self.layout = layout
+        self.device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+        self.pad = pad
+        self._canvas = {}      # batch size -> preallocated uint8 letterbox canvas(es)
+        self._params = {}      # (w, h) -> (scale, left, top, new_w, new_h)
+        self.frames = 0
+        self.cpu_ms = 0.0
+        if layout == 'NV12':
+            self._matrix = torch.tensor(_YUV2RGB, dtype=torch.float32, device=self.device)
+
+    def _letterbox(self, w, h):
+        params = self._params.get((w, h))
+        if params is None:
+            scale = min(self.imgsz / w, self.imgsz / h)
+            # Even sizes/offsets keep the NV12 chroma plane aligned with luma
+            nw, nh = int(round(w * scale)) & ~1, int(round(h * scale)) & ~1
+            left, top = ((self.imgsz - nw) // 2) & ~1, ((self.imgsz - nh) // 2) & ~1
+            params = (scale, left, top, nw, nh)
+            self._params[(w, h)] = params
+        return params
+
+    def _buffers(self, n):
+        bufs = self._canvas.get(n)
+        if bufs is None:
+            s = self.imgsz
+            if self.layout == 'NV12':
+                bufs = (np.empty((n, s, s), np.uint8), np.empty((n, s // 2, s // 2, 2), np.uint8))
+            else:
+                bufs = (np.empty((n, s, s, 4 if self.layout == 'BGRx' else 3), np.uint8),)
+            self._canvas[n] = bufs
+        return bufs
+
+    def _resize_cpu(self, frames):
+        """Resize every frame straight into its letterbox canvas on the raw layout"""
+        bufs = self._buffers(len(frames))
+        metas = []
+        if self.layout == 'NV12':
+            canvas_y, canvas_uv = bufs
+            canvas_y.fill(self.pad)
+            canvas_uv.fill(128)   # Neutral chroma: padding stays gray
+        else:
+            bufs[0].fill(self.pad)
+        for i, frame in enumerate(frames):
+            w, h = frame_size(frame, self.layout)
+            scale, left, top, nw, nh = self._letterbox(w, h)
+            interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            if self.layout == 'NV12':
+                uv = frame[h:].reshape(h // 2, w // 2, 2)
+                cv2.resize(frame[:h], (nw, nh), dst=canvas_y[i, top:top + nh, left:left + nw], interpolation=interp)
+                cv2.resize(uv, (nw // 2, nh // 2),
+                           dst=canvas_uv[i, top // 2:(top + nh) // 2, left // 2:(left + nw) // 2], interpolation=interp)
+            else:
+                cv2.resize(frame, (nw, nh), dst=bufs[0][i, top:top + nh, left:left + nw], interpolation=interp)
+            metas.append((scale, left, top, w, h))
+        return bufs, metas
+
+    def __call__(self, frames):
+        """Returns (BCHW float tensor in 0..1 RGB on self.device, per-frame letterbox metas)"""
+        torch = self.torch
+        t0 = time.perf_counter()
+        bufs, metas = self._resize_cpu(frames)
+        self.cpu_ms += (time.perf_counter() - t0) * 1000.0
+        self.frames += len(frames)
+
+        if self.layout == 'NV12':
+            y = torch.from_numpy(bufs[0]).to(self.device, non_blocking=True).float()
+            uv = torch.from_numpy(bufs[1]).to(self.device, non_blocking=True).float() - 128.0
+            uv = uv.repeat_interleave(2, dim=1).repeat_interleave(2, dim=2)      # 4:2:0 -> 4:4:4
+            yuv = torch.stack((y - 16.0, uv[..., 0], uv[..., 1]), dim=-1)        # B,H,W,3
+            rgb = torch.matmul(yuv, self._matrix.T)
+            x = rgb.clamp_(0.0, 255.0).permute(0, 3, 1, 2)
+        else:
+            t = torch.from_numpy(bufs[0]).to(self.device, non_blocking=True)
+            # BGR(x) -> RGB by channel indexing; the x byte is simply never read
+            x = t[..., [2, 1, 0]].permute(0, 3, 1, 2).float()
+        return x.div_(255.0).contiguous(), metas
+
+
+def restore_results(results, metas, frames=None, layout='BGR'):
+    """
+    Map boxes from letterbox space back to camera pixels. With `frames`, each
+    result's orig_img becomes the BGR frame so result.plot() draws on it.
+    """
+    for i, (r, (scale, left, top, w, h)) in enumerate(zip(results, metas)):
+        r.orig_shape = (h, w)
+        if frames is not None:
+            r.orig_img = to_bgr(frames[i], layout)
+        if r.boxes is None or len(r.boxes) == 0:
+            continue
+        data = r.boxes.data.clone()
+        data[:, [0, 2]] = ((data[:, [0, 2]] - left) / scale).clamp(0, w)
+        data[:, [1, 3]] = ((data[:, [1, 3]] - top) / scale).clamp(0, h)
+        r.update(boxes=data)
+    return results
+
+
+def measure_capture_cpu(open_fn, layout, n_frames=300, preprocessor=None):
+    """
+    Process CPU time per frame for one capture (GStreamer threads included),
+    optionally with the model preprocessing step. Returns a dict of averages.
+    """
+    cap = open_fn()
+    if not cap.isOpened():
+        return None
+    for _ in range(10):        # Pipeline warmup (negotiation, first buffers)
+        cap.read()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    frames = 0
+    pre_ms = 0.0
+    while frames < n_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if preprocessor is not None:
+            t0 = time.perf_counter()
+            preprocessor([frame])
+            pre_ms += (time.perf_counter() - t0) * 1000.0
+        frames += 1
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    cap.release()
+    if frames == 0:
+        return None
+    return {
+        'layout': layout,
+        'frames': frames,
+        'fps': frames / wall,
+        'cpu_ms_per_frame': cpu * 1000.0 / frames,
+        'cpu_percent': cpu / wall * 100.0,      # Share of one core at the achieved rate
+        'preprocess_ms': pre_ms / frames,
+    }
@@ -0,0 +1,253 @@
+"""
+Cross-Camera Re-Identification
+Gives per-camera tracker IDs a site-wide (global) ID so an object keeps its
+identity when it walks from one camera into another.
+
+    1. Crops of new tracks (and, every few frames, of known tracks) are embedded
+       in one batch per frame
+    2. Embeddings live in a fixed-capacity NumPy matrix per site; rows not seen
+       for `ttl_s` are evicted, and when the matrix is full the stalest row goes
+    3. New tracks are matched with a single matrix product (cosine similarity
+       of L2-normalised vectors) against every live row
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class ColorEmbedder:
+    """
+    Model-free appearance embedding: hue/saturation histograms of the upper and
+    lower half of a crop (Hellinger-normalised). Cheap enough for every track
+    on the CPU; use ModelEmbedder for a learned feature.
+    """
+
+    def __init__(self, h_bins=16, s_bins=4, size=(64, 128)):
+        self.h_bins = h_bins
+        self.s_bins = s_bins
+        self.size = size
+        self.dim = 2 * h_bins * s_bins
+
+    def __call__(self, crops):
+        out = np.zeros((len(crops), self.dim), dtype=np.float32)
+        half = self.size[1] // 2
+        for i, crop in enumerate(crops):
+            hsv = cv2.cvtColor(cv2.resize(crop, self.size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2HSV)
+            for j, part in enumerate((hsv[:half], hsv[half:])):
+                hist = cv2.calcHist([part], [0, 1], None, [self.h_bins, self.s_bins], [0, 180, 0, 256])
+                out[i, j * hist.size:(j + 1) * hist.size] = hist.ravel()
+        return _normalize(np.sqrt(out))
+
+
+class ModelEmbedder:
+    """Learned embedding from an Ultralytics model (e.g. yolo11n-cls.pt) via model.embed() on the whole batch"""
+
+    def __init__(self, model_path, imgsz=128):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+        self.dim = None
+
+    def __call__(self, crops):
+        feats = self.model.embed(list(crops), imgsz=self.imgsz, verbose=False)
+        out = np.stack([f.cpu().numpy().ravel() for f in feats]).astype(np.float32)
+        self.dim = out.shape[1]
+        return _normalize(out)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingIndex:
+    """Fixed-capacity, time-evicted matrix of unit embeddings keyed by global ID"""
+
+    def __init__(self, dim, capacity=512, ttl_s=120.0, momentum=0.8):
+        self.dim = int(dim)
+        self.capacity = int(capacity)
+        self.ttl = float(ttl_s)
+        self.momentum = float(momentum)
+        self.vectors = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        self.global_ids = np.full(self.capacity, -1, dtype=np.int64)
+        self.cameras = np.full(self.capacity, -1, dtype=np.int64)
+        self.last_seen = np.full(self.capacity, -np.inf)
+        self._rows = {}
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def evict(self, now):
+        """Free rows not seen for ttl_s"""
+        stale = np.nonzero((self.global_ids >= 0) & (self.last_seen < now - self.ttl))[0]
+        for row in stale:
+            self._free(row)
+        return len(stale)
+
+    def _free(self, row):
+        self._rows.pop(int(self.global_ids[row]), None)
+        self.global_ids[row] = -1
+        self.cameras[row] = -1
+        self.last_seen[row] = -np.inf
+        self.evicted += 1
+
+    def query(self, embeddings, now, camera=None, active_s=1.0):
+        """
+        Cosine similarity of every embedding against every row in one matrix product.
+
+        Dead rows, and identities currently tracked on `camera` itself (seen there
+        within `active_s`, i.e. other objects in the same view), are set to -inf.
+        Returns (similarities (n, capacity), row -> global ID array).
+        """
+        live = (self.global_ids >= 0) & (self.last_seen >= now - self.ttl)
+        if camera is not None:
+            live &= ~((self.cameras == camera) & (self.last_seen >= now - active_s))
+        sims = embeddings @ self.vectors.T
+        sims[:, ~live] = -np.inf
+        return sims, self.global_ids
+
+    def upsert(self, global_id, embedding, camera, now):
+        """Insert a new identity or blend the embedding into an existing one (EMA)"""
+        row = self._rows.get(global_id)
+        if row is None:
+            free = np.nonzero(self.global_ids < 0)[0]
+            if len(free):
+                row = int(free[0])
+            else:
+                row = int(np.argmin(self.last_seen))   # Full: replace the stalest identity
+                self._free(row)
+            self._rows[global_id] = row
+            self.global_ids[row] = global_id
+            self.vectors[row] = embedding
+        else:
+            v = self.momentum * self.vectors[row] + (1.0 - self.momentum) * embedding
+            self.vectors[row] = v / max(float(np.linalg.norm(v)), 1e-12)
+        self.cameras[row] = camera
+        self.last_seen[row] = now
+
+    def touch(self, global_id, camera, now):
+        row = self._rows.get(global_id)
+        if row is not None:
+            self.cameras[row] = camera
+            self.last_seen[row] = now
+
+
+class CrossCameraReID:
+    """
+    Maps (camera, tracker ID) to a site-wide global ID.
+
+    Usage (per frame, after model.track()):
+        global_ids = reid.update(cam_id, frame, track_ids, boxes_xyxy)
+    """
+
+    def __init__(self, embedder, capacity=512, ttl_s=120.0, threshold=0.8, refresh_every=15, min_crop=16):
+        self.embedder = embedder
+        self.capacity = capacity
+        self.ttl = float(ttl_s)
+        self.threshold = float(threshold)
+        self.refresh_every = int(refresh_every)
+        self.min_crop = int(min_crop)
+        self.index = None             # Created on the first batch (embedding dim known)
+        self._global = {}             # (camera, track_id) -> global ID
+        self._age = {}                # (camera, track_id) -> frames since last embedding
+        self._seen = {}               # (camera, track_id) -> last time seen
+        self._next_id = 1
+        self.reidentified = 0
+        self.created = 0
+        self.embedded = 0
+        self.embed_ms = 0.0
+
+    def _crops(self, frame, boxes):
+        h, w = frame.shape[:2]
+        crops, keep = [], []
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            x1, y1 = max(0, int(x1)), max(0, int(y1))
+            x2, y2 = min(w, int(x2)), min(h, int(y2))
+            if x2 - x1 >= self.min_crop and y2 - y1 >= self.min_crop:
+                crops.append(frame[y1:y2, x1:x2])
+                keep.append(i)
+        return crops, keep
+
+    def _new_id(self):
+        gid = self._next_id
+        self._next_id += 1
+        self.created += 1
+        return gid
+
+    def update(self, camera, frame, track_ids, boxes, now=None):
+        """Return the global ID for every (track_id, box) of this camera's frame"""
+        now = time.monotonic() if now is None else now
+        keys = [(camera, int(t)) for t in track_ids]
+        new = [i for i, k in enumerate(keys) if k not in self._global]
+        stale = [i for i, k in enumerate(keys) if k in self._global and self._age[k] >= self.refresh_every]
+
+        need = new + stale
+        embeddings, embedded = None, {}
+        if need:
+            crops, keep = self._crops(frame, [boxes[i] for i in need])
+            if crops:
+                t0 = time.perf_counter()
+                embeddings = self.embedder(crops)
+                self.embed_ms += (time.perf_counter() - t0) * 1000.0
+                self.embedded += len(crops)
+                embedded = {need[j]: row for row, j in enumerate(keep)}
+                if self.index is None:
+                    self.index = EmbeddingIndex(embeddings.shape[1], self.capacity, self.ttl)
+                self.index.evict(now)
+
+        # Match all new tracks of this frame against the index in one query;
+        # greedy by similarity so two new tracks never claim the same identity
+        new_rows = [i for i in new if i in embedded]
+        if new_rows and self.index is not None and len(self.index):
+            sims, row_ids = self.index.query(embeddings[[embedded[i] for i in new_rows]], now, camera)
+            claimed = set(self._global[k] for k in keys if k in self._global)
+            order = np.dstack(np.unravel_index(np.argsort(-sims, axis=None), sims.shape))[0]
+            assigned = set()
+            for r, c in order:
+                if sims[r, c] < self.threshold:
+                    break
+                i, gid = new_rows[r], int(row_ids[c])
+                if i in assigned or gid in claimed:
+                    continue
+                self._global[keys[i]] = gid
+                assigned.add(i)
+                claimed.add(gid)
+                self.reidentified += 1
+        for i in new:
+            if keys[i] not in self._global:
+                self._global[keys[i]] = self._new_id()
+
+        for i, k in enumerate(keys):
+            gid = self._global[k]
+            self._seen[k] = now
+            if i in embedded:
+                self.index.upsert(gid, embeddings[embedded[i]], camera, now)
+                self._age[k] = 0
+            else:
+                self._age[k] = self._age.get(k, 0) + 1
+                if self.index is not None:
+                    self.index.touch(gid, camera, now)
+
+        self._prune(now)
+        return [self._global[k] for k in keys]
+
+    def _prune(self, now):
+        if len(self._seen) < 4 * self.capacity:
+            return
+        for k in [k for k, t in self._seen.items() if now - t > self.ttl]:
+            self._seen.pop(k, None)
+            self._global.pop(k, None)
+            self._age.pop(k, None)
+
+    def stats(self):
+        return {
+            'global_ids': self.created,
+            'reidentified': self.reidentified,
+            'index_rows': len(self.index) if self.index is not None else 0,
+            'evicted': self.index.evicted if self.index is not None else 0,
+            'embedded': self.embedded,
+            'embed_ms_per_crop': self.embed_ms / self.embedded if self.embedded else 0.0,
+        }
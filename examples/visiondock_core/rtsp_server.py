@@ -0,0 +1,353 @@
+"""
+Multi-Client RTSP Output
+An RTSP server (GstRtspServer) in front of a single H.264 encoder. The media
+factory is shared, so the first client builds the pipeline
+(appsrc -> encoder -> rtph264pay) and every later client is attached to the
+same payloader: N viewers cost one encode, not N.
+
+Slow clients are handled per client: a viewer whose RTCP receiver reports
+show packet loss has its transport switched off and back on at the next
+keyframe (it skips ahead instead of falling behind), with a hold time that
+backs off while the loss persists. Other viewers are unaffected.
+
+    server = RtspServer(port=8554, mount='/live', width=1280, height=720, fps=30).start()
+    writer = AsyncStreamWriter(server, fps=30).start()   # write()/release() like cv2.VideoWriter
+"""
+
+import threading
+import time
+
+try:
+    import gi
+    gi.require_version('Gst', '1.0')
+    gi.require_version('GstRtspServer', '1.0')
+    from gi.repository import Gst, GstRtspServer, GLib
+    Gst.init(None)
+    HAVE_RTSP = True
+except (ImportError, ValueError):
+    Gst = GstRtspServer = GLib = None
+    HAVE_RTSP = False
+
+from .gst import is_jetson
+
+
+def encoder_launch(width, height, fps, bitrate=4000000, source=None):
+    """
+    Factory launch line. `source` replaces the appsrc (e.g. a videotestsrc
+    fragment for the self-test); keyframes every second bound the time a
+    dropped client waits to resume.
+    """
+    if source is None:
+        source = (f"appsrc name=src is-live=true format=time do-timestamp=true block=false "
+                  f"caps=video/x-raw,format=BGR,width={width},height={height},framerate={fps}/1")
+    if is_jetson():
+        enc = (f"nvvidconv ! video/x-raw(memory:NVMM),format=NV12 ! "
+               f"nvv4l2h264enc name=enc insert-sps-pps=true idrinterval={fps} iframeinterval={fps} bitrate={bitrate}")
+    else:
+        enc = (f"videoconvert ! video/x-raw,format=I420 ! "
+               f"x264enc name=enc tune=zerolatency speed-preset=ultrafast key-int-max={fps} bitrate={bitrate // 1000}")
+    return f"( {source} ! {enc} ! h264parse ! rtph264pay name=pay0 pt=96 config-interval=1 )"
+
+
+class ClientDropPolicy:
+    """
+    Per-client drop decision from RTCP loss: 'live' -> 'dropping' when loss
+    exceeds loss_high; resume is allowed after a hold time that doubles on
+    every relapse and halves after each healthy interval.
+    """
+
+    def __init__(self, loss_high=0.05, loss_low=0.01, min_hold_s=0.5, max_hold_s=8.0):
+        self.loss_high = loss_high
+        self.loss_low = loss_low
+        self.min_hold_s = min_hold_s
+        self.max_hold_s = max_hold_s
+        self.hold_s = min_hold_s
+        self.state = 'live'
+        self.resume_at = 0.0
+        self.drops = 0
+        self.resumes = 0
+        self.loss = 0.0
+
+    def update(self, loss, now):
+        """Feed the latest loss fraction; returns 'drop', 'resume' or None"""
+        self.loss = loss
+        if self.state == 'live':
+            if loss > self.loss_high:
+                self.state = 'dropping'
+                self.resume_at = now + self.hold_s
+                self.hold_s = min(self.max_hold_s, self.hold_s * 2.0)
+                self.drops += 1
+                return 'drop'
+            if loss < self.loss_low:
+                self.hold_s = max(self.min_hold_s, self.hold_s * 0.5)
+            return None
+        if self.state == 'dropping' and now >= self.resume_at:
+            self.state = 'resuming'   # Re-enabled at the next keyframe
+            return 'resume'
+        return None
+
+
+class _Client:
+    def __init__(self, client):
+        self.client = client
+        self.address = None
+        self.transport = None
+        self.rtcp_from = None
+        self.policy = ClientDropPolicy()
+        self.connected = time.monotonic()
+
+
+class RtspServer:
+    """One shared encode served to any number of RTSP clients"""
+
+    def __init__(self, port=8554, mount='/live', width=1280, height=720, fps=30,
+                 bitrate=4000000, launch=None, adaptive_drop=True):
+        if not HAVE_RTSP:
+            raise ImportError("PyGObject with GstRtspServer (gir1.2-gst-rtsp-server-1.0) is required")
+        self.port = int(port)
+        self.mount = mount if mount.startswith('/') else '/' + mount
+        self.width, self.height, self.fps = width, height, fps
+        self.adaptive_drop = adaptive_drop
+        self.launch = launch or encoder_launch(width, height, fps, bitrate)
+
+        self.server = GstRtspServer.RTSPServer()
+        self.server.set_service(str(self.port))
+        self.factory = GstRtspServer.RTSPMediaFactory()
+        self.factory.set_launch(self.launch)
+        self.factory.set_shared(True)     # One media (one encoder) for all clients
+        self.factory.set_latency(0)
+        self.factory.connect('media-configure', self._on_media_configure)
+        self.server.get_mount_points().add_factory(self.mount, self.factory)
+        self.server.connect('client-connected', self._on_client)
+
+        self._lock = threading.Lock()
+        self._loop = GLib.MainLoop()
+        self._thread = None
+        self._media = None
+        self._appsrc = None
+        self._congested = False
+        self._clients = {}
+
+        # Counters (read via stats())
+        self.media_configured = 0     # Media pipelines built = encoders instantiated
+        self.encoded_frames = 0
+        self.frames_in = 0
+        self.frames_pushed = 0
+        self.dropped_congestion = 0   # Encoder could not keep up (appsrc enough-data)
+        self.clients_total = 0
+
+    @property
+    def url(self):
+        return f"rtsp://127.0.0.1:{self.port}{self.mount}"
+
+    def start(self):
+        if self.server.attach(None) == 0:
+            raise OSError(f"RTSP server could not bind port {self.port}")
+        self._thread = threading.Thread(target=self._loop.run, name="rtsp-server", daemon=True)
+        self._thread.start()
+        if self.adaptive_drop:
+            GLib.timeout_add(500, self._adapt)
+        return self
+
+    # --- media / encoder --------------------------------------------------
+
+    def _on_media_configure(self, factory, media):
+        with self._lock:
+            self.media_configured += 1
+            self._media = media
+        media.connect('unprepared', self._on_media_unprepared)
+        element = media.get_element()
+        enc = element.get_by_name('enc')
+        if enc is not None:
+            enc.get_static_pad('src').add_probe(Gst.PadProbeType.BUFFER, self._on_encoded)
+        pay = element.get_by_name('pay0')
+        if pay is not None:
+            pay.get_static_pad('sink').add_probe(Gst.PadProbeType.BUFFER, self._on_payload)
+        src = element.get_by_name('src')
+        if src is not None:
+            src.set_property('max-bytes', self.width * self.height * 3 * 2)
+            src.connect('need-data', self._on_need_data)
+            src.connect('enough-data', self._on_enough_data)
+            with self._lock:
+                self._appsrc = src
+                self._congested = False
+
+    def _on_media_unprepared(self, media):
+        with self._lock:
+            if self._media is media:
+                self._media = self._appsrc = None
+
+    def _on_need_data(self, src, length):
+        self._congested = False
+
+    def _on_enough_data(self, src):
+        self._congested = True
+
+    def _on_encoded(self, pad, info):
+        self.encoded_frames += 1
+        return Gst.PadProbeReturn.OK
+
+    def _on_payload(self, pad, info):
+        # Keyframe: dropped clients whose hold has expired rejoin here, on a clean IDR
+        if not info.get_buffer().has_flags(Gst.BufferFlags.DELTA_UNIT):
+            with self._lock:
+                waiting = [c for c in self._clients.values() if c.policy.state == 'resuming']
+            for c in waiting:
+                if c.transport is not None:
+                    c.transport.set_active(True)
+                c.policy.state = 'live'
+                c.policy.resumes += 1
+        return Gst.PadProbeReturn.OK
+
+    # --- clients ----------------------------------------------------------
+
+    def _on_client(self, server, client):
+        entry = _Client(client)
+        conn = client.get_connection()
+        entry.address = conn.get_ip() if conn is not None else None
+        with self._lock:
+            self._clients[id(client)] = entry
+            self.clients_total += 1
+        client.connect('play-request', self._on_play)
+        client.connect('closed', self._on_closed)
+
+    def _on_play(self, client, ctx):
+        entry = self._clients.get(id(client))
+        sessmedia = getattr(ctx, 'sessmedia', None)
+        if entry is None or sessmedia is None:
+            return
+        entry.transport = sessmedia.get_transport(0)
+        tr = entry.transport.get_transport() if entry.transport is not None else None
+        if tr is not None and tr.client_port.max > 0:     # UDP (interleaved TCP has no client ports)
+            entry.rtcp_from = f"{tr.destination or entry.address}:{tr.client_port.max}"
+
+    def _on_closed(self, client):
+        with self._lock:
+            self._clients.pop(id(client), None)
+
+    def _loss_by_address(self):
+        """RTCP receiver-report loss fraction keyed by the reporter's 'ip:port'"""
+        media = self._media
+        if media is None or media.n_streams() == 0:
+            return {}
+        session = media.get_stream(0).get_rtpsession()
+        if session is None:
+            return {}
+        losses = {}
+        for src in session.get_property('stats').get_value('source-stats') or []:
+            if src.get_value('sent-rb') and src.has_field('rtcp-from'):
+                losses[src.get_value('rtcp-from')] = src.get_value('sent-rb-fractionlost') / 256.0
+        return losses
+
+    def _adapt(self):
+        if not self._loop.is_running():
+            return False
+        now = time.monotonic()
+        try:
+            losses = self._loss_by_address()
+        except Exception:
+            losses = {}
+        with self._lock:
+            clients = list(self._clients.values())
+        for c in clients:
+            # TCP-interleaved clients send no separate RTCP; the server drops on their backlog
+            if c.transport is None or c.rtcp_from not in losses:
+                continue
+            action = c.policy.update(losses[c.rtcp_from], now)
+            if action == 'drop':
+                c.transport.set_active(False)
+        return True
+
+    # --- cv2.VideoWriter-like input ---------------------------------------
+
+    def write(self, frame):
+        """Push one BGR frame to the shared encoder (discarded while no client watches)"""
+        self.frames_in += 1
+        src = self._appsrc
+        if src is None:
+            return
+        if self._congested:
+            self.dropped_congestion += 1
+            return
+        src.emit('push-buffer', Gst.Buffer.new_wrapped(frame.tobytes()))
+        self.frames_pushed += 1
+
+    def isOpened(self):
+        return self._thread is not None
+
+    def stats(self):
+        with self._lock:
+            clients = [{'address': c.address, 'state': c.policy.state, 'loss': c.policy.loss,
+                        'drops': c.policy.drops, 'resumes': c.policy.resumes,
+                        'connected_s': time.monotonic() - c.connected}
+                       for c in self._clients.values()]
+        return {
+            'url': self.url,
+            'clients': clients,
+            'clients_total': self.clients_total,
+            'media_configured': self.media_configured,
+            'encoded_frames': self.encoded_frames,
+            'frames_in': self.frames_in,
+            'frames_pushed': self.frames_pushed,
+            'dropped_congestion': self.dropped_congestion,
+        }
+
+    def release(self):
+        if self._loop.is_running():
+            self._loop.quit()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+def _client_pipeline(url):
+    return (f"rtspsrc location={url} latency=0 ! rtph264depay ! h264parse ! "
+            f"fakesink name=sink signal-handoffs=true sync=false")
+
+
+def self_test(n_clients=3, seconds=5.0, port=8554, width=640, height=360, fps=30):
+    """
+    Serve a videotestsrc through a shared factory, attach n_clients local
+    rtspsrc viewers at once and check that they all receive video while only
+    one encoder runs at one encoder's frame rate. Returns (passed, report dict).
+    """
+    source = (f"videotestsrc is-live=true pattern=ball ! "
+              f"video/x-raw,width={width},height={height},framerate={fps}/1")
+    server = RtspServer(port=port, mount='/test', width=width, height=height, fps=fps,
+                        launch=encoder_launch(width, height, fps, 2000000, source=source)).start()
+    clients, counts = [], [0] * n_clients
+
+    def counter(i):
+        def on_handoff(sink, buffer, pad):
+            counts[i] += 1
+        return on_handoff
+
+    try:
+        for i in range(n_clients):
+            pipe = Gst.parse_launch(_client_pipeline(server.url))
+            pipe.get_by_name('sink').connect('handoff', counter(i))
+            pipe.set_state(Gst.State.PLAYING)
+            clients.append(pipe)
+        time.sleep(1.0)                           # Negotiation + first keyframe
+        enc0, counts0 = server.encoded_frames, list(counts)
+        t0 = time.monotonic()
+        time.sleep(seconds)
+        elapsed = time.monotonic() - t0
+        enc_fps = (server.encoded_frames - enc0) / elapsed
+        client_fps = [(c - c0) / elapsed for c, c0 in zip(counts, counts0)]
+    finally:
+        for pipe in clients:
+            pipe.set_state(Gst.State.NULL)
+        server.release()
+
+    report = {
+        'clients': n_clients,
+        'media_configured': server.media_configured,
+        'encoder_fps': enc_fps,
+        'client_fps': client_fps,
+        'target_fps': fps,
+    }
+    # One encoder, encoding at the source rate (not n_clients x), feeding every viewer
+    passed = (server.media_configured == 1 and enc_fps < fps * 1.5
+              and all(f > fps * 0.5 for f in client_fps))
+    return passed, report
@@ -0,0 +1,175 @@
+"""
+Event-Driven Batch Scheduler
+Camera threads publish frames into per-camera FrameSlots; the inference loop
+sleeps on a condition variable and is woken as soon as a frame arrives. A
+batch is dispatched when every camera has reported or when a latency deadline
+(measured from the oldest pending capture) expires.
+
+With a FrameSynchronizer attached, batches are instead timestamp-aligned sets:
+frames are moved from the slots into the synchronizer as they arrive and a
+batch is dispatched as soon as one camera set within the skew tolerance exists.
+"""
+
+import threading
+import time
+
+from .frame_slot import FrameSlot
+from .metrics import LatencyHistogram, CountHistogram, format_histogram
+
+
+class BatchScheduler:
+    """Latest-frame-per-camera batching with a deadline"""
+
+    def __init__(self, camera_ids, max_wait_ms=20.0, slots=None, policy=None, max_batch=None, sync=None):
+        """
+        Args:
+            camera_ids: Cameras a full batch waits for
+            max_wait_ms: Batch deadline after the oldest pending capture
+            slots: Optional {cam_id: FrameSlot} (e.g. shared-memory slots); plain FrameSlots otherwise
+            policy: Optional FairSharePolicy choosing cameras when more are ready than max_batch
+            max_batch: Frames per batch the GPU can afford (None = all ready cameras)
+            sync: Optional FrameSynchronizer; batches become aligned sets (policy/max_batch unused)
+        """
+        self.camera_ids = list(camera_ids)
+        self.max_wait = max_wait_ms / 1000.0
+        self.policy = policy
+        self.max_batch = max_batch
+        self.sync = sync
+        slots = slots or {}
+        self.slots = {cam_id: slots.get(cam_id) or FrameSlot() for cam_id in self.camera_ids}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.batch_sizes = CountHistogram()
+        self.idle_wait_ms = LatencyHistogram()   # Time the consumer slept waiting for a first frame
+        self.form_wait_ms = LatencyHistogram()   # First arrival -> dispatch (batching delay)
+
+    @property
+    def overwritten(self):
+        """Frames replaced in their slot before being batched"""
+        return sum(slot.dropped for slot in self.slots.values())
+
+    def publish(self, cam_id, frame, timestamp=None):
+        """Called by capture threads: overwrite this camera's slot and wake the consumer"""
+        slot = self.slots[cam_id]
+        slot.publish(frame, timestamp)
+        with self._cond:
+            if self.sync is not None:
+                item = slot.take()
+                if item is not None and slot.borrowed:
+                    # Buffered past the next take(): copy out of the recycled buffer
+                    item = item._replace(frame=item.frame.copy())
+                self.sync.push(cam_id, item)
+            self._cond.notify()
+
+    def _ready(self):
+        return [cam_id for cam_id, slot in self.slots.items() if slot.has_new()]
+
+    def next_batch(self, timeout=0.5):
+        """
+        Block until a batch is ready.
+
+        Returns {cam_id: SlotFrame}; empty if nothing arrived within `timeout`
+        seconds or the scheduler was closed.
+        """
+        t_call = time.monotonic()
+        if self.sync is not None:
+            return self._next_aligned(t_call, timeout)
+        with self._cond:
+            if not self._closed:
+                self._cond.wait_for(lambda: self._ready() or self._closed, timeout)
+            ready = self._ready()
+            if not ready:
+                return {}
+            t_first = time.monotonic()
+
+            # Deadline runs from the oldest pending capture
+            first_arrival = min(self.slots[cam_id].peek().timestamp for cam_id in ready)
+            deadline = first_arrival + self.max_wait
+            while len(ready) < len(self.slots) and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                ready = self._ready()
+
+        if self.policy is not None:
+            ready = self.policy.select(ready, self.max_batch)
+        elif self.max_batch is not None:
+            # Without a policy, serve the cameras whose frames waited longest
+            ready = sorted(ready, key=lambda c: self.slots[c].peek().timestamp)[:self.max_batch]
+
+        batch = {}
+        for cam_id in ready:
+            item = self.slots[cam_id].take()
+            if item is not None:
+                batch[cam_id] = item
+
+        now = time.monotonic()
+        if self.policy is not None:
+            self.policy.served(list(batch), now)
+        self.batch_sizes.record(len(batch))
+        self.idle_wait_ms.record(max(0.0, t_first - t_call) * 1000.0)
+        self.form_wait_ms.record(max(0.0, now - first_arrival) * 1000.0)
+        return batch
+
+    def _next_aligned(self, t_call, timeout):
+        deadline = t_call + timeout
+        with self._cond:
+            while True:
+                batch = self.sync.pop_aligned()
+                if batch or self._closed:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        if not batch:
+            return {}
+        now = time.monotonic()
+        self.batch_sizes.record(len(batch))
+        self.idle_wait_ms.record(max(0.0, now - t_call) * 1000.0)
+        self.form_wait_ms.record(max(0.0, now - min(item.timestamp for item in batch.values())) * 1000.0)
+        return batch
+
+    def add_camera(self, cam_id, slot=None):
+        """Start waiting for a new camera (hot-add)"""
+        with self._cond:
+            self.slots[cam_id] = slot or FrameSlot()
+            if cam_id not in self.camera_ids:
+                self.camera_ids.append(cam_id)
+            if self.sync is not None:
+                self.sync.add_camera(cam_id)
+        return self.slots[cam_id]
+
+    def remove_camera(self, cam_id):
+        """Forget a camera (hot-remove); stop its capture thread first"""
+        with self._cond:
+            self.slots.pop(cam_id, None)
+            if cam_id in self.camera_ids:
+                self.camera_ids.remove(cam_id)
+            if self.sync is not None:
+                self.sync.remove_camera(cam_id)
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def report(self):
+        """Human-readable batch-size and wait-time histograms"""
+        lines = ["Batch size histogram:"]
+        total = self.batch_sizes.count or 1
+        for size, n in self.batch_sizes.summary().items():
+            lines.append(f"  {size} camera(s): {n} ({n / total:.0%})")
+        idle = self.idle_wait_ms.summary()
+        form = self.form_wait_ms.summary()
+        lines.append(f"Idle wait (ms):      p50 {idle['p50']:.2f} | p95 {idle['p95']:.2f} | p99 {idle['p99']:.2f}")
+        lines.append(format_histogram(self.idle_wait_ms))
+        lines.append(f"Batch forming (ms):  p50 {form['p50']:.2f} | p95 {form['p95']:.2f} | p99 {form['p99']:.2f}")
+        lines.append(format_histogram(self.form_wait_ms))
+        lines.append(f"Frames replaced before batching: {self.overwritten}")
+        if self.sync is not None:
+            lines.append(self.sync.report())
+        return "\n".join(lines)
@@ -0,0 +1,202 @@
+"""
+Shared-Memory Capture Rings
+Runs camera capture/decode in a separate process per camera. Frames are
+decoded straight into a multiprocessing.shared_memory ring of preallocated
+slots; only (slot index, capture timestamp) pairs cross the process boundary,
+so the inference process reads frames as zero-copy NumPy views.
+
+Slot ownership:
+    writer process  takes a slot from `free`, decodes into it, posts it to `ready`
+    SharedFrameSlot returns a slot to `free` when it is superseded before being
+                    taken, or when the consumer takes the next frame of that
+                    camera (the previous batch is then finished)
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .frame_slot import FrameSlot
+from .gst import open_source
+from .preprocess import frame_shape
+
+
+class SharedFrameRing:
+    """Preallocated ring of uint8 frames in shared memory plus free/ready index queues"""
+
+    def __init__(self, shape, n_slots=4, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self.shape = tuple(shape)
+        self.n_slots = int(n_slots)
+        frame_bytes = int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=self.n_slots * frame_bytes)
+        self.frames = np.ndarray((self.n_slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.free_q = ctx.Queue()
+        self.ready_q = ctx.Queue()
+        for i in range(self.n_slots):
+            self.free_q.put(i)
+        # Written by the capture process
+        self.captured = ctx.Value('L', 0)
+        self.dropped = ctx.Value('L', 0)
+
+    def view(self, index):
+        return self.frames[index]
+
+    def free(self, index):
+        self.free_q.put(index)
+
+    def close(self):
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A consumer still holds a view; the mapping goes away with the process
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def capture_worker(ring, source, width, height, stop_event, raw=False, backend='opencv'):
+    """
+    Capture process body: decode frames directly into free ring slots.
+
+    When the consumer holds every slot the frame is grabbed and discarded
+    (counted in ring.dropped) so the sensor queue never backs up. With `raw`,
+    BGRx / NV12 buffers are stored as delivered (no conversion to BGR).
+    """
+    cap = open_source(source, backend, raw)
+    if not isinstance(source, str):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    while not stop_event.is_set():
+        try:
+            index = ring.free_q.get_nowait()
+        except queue.Empty:
+            # grab() blocks until the next frame (appsink: pulls and drops it), so this never spins
+            if cap.grab():
+                with ring.dropped.get_lock():
+                    ring.dropped.value += 1
+            else:
+                time.sleep(0.01)
+            continue
+
+        view = ring.frames[index]
+        # Timestamp at grab (sensor hand-off), before the decode/convert cost
+        ret = cap.grab()
+        # appsink backend: buffer PTS on the monotonic clock
+        timestamp = getattr(cap, 'last_timestamp', None) or time.monotonic()
+        if ret:
+            ret, out = cap.retrieve(view)
+        if not ret:
+            ring.free_q.put(index)
+            time.sleep(0.1)
+            continue
+        if out.shape != view.shape:
+            if out.ndim != view.ndim or out.shape[2:] != view.shape[2:]:
+                ring.free_q.put(index)   # Layout mismatch (e.g. NV12 geometry): cannot be scaled here
+                continue
+            cv2.resize(out, (width, height), dst=view)
+        elif out.ctypes.data != view.ctypes.data:
+            np.copyto(view, out)
+
+        with ring.captured.get_lock():
+            ring.captured.value += 1
+        ring.ready_q.put((index, timestamp))
+
+    cap.release()
+
+
+class SharedFrameSlot(FrameSlot):
+    """
+    FrameSlot whose frames are views into a SharedFrameRing.
+
+    publish() takes a ring index instead of an array. Ring slots are handed
+    back to the capture process as soon as they can no longer be read.
+    """
+
+    borrowed = True
+
+    def __init__(self, ring):
+        super().__init__()
+        self.ring = ring
+        self._lock = threading.Lock()
+        self._index = {}
+        self._held = None
+
+    def publish(self, ring_index, timestamp=None):
+        with self._lock:
+            prev = self._item
+            if prev is not None and prev.seq != self.read_seq:
+                self.ring.free(self._index.pop(prev.seq))   # Superseded before anyone took it
+            super().publish(self.ring.view(ring_index), timestamp)
+            self._index[self._seq] = ring_index
+
+    def take(self):
+        with self._lock:
+            item = super().take()
+            if item is not None:
+                # Taking the next frame means the previous one is no longer in use
+                if self._held is not None:
+                    self.ring.free(self._index.pop(self._held))
+                self._held = item.seq
+            return item
+
+    def stats(self):
+        out = super().stats()
+        out['capture_dropped'] = self.ring.dropped.value
+        return out
+
+
+class SharedCapture:
+    """One camera: capture process + shared ring + receiver thread feeding a scheduler"""
+
+    def __init__(self, cam_id, source, width=1280, height=720, n_slots=4, layout='BGR', backend='opencv'):
+        # fork: the child only needs cv2 and inherits the mapping without
+        # re-importing the (heavy) main script; start before CUDA is initialised.
+        self.ctx = multiprocessing.get_context('fork')
+        self.cam_id = cam_id
+        self.ring = SharedFrameRing(frame_shape(layout, width, height), n_slots, self.ctx)
+        self.slot = SharedFrameSlot(self.ring)
+        self._stop = self.ctx.Event()
+        self.process = self.ctx.Process(
+            target=capture_worker, args=(self.ring, source, width, height, self._stop, layout != 'BGR', backend),
+            name=f"capture-{cam_id}", daemon=True
+        )
+        self._receiver = None
+        self._running = False
+
+    def start(self):
+        self.process.start()
+        return self
+
+    def attach(self, scheduler):
+        """Forward ready ring indices into scheduler.publish() from a lightweight thread"""
+        self._running = True
+        self._receiver = threading.Thread(target=self._receive, args=(scheduler,), daemon=True)
+        self._receiver.start()
+
+    def _receive(self, scheduler):
+        while self._running:
+            try:
+                index, ts = self.ring.ready_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            scheduler.publish(self.cam_id, index, ts)
+
+    def stop(self):
+        self._running = False
+        self._stop.set()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self._receiver is not None:
+            self._receiver.join(timeout=1.0)
+        self.slot._item = None
+        self.ring.close()
@@ -0,0 +1,154 @@
+"""
+Asynchronous Stream-Out Writer
+Moves encoder/network writes off the detection loop and paces the output
+at a fixed frame rate so RTP consumers see a smooth stream.
+"""
+
+import threading
+import time
+from collections import deque
+
+from .metrics import LatencyHistogram
+
+
+class AsyncStreamWriter:
+    """
+    Paced writer thread in front of a cv2.VideoWriter (or anything with write/release).
+
+    The detection loop calls write() which never blocks: frames go into a small
+    drop-oldest queue. The writer thread emits exactly one frame per tick at
+    `fps`: the newest queued frame, or the previous one again when nothing new
+    arrived in time (duplicate). Extra frames that arrived within one tick are
+    dropped so the output rate never exceeds the declared rate.
+    """
+
+    def __init__(self, writer, fps=30, queue_size=2, name="stream-writer"):
+        self.writer = writer
+        self.fps = float(fps)
+        self.interval = 1.0 / self.fps
+        self._queue = deque(maxlen=max(1, int(queue_size)))
+        self._cond = threading.Condition()
+        self._running = False
+        self._last_frame = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        # Counters (read via stats())
+        self.frames_in = 0
+        self.frames_written = 0
+        self.dropped_queue = 0      # Overwritten by drop-oldest before the writer saw them
+        self.dropped_pacing = 0     # Discarded because several arrived within one tick
+        self.duplicated = 0         # Previous frame re-sent to keep the cadence
+        self.slow_writes = 0        # writer.write() took longer than one frame interval
+        self.missed_ticks = 0       # Ticks skipped because the encoder fell behind
+        self.write_errors = 0       # writer.write() raised (the first error is printed)
+        self.write_time_total = 0.0
+        self.write_time_max = 0.0
+        # Capture-to-encoder age of frames written with a timestamp (duplicates not counted)
+        self.age_ms = LatencyHistogram()
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def write(self, frame, timestamp=None):
+        """Queue a frame for output (non-blocking); timestamp = its capture time (time.monotonic())"""
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped_queue += 1
+            self._queue.append((frame, timestamp))
+            self.frames_in += 1
+            self._cond.notify()
+
+    def _run(self):
+        # Wait for the first frame so the stream starts with real content
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait(0.1)
+
+        next_tick = time.monotonic()
+        while self._running:
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self._cond:
+                if self._queue:
+                    self.dropped_pacing += len(self._queue) - 1
+                    frame, timestamp = self._queue.pop()
+                    self._queue.clear()
+                else:
+                    frame = timestamp = None
+
+            if frame is None:
+                if self._last_frame is None:
+                    next_tick += self.interval
+                    continue
+                frame = self._last_frame
+                self.duplicated += 1
+
+            t0 = time.perf_counter()
+            ok = True
+            try:
+                self.writer.write(frame)
+            except Exception as e:
+                ok = False
+                self.write_errors += 1
+                if self.write_errors == 1:
+                    print(f"[stream-writer] Write failed: {e} (further errors are only counted)")
+            dt = time.perf_counter() - t0
+            if timestamp is not None:
+                self.age_ms.record(max(0.0, (time.monotonic() - timestamp) * 1000.0))
+
+            self._last_frame = frame
+            self.frames_written += 1 if ok else 0
+            self.write_time_total += dt
+            self.write_time_max = max(self.write_time_max, dt)
+            if dt > self.interval:
+                self.slow_writes += 1
+
+            # Encoder backpressure: if we are more than one tick late, resync
+            # instead of bursting frames to catch up.
+            next_tick += self.interval
+            now = time.monotonic()
+            if now - next_tick > self.interval:
+                skipped = int((now - next_tick) / self.interval)
+                self.missed_ticks += skipped
+                next_tick += skipped * self.interval
+
+    def stats(self):
+        """Snapshot of writer counters."""
+        written = self.frames_written
+        calls = written + self.write_errors
+        return {
+            'fps_target': self.fps,
+            'frames_in': self.frames_in,
+            'frames_written': written,
+            'dropped_queue': self.dropped_queue,
+            'dropped_pacing': self.dropped_pacing,
+            'duplicated': self.duplicated,
+            'slow_writes': self.slow_writes,
+            'missed_ticks': self.missed_ticks,
+            'write_errors': self.write_errors,
+            'write_ms_mean': (self.write_time_total / calls * 1000.0) if calls else 0.0,
+            'write_ms_max': self.write_time_max * 1000.0,
+            'age_ms': self.age_ms.summary(),
+        }
+
+    def release(self):
+        """
+        Stop the writer thread and release the underlying writer. If the thread
+        is still inside a write after the timeout, the writer is left to it
+        (releasing it mid-write can crash the encoder); returns False then.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        if self._thread.is_alive():
+            print("[stream-writer] Writer thread still busy after 2 s; not releasing the writer")
+            return False
+        if self.writer is not None:
+            self.writer.release()
+        return True
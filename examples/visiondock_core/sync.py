@@ -0,0 +1,134 @@
+"""
+Multi-Camera Frame Synchronizer
+Groups frames from several cameras into sets captured within a skew
+tolerance, for stereo / overlapping-view setups where fusion and counting
+must see simultaneous frames.
+
+Every camera keeps a short history of its latest frames. A set is the newest
+combination (one frame per live camera) whose capture timestamps span at most
+`tolerance_ms`; frames that can no longer be part of any set are discarded.
+"""
+
+import time
+from collections import deque
+
+from .metrics import LatencyHistogram
+
+
+class FrameSynchronizer:
+    """Aligns SlotFrames from several cameras by capture timestamp"""
+
+    def __init__(self, camera_ids, tolerance_ms=10.0, history=4, stale_ms=1000.0):
+        """
+        Args:
+            camera_ids: Cameras a set is built from
+            tolerance_ms: Max spread of capture timestamps within one set
+            history: Frames kept per camera while waiting for partners
+            stale_ms: Cameras silent for longer are left out of sets (e.g. unplugged)
+        """
+        self.tolerance = tolerance_ms / 1000.0
+        self.history = int(history)
+        self.stale = stale_ms / 1000.0
+        self._buffers = {}
+        self._last_arrival = {}
+        self._offset_sum = {}
+        self._offset_n = {}
+        self.offset_ms = {}
+        self.skew_ms = LatencyHistogram()     # Spread (max - min capture time) of emitted sets
+        self.sets = 0
+        self.unmatched = {}
+        for cam_id in camera_ids:
+            self.add_camera(cam_id)
+
+    def add_camera(self, cam_id):
+        if cam_id not in self._buffers:
+            self._buffers[cam_id] = deque()
+            self._last_arrival[cam_id] = None
+            self._offset_sum[cam_id] = 0.0
+            self._offset_n[cam_id] = 0
+            self.offset_ms[cam_id] = LatencyHistogram()   # |offset| from the set's mean capture time
+            self.unmatched[cam_id] = 0
+
+    def remove_camera(self, cam_id):
+        for table in (self._buffers, self._last_arrival, self._offset_sum, self._offset_n, self.offset_ms, self.unmatched):
+            table.pop(cam_id, None)
+
+    def push(self, cam_id, item, now=None):
+        """Add a SlotFrame (seq, timestamp, frame) for cam_id"""
+        buf = self._buffers.get(cam_id)
+        if buf is None or item is None:
+            return
+        if len(buf) >= self.history:
+            buf.popleft()
+            self.unmatched[cam_id] += 1
+        buf.append(item)
+        self._last_arrival[cam_id] = time.monotonic() if now is None else now
+
+    def _live(self, now):
+        return [c for c, t in self._last_arrival.items() if t is not None and now - t <= self.stale]
+
+    def pop_aligned(self, now=None):
+        """Newest aligned set as {cam_id: SlotFrame}, or None if no set can be formed yet"""
+        now = time.monotonic() if now is None else now
+        cams = self._live(now)
+        if not cams or any(not self._buffers[c] for c in cams):
+            return None
+
+        # Latest instant every camera has reached; candidate anchors are the
+        # frames up to it, newest first
+        horizon = min(self._buffers[c][-1].timestamp for c in cams)
+        anchors = sorted((item.timestamp for c in cams for item in self._buffers[c] if item.timestamp <= horizon),
+                         reverse=True)
+        for anchor in anchors:
+            chosen = {c: min(self._buffers[c], key=lambda it: abs(it.timestamp - anchor)) for c in cams}
+            stamps = [item.timestamp for item in chosen.values()]
+            if max(stamps) - min(stamps) <= self.tolerance:
+                self._consume(chosen)
+                return chosen
+
+        self._prune(cams)
+        return None
+
+    def _consume(self, chosen):
+        stamps = [item.timestamp for item in chosen.values()]
+        mean = sum(stamps) / len(stamps)
+        self.skew_ms.record((max(stamps) - min(stamps)) * 1000.0)
+        for cam_id, item in chosen.items():
+            buf = self._buffers[cam_id]
+            while buf and buf[0].seq <= item.seq:
+                if buf.popleft().seq != item.seq:
+                    self.unmatched[cam_id] += 1
+            offset = (item.timestamp - mean) * 1000.0
+            self._offset_sum[cam_id] += offset
+            self._offset_n[cam_id] += 1
+            self.offset_ms[cam_id].record(abs(offset))
+        self.sets += 1
+
+    def _prune(self, cams):
+        """Drop frames that are too old to pair with anything another camera can still deliver"""
+        latest = {c: self._buffers[c][-1].timestamp for c in cams}
+        for c in cams:
+            others = [t for d, t in latest.items() if d != c]
+            if not others:
+                continue
+            limit = max(others) - self.tolerance
+            buf = self._buffers[c]
+            while len(buf) > 1 and buf[0].timestamp < limit:
+                buf.popleft()
+                self.unmatched[c] += 1
+
+    def mean_offset_ms(self, cam_id):
+        """Signed mean capture offset of cam_id relative to its sets (positive = captures late)"""
+        n = self._offset_n.get(cam_id)
+        return self._offset_sum[cam_id] / n if n else 0.0
+
+    def report(self):
+        """Measured inter-camera skew of emitted sets and per-camera offsets"""
+        skew = self.skew_ms.summary()
+        lines = [f"Synchronized sets: {self.sets} (tolerance {self.tolerance * 1000.0:.1f} ms) | "
+                 f"skew p50 {skew['p50']:.2f} | p95 {skew['p95']:.2f} | p99 {skew['p99']:.2f} | max {skew['max']:.2f} ms",
+                 f"{'Cam':>5} {'Mean offset ms':>15} {'|offset| p95':>13} {'Unmatched':>10}"]
+        for cam_id in self._buffers:
+            lines.append(f"{cam_id:>5} {self.mean_offset_ms(cam_id):>+15.2f} "
+                         f"{self.offset_ms[cam_id].percentile(95):>13.2f} {self.unmatched[cam_id]:>10}")
+        return "\n".join(lines)
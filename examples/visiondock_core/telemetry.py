@@ -0,0 +1,142 @@
+"""
+Per-Camera Telemetry
+Capture-to-result latency, inference share, drops and effective FPS per
+camera, collected in fixed-size histograms and emitted at a fixed interval
+as a text table and as JSON lines (for capacity planning).
+"""
+
+import json
+import time
+
+from .metrics import LatencyHistogram
+
+
+class _CameraStats:
+    def __init__(self):
+        self.latency_ms = LatencyHistogram()
+        self.infer_ms = LatencyHistogram()
+        self.total_latency_ms = LatencyHistogram()
+        self.frames = 0
+        self.total_frames = 0
+        self.dropped_mark = 0
+
+
+class CameraTelemetry:
+    """
+    Usage (per batch):
+        telemetry.record_batch(batch, infer_ms, time.monotonic())
+        telemetry.maybe_emit(scheduler.slots)
+    """
+
+    def __init__(self, camera_ids, interval_s=5.0, json_path=None):
+        self.interval = float(interval_s)
+        self.json_path = json_path
+        self.cameras = {cam_id: _CameraStats() for cam_id in camera_ids}
+        self.batches = 0
+        self.infer_total_ms = 0.0
+        self._started = self._last_emit = time.monotonic()
+
+    def add_camera(self, cam_id):
+        self.cameras.setdefault(cam_id, _CameraStats())
+
+    def remove_camera(self, cam_id):
+        self.cameras.pop(cam_id, None)
+
+    def record_batch(self, batch, infer_ms, t_result):
+        """
+        Args:
+            batch: {cam_id: SlotFrame} as returned by BatchScheduler.next_batch()
+            infer_ms: Wall time of the batched model call
+            t_result: time.monotonic() when results were available
+        """
+        if not batch:
+            return
+        share = infer_ms / len(batch)
+        self.batches += 1
+        self.infer_total_ms += infer_ms
+        for cam_id, item in batch.items():
+            stats = self.cameras.get(cam_id)
+            if stats is None:
+                continue
+            latency = max(0.0, (t_result - item.timestamp) * 1000.0)
+            stats.latency_ms.record(latency)
+            stats.total_latency_ms.record(latency)
+            stats.infer_ms.record(share)
+            stats.frames += 1
+            stats.total_frames += 1
+
+    def snapshot(self, slots, elapsed_s):
+        """Metrics for the current interval; resets interval histograms"""
+        cams = {}
+        for cam_id, stats in self.cameras.items():
+            dropped = 0
+            slot = slots.get(cam_id) if slots else None
+            if slot is not None:
+                st = slot.stats()
+                total_dropped = st['dropped'] + st.get('capture_dropped', 0)
+                dropped = total_dropped - stats.dropped_mark
+                stats.dropped_mark = total_dropped
+            lat = stats.latency_ms.summary()
+            cams[str(cam_id)] = {
+                'fps': round(stats.frames / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+                'frames': stats.frames,
+                'dropped': dropped,
+                'latency_ms': lat,
+                'infer_share_ms': round(stats.infer_ms.mean, 3),
+            }
+            stats.latency_ms.reset()
+            stats.infer_ms.reset()
+            stats.frames = 0
+        return {
+            'time': round(time.time(), 3),
+            'interval_s': round(elapsed_s, 3),
+            'cameras': cams,
+        }
+
+    def maybe_emit(self, slots, now=None):
+        """Print the table (and append a JSON line) once per interval"""
+        now = time.monotonic() if now is None else now
+        if now - self._last_emit < self.interval:
+            return None
+        snap = self.snapshot(slots, now - self._last_emit)
+        self._last_emit = now
+        self.emit(snap)
+        return snap
+
+    def emit(self, snap):
+        print(format_table(snap))
+        if self.json_path:
+            with open(self.json_path, 'a') as f:
+                f.write(json.dumps(snap) + "\n")
+
+    def summary(self):
+        """Cumulative per-camera latency distribution since start"""
+        elapsed = time.monotonic() - self._started
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'batches': self.batches,
+            'infer_ms_per_batch': round(self.infer_total_ms / self.batches, 3) if self.batches else 0.0,
+            'cameras': {
+                str(cam_id): {
+                    'frames': stats.total_frames,
+                    'fps': round(stats.total_frames / elapsed, 2) if elapsed > 0 else 0.0,
+                    'latency_ms': stats.total_latency_ms.summary(),
+                }
+                for cam_id, stats in self.cameras.items()
+            },
+        }
+
+
+def format_table(snap):
+    """Render one snapshot as a fixed-width table"""
+    lines = [
+        f"--- Camera telemetry ({snap['interval_s']:.1f}s) ---",
+        f"{'Cam':>5} {'FPS':>7} {'Frames':>7} {'Drop':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'Infer ms':>9}",
+    ]
+    for cam_id, c in snap['cameras'].items():
+        lat = c['latency_ms']
+        lines.append(
+            f"{cam_id:>5} {c['fps']:>7.1f} {c['frames']:>7} {c['dropped']:>6} {lat['p50']:>8.1f} "
+            f"{lat['p95']:>8.1f} {lat['p99']:>8.1f} {lat['max']:>8.1f} {c['infer_share_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
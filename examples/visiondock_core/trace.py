@@ -0,0 +1,175 @@
+"""
+Frame Latency Tracing
+Every frame carries its capture timestamp (buffer PTS or time.monotonic() at
+grab) and is stamped as it leaves each stage. When the frame reaches its sink
+(display, stream-out) the tracer turns the stamps into per-stage and
+end-to-end latencies:
+
+    trace = tracer.begin(item.timestamp, track=cam_id)
+    ...resize...;    trace.mark('resize')
+    ...inference...; trace.mark('inference')
+    ...draw/show...; trace.mark('display')
+    tracer.finish(trace)
+
+Each stage's time is measured from the previous stamp (the first one from
+capture), so the stages add up to the end-to-end age of the frame.
+Histograms are kept cumulatively and per reporting window. For a time
+window, the same spans can be written as a Chrome trace (chrome://tracing,
+ui.perfetto.dev).
+"""
+
+import json
+import os
+import threading
+import time
+
+from .metrics import LatencyHistogram
+
+END_TO_END = 'end_to_end'
+
+
+class FrameTrace:
+    """Capture timestamp + (stage, time) stamps of one frame"""
+
+    __slots__ = ('capture_ts', 'track', 'marks')
+
+    def __init__(self, capture_ts=None, track=None):
+        self.capture_ts = time.monotonic() if capture_ts is None else capture_ts
+        self.track = track
+        self.marks = []
+
+    def mark(self, stage, t=None):
+        self.marks.append((stage, time.monotonic() if t is None else t))
+        return self
+
+    @property
+    def age_ms(self):
+        """Age of the frame now, in milliseconds"""
+        return (time.monotonic() - self.capture_ts) * 1000.0
+
+
+class LatencyTracer:
+    """Per-stage and end-to-end latency histograms, with optional Chrome-trace capture"""
+
+    def __init__(self, name='pipeline'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._total = {}       # stage -> cumulative LatencyHistogram (insertion order = pipeline order)
+        self._window = {}      # stage -> LatencyHistogram since the last window() call
+        self._events = None
+        self._tids = {}
+        self._trace_from = self._trace_until = 0.0
+        self._trace_path = None
+        self.frames = 0
+
+    def begin(self, capture_ts=None, track=None):
+        return FrameTrace(capture_ts, track)
+
+    def _record(self, stage, value):
+        hist = self._total.get(stage)
+        if hist is None:
+            hist = self._total[stage] = LatencyHistogram()
+            self._window[stage] = LatencyHistogram()
+        hist.record(value)
+        self._window[stage].record(value)
+
+    def finish(self, trace):
+        """Record a frame that reached its sink"""
+        if not trace.marks:
+            return
+        with self._lock:
+            prev = trace.capture_ts
+            for stage, t in trace.marks:
+                self._record(stage, max(0.0, (t - prev) * 1000.0))
+                prev = t
+            self._record(END_TO_END, max(0.0, (prev - trace.capture_ts) * 1000.0))
+            self.frames += 1
+            if self._events is not None:
+                self._trace_frame(trace)
+
+    def window(self, reset=True):
+        """{stage: summary} since the last call (for live displays)"""
+        with self._lock:
+            out = {stage: h.summary() for stage, h in self._window.items() if h.count}
+            if reset:
+                for h in self._window.values():
+                    h.reset()
+        return out
+
+    def summary(self):
+        """Cumulative {stage: summary} since start"""
+        with self._lock:
+            return {stage: h.summary() for stage, h in self._total.items()}
+
+    # --- Chrome trace ---------------------------------------------------
+
+    def capture(self, path, seconds, delay_s=0.0):
+        """Write the spans of frames captured in [now + delay_s, + seconds] to `path`"""
+        with self._lock:
+            now = time.monotonic()
+            self._trace_from = now + delay_s
+            self._trace_until = self._trace_from + seconds
+            self._trace_path = path
+            self._events = []
+
+    @property
+    def capturing(self):
+        return self._events is not None
+
+    def _tid(self, track):
+        tid = self._tids.get(track)
+        if tid is None:
+            tid = self._tids[track] = len(self._tids) + 1
+        return tid
+
+    def _trace_frame(self, trace):
+        if trace.capture_ts < self._trace_from:
+            return
+        if trace.capture_ts > self._trace_until:
+            self._write_trace()
+            return
+        tid = self._tid(trace.track)
+        pid = os.getpid()
+        us = 1e6
+        prev = trace.capture_ts
+        self._events.append({'name': 'frame', 'cat': self.name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                             'ts': round(prev * us, 1), 'dur': round((trace.marks[-1][1] - prev) * us, 1)})
+        for stage, t in trace.marks:
+            self._events.append({'name': stage, 'cat': self.name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                                 'ts': round(prev * us, 1), 'dur': round((t - prev) * us, 1)})
+            prev = t
+
+    def _write_trace(self):
+        pid = os.getpid()
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.name}}]
+        meta += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                  'args': {'name': 'frames' if track is None else f"{track}"}}
+                 for track, tid in self._tids.items()]
+        events, path = self._events, self._trace_path
+        self._events = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': meta + events, 'displayTimeUnit': 'ms'}, f)
+            print(f"[trace] {len(events)} spans written to {path}")
+        except OSError as e:
+            print(f"[trace] Could not write {path}: {e}")
+
+    def flush(self):
+        """Write a pending Chrome trace now (e.g. on shutdown before the window ended)"""
+        with self._lock:
+            if self._events:
+                self._write_trace()
+            self._events = None
+
+
+def format_latency(stats, title="Latency"):
+    """Render {stage: summary} as a fixed-width table"""
+    lines = [f"--- {title} (ms) ---",
+             f"{'Stage':<14} {'Frames':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+    for stage, s in stats.items():
+        lines.append(f"{stage:<14} {s['count']:>7} {s['mean']:>8.2f} {s['p50']:>8.2f} "
+                     f"{s['p95']:>8.2f} {s['p99']:>8.2f} {s['max']:>8.2f}")
+    return "\n".join(lines)
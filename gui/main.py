@@ -40,6 +40,14 @@ from PyQt5.QtGui import (
 )
 # Note: PyQt5.sip is handled via --hidden-import in build_release.py
 
+# Shared capture/streaming helpers live in examples/visiondock_core
+sys.path.insert(0, resource_path("examples"))
+from visiondock_core.frame_slot import FrameSlot
+from visiondock_core.gst import CaptureSpec, open_capture
+from visiondock_core.netstream import is_network_source, open_stream, needs_drain, drain_grab, StreamLagMeter
+from visiondock_core.trace import LatencyTracer, END_TO_END
+from visiondock_core.export_cache import resolve_model
+
 
 # =============================================================================
 #  PERSISTENCE MANAGER (SQLITE)
@@ -514,6 +522,8 @@ class ResizableCard(QFrame):
             bh.addWidget(create_badge(mode, "#8B5CF6")) 
             self.eng_badge = create_badge(engine, "#007AFF"); bh.addWidget(self.eng_badge)
             bh.addWidget(create_badge(res, "#10B981"))
+            # Capture-to-display age of shown frames (filled by VideoThread.latency_signal; stages in the tooltip)
+            self.lag_badge = create_badge("LAG --", "#F59E0B"); self.lag_badge.hide(); bh.addWidget(self.lag_badge)
             
             self.rec_btn = QPushButton("REC"); self.rec_btn.setFixedSize(40, 22); self.rec_btn.setCheckable(True)
             self.rec_btn.setStyleSheet("QPushButton { font-size:8px; font-weight:900; border-radius:4px; border:1px solid #333; background:transparent; color:#666; } QPushButton:checked { background:#EF4444; color:white; border:none; }")
@@ -574,6 +584,18 @@ class ResizableCard(QFrame):
             if checked: self.rec_badge.show()
             else: self.rec_badge.hide()
 
+    def update_latency(self, stats):
+        if not hasattr(self, 'lag_badge') or END_TO_END not in stats:
+            return
+        lag_ms = stats[END_TO_END]['p50']
+        col = "#10B981" if lag_ms < 200 else ("#F59E0B" if lag_ms < 1000 else "#EF4444")
+        self.lag_badge.setText(f"LAG {lag_ms:.0f} MS")
+        self.lag_badge.setStyleSheet(f"color: {col}; font-size: 8px; font-weight: 800; padding: 3px 6px; border-radius: 4px; border: 1px solid {col}50; letter-spacing:0.5px; background: transparent;")
+        self.lag_badge.setToolTip("\n".join(
+            f"{stage.replace('_', ' ')}: p50 {st['p50']:.1f} ms | p95 {st['p95']:.1f} ms | max {st['max']:.1f} ms"
+            for stage, st in stats.items()))
+        self.lag_badge.show()
+
     def update_ai_ui(self, meta):
         if not hasattr(self, 'ai_meta'):
             return
@@ -611,7 +633,7 @@ class ResizableCard(QFrame):
             lbl.setMaximumWidth(700)
         msg.exec_()
 
-    def upd_img(self, img):
+    def upd_img(self, img, trace=None):
         if not hasattr(self, 'view') or img is None or img.size == 0:
             return
         try:
@@ -627,6 +649,8 @@ class ResizableCard(QFrame):
             self.view.setPixmap(pix)
             if not self.is_docker:
                 self._last_frame = img.copy()
+            if trace is not None and hasattr(self, 't'):
+                self.t.frame_displayed(trace)
         except Exception:
             pass
 
@@ -731,7 +755,8 @@ class VisionAnalytics:
         if VisionAnalytics._yolo_model is None:
             try:
                 from ultralytics import YOLO
-                VisionAnalytics._yolo_model = YOLO("yolo11n.pt")
+                # A cached TensorRT engine of the weights (tensorrt_export.py) is used when one exists
+                VisionAnalytics._yolo_model = YOLO(resolve_model("yolo11n.pt", prefer_engine=True))
                 VisionAnalytics._yolo_available = True
             except Exception:
                 VisionAnalytics._yolo_available = False
@@ -791,12 +816,30 @@ def _profile_to_size(profile):
     return None
 
 class VideoThread(QThread):
-    change_pixmap = pyqtSignal(np.ndarray)
+    change_pixmap = pyqtSignal(np.ndarray, object)  # frame, its FrameTrace (handed back to frame_displayed)
     analytics_signal = pyqtSignal(dict)
+    latency_signal = pyqtSignal(dict)
     
-    def __init__(self, src, engine="STANDARD", target_size=None):
+    def __init__(self, src, engine="STANDARD", target_size=None, backend=None):
         super().__init__(); self.src = src; self.engine = engine; self.target_size = target_size
+        # "opencv" (cv2.VideoCapture) or "appsink" (native GStreamer appsink with mapped buffers + PTS)
+        self.backend = backend or os.getenv("VISIONDOCK_CAPTURE_BACKEND", "opencv")
         self.running = True; self.is_recording = False; self.out = None; self.snap_req = False
+        # Capture runs on its own thread and overwrites this slot; processing always takes the newest frame
+        self.slot = FrameSlot()
+        # Network streams: PTS vs arrival gives the frame's source time (so lag includes buffering)
+        self.lag_meter = StreamLagMeter()
+        # Every frame carries its capture timestamp through the stages; the card closes the trace once painted
+        self.tracer = LatencyTracer(f"VideoThread {src}")
+        trace_s = float(os.getenv("VISIONDOCK_TRACE_SECONDS", "0") or 0)
+        if trace_s > 0:
+            name = re.sub(r"[^A-Za-z0-9_.-]", "_", str(src))[-40:]
+            path = os.path.join(os.path.expanduser("~"), ".visiondock", "traces", f"{name}_{datetime.now().strftime('%m%d_%H%M%S')}.json")
+            self.tracer.capture(path, trace_s, delay_s=2.0)
+
+    def frame_displayed(self, trace):
+        """Called by the card after painting with the trace emitted alongside the frame (GUI thread)"""
+        self.tracer.finish(trace.mark('display'))
 
     def toggle_record(self, start=True):
         self.is_recording = start
@@ -805,6 +848,44 @@ class VideoThread(QThread):
 
     def snapshot(self): self.snap_req = True
 
+    def _open(self, source):
+        # RTSP/HTTP: rtspsrc latency=0 / FFmpeg nobuffer instead of default (seconds deep) buffering
+        if is_network_source(source):
+            self.lag_meter.reset()
+            try:
+                return open_stream(source, backend=self.backend)
+            except ImportError as e:
+                print(f"[!] Video Engine: {e}; using OpenCV capture")
+                return open_stream(source)
+        # GStreamer Optimized Pipeline for Jetson (variant probed once, then cached per host/L4T)
+        if isinstance(source, int) and platform.system() == "Linux" and os.path.exists("/usr/bin/nvgstcapture"):
+            try:
+                return open_capture(CaptureSpec('csi', source, 1280, 720, 30), backend=self.backend)
+            except ImportError as e:
+                print(f"[!] Video Engine: {e}; using OpenCV capture")
+                return open_capture(CaptureSpec('csi', source, 1280, 720, 30))
+        return cv2.VideoCapture(source)
+
+    def _capture_loop(self, source, cap):
+        while self.running:
+            if cap is None or not cap.isOpened():
+                print(f"[!] Video Engine: Reconnecting to {source}...")
+                cap = self._open(source)
+                time.sleep(2); continue
+
+            if needs_drain(cap):
+                # FFmpeg queues frames internally: skip the backlog, decode color for the newest only
+                ret, frame, _ = drain_grab(cap)
+            else:
+                ret, frame = cap.read()
+            if not ret:
+                print(f"[!] Video Engine: Frame drop on {source}"); time.sleep(1)
+                cap.release(); cap = None; continue
+            # appsink backend carries the buffer PTS (monotonic clock); OpenCV falls back to arrival time
+            ts = self.lag_meter.observe(cap) if is_network_source(source) else None
+            self.slot.publish(frame, ts if ts is not None else getattr(cap, 'last_timestamp', None))
+        if cap: cap.release()
+
     def run(self):
         source = self.src
         try:
@@ -812,34 +893,29 @@ class VideoThread(QThread):
         except: pass
         
         print(f"[*] Video Engine: Attempting to open source -> {source}")
-        # GStreamer Optimized Pipeline for Jetson
-        if isinstance(source, int) and platform.system() == "Linux" and os.path.exists("/usr/bin/nvgstcapture"):
-            gst_str = f"nvarguscamerasrc sensor-id={source} ! video/x-raw(memory:NVMM), width=1280, height=720, format=NV12, framerate=30/1 ! nvvidconv ! video/x-raw, format=BGRx ! videoconvert ! video/x-raw, format=BGR ! appsink"
-            cap = cv2.VideoCapture(gst_str, cv2.CAP_GSTREAMER)
-        else:
-            cap = cv2.VideoCapture(source)
+        cap = self._open(source)
 
         if not cap.isOpened():
             print(f"[!] Video Engine: Failed to open source -> {source}")
             return
 
         print(f"[+] Video Engine: Stream established -> {source}")
+        grabber = threading.Thread(target=self._capture_loop, args=(source, cap), daemon=True)
+        grabber.start()
+        latency_emit = time.monotonic()
         while self.running:
-            if cap is None or not cap.isOpened():
-                print(f"[!] Video Engine: Reconnecting to {source}...")
-                cap = cv2.VideoCapture(source)
-                time.sleep(2); continue
-
-            ret, frame = cap.read()
-            if not ret:
-                print(f"[!] Video Engine: Frame drop on {source}"); time.sleep(1)
-                cap.release(); cap = None; continue
+            item = self.slot.wait(timeout=0.5)
+            if item is None: continue
+            frame = item.frame
+            trace = self.tracer.begin(item.timestamp).mark('wait')
 
             if self.target_size and len(self.target_size) == 2 and frame is not None:
                 frame = cv2.resize(frame, (self.target_size[0], self.target_size[1]), interpolation=cv2.INTER_LINEAR)
+                trace.mark('resize')
 
             # AI & NVR Layer...
             frame, meta = VisionAnalytics.process(frame, self.engine)
+            trace.mark('analytics')
             if meta: self.analytics_signal.emit(meta)
             
             # 2. Snapshot Layer
@@ -848,6 +924,7 @@ class VideoThread(QThread):
                 if not os.path.exists(rec_dir): os.makedirs(rec_dir)
                 path = os.path.join(rec_dir, f"SNAP_{datetime.now().strftime('%m%d_%H%M%S')}.jpg")
                 cv2.imwrite(path, frame); self.snap_req = False
+                trace.mark('snapshot')
 
             if self.is_recording:
                 rec_frame = frame.copy()
@@ -859,11 +936,18 @@ class VideoThread(QThread):
                     path = os.path.join(rec_dir, f"REC_{datetime.now().strftime('%m%d_%H%M%S')}.avi")
                     self.out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 20, (frame.shape[1], frame.shape[0]))
                 self.out.write(rec_frame)
+                trace.mark('record')
             
-            self.change_pixmap.emit(frame)
-            time.sleep(0.01)
+            # The trace travels with the frame; frames that are never painted (previews) just drop it
+            self.change_pixmap.emit(frame, trace)
+            now = time.monotonic()
+            if now - latency_emit >= 1.0:
+                stats = self.tracer.window()
+                if stats: self.latency_signal.emit(stats)
+                latency_emit = now
+        grabber.join(timeout=1.0)
+        self.tracer.flush()
         if self.out: self.out.release(); self.out = None
-        if cap: cap.release()
 
     def stop(self):
         self.running = False
@@ -1316,7 +1400,7 @@ class App(QMainWindow):
             ml.addWidget(pv, 1); main_layout.addWidget(mon_frame, 0, Qt.AlignCenter)
             
             preview_thread = [None]
-            def update_preview_ui(img):
+            def update_preview_ui(img, trace=None):
                 rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB); h, w, c = rgb.shape
                 qimg = QImage(rgb.data, w, h, c * w, QImage.Format_RGB888)
                 pv.setPixmap(QPixmap.fromImage(qimg).scaled(466, 266, Qt.KeepAspectRatio, Qt.SmoothTransformation))
@@ -1575,6 +1659,7 @@ class App(QMainWindow):
 
             t = VideoThread(src, engine, target_size=target_size); t.change_pixmap.connect(card.upd_img)
             t.analytics_signal.connect(card.update_ai_ui)
+            t.latency_signal.connect(card.update_latency)
             t.start(); card.t = t 
         else:
             card.view.setText("No Source Signal")
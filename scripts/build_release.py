@@ -17,6 +17,8 @@ def build():
         "--noconfirm",
         "--clean",
         "--add-data", "visiondock.svg:.",
+        # Shared helpers imported by the GUI (examples/visiondock_core)
+        "--paths", "examples",
         # Common hidden imports to ensure no missing modules in bundle
         "--hidden-import", "PyQt5.sip",
         "--hidden-import", "PyQt5.QtSvg",